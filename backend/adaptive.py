@@ -0,0 +1,98 @@
+import math
+import threading
+import time
+
+
+def default_signals(cpu_high=80.0):
+    """
+    Sledované metriky: {metrika: (práh nebo None, minimální změna, relativní změna)}.
+    Změna se počítá proti průměru a musí být aspoň max(minimální, relativní * průměr).
+    """
+    return {
+        'sessions.active': (None, 5, 0.2),
+        'ash.active_sessions': (None, 5, 0.2),
+        # AAS na jedno CPU >= 1 = sessions čekají na CPU
+        'cpu.aas_per_cpu': (1.0, 0.25, 0.2),
+        'cpu.host_cpu_utilization_pct': (cpu_high, 15.0, 0.0),
+    }
+
+
+class AdaptiveInterval:
+    """
+    Doporučený interval sběru a dotazování jedné DB podle toho, co se v ní děje.
+
+    Každá sledovaná metrika má klouzavý průměr (EWMA s časovou konstantou
+    tau v s, nezávislý na tom, jak často hodnoty chodí). Překročený práh nebo
+    výrazná odchylka od průměru stáhne interval hned na minimum; po každém
+    klidném intervalu se prodlouží backoff-krát až na maximum. Začíná se na
+    maximu - start procesu sám o sobě není důvod k častějšímu sběru.
+    """
+
+    def __init__(self, min_interval, max_interval, backoff=2.0, signals=None, tau=60.0):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.signals = signals if signals is not None else default_signals()
+        self.tau = tau
+        self.interval = self.max_interval
+        self.reason = 'startup'
+        self.changed_at = None
+        self.tightened = 0
+        self._baselines = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values, now=None):
+        """values = {metrika: číslo}; neznámé metriky a None se přeskočí. Vrátí interval v s."""
+        if now is None:
+            now = time.monotonic()
+        hot = None
+        with self._lock:
+            for name, value in values.items():
+                signal = self.signals.get(name)
+                if signal is None or value is None:
+                    continue
+                threshold, min_delta, rel_delta = signal
+                baseline = self._baselines.get(name)
+                if baseline is None:
+                    self._baselines[name] = (value, now)
+                    if threshold is not None and value >= threshold:
+                        hot = hot or f'{name} {value:g} >= {threshold:g}'
+                    continue
+                mean, last = baseline
+                if threshold is not None and value >= threshold:
+                    hot = hot or f'{name} {value:g} >= {threshold:g}'
+                elif abs(value - mean) >= max(min_delta, rel_delta * abs(mean)):
+                    hot = hot or f'{name} {mean:.4g} -> {value:g}'
+                alpha = 1 - math.exp(-max(0.0, now - last) / self.tau)
+                self._baselines[name] = (mean + alpha * (value - mean), now)
+
+            if self.changed_at is None:
+                self.changed_at = now
+            if hot is not None:
+                if self.interval > self.min_interval:
+                    self.tightened += 1
+                self.interval = self.min_interval
+                self.reason = hot
+                self.changed_at = now
+            elif self.interval < self.max_interval and now - self.changed_at >= self.interval:
+                # Klidný celý interval - prodloužit
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+                self.reason = 'stable'
+                self.changed_at = now
+            return self.interval
+
+    @property
+    def next_poll_ms(self):
+        return int(self.interval * 1000)
+
+    def status(self):
+        with self._lock:
+            return {
+                'interval_sec': self.interval,
+                'next_poll_ms': self.next_poll_ms,
+                'min_interval_sec': self.min_interval,
+                'max_interval_sec': self.max_interval,
+                'reason': self.reason,
+                'tightened': self.tightened,
+                'baselines': {name: round(mean, 3) for name, (mean, _) in self._baselines.items()},
+            }
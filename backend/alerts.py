@@ -0,0 +1,391 @@
+import fnmatch
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from settings import Config
+from sampler import flatten_resources
+
+SEVERITY_RANK = {'warning': 1, 'critical': 2}
+
+# Výchozí pravidla, pokud neexistuje ALERT_RULES_FILE (stejný formát jako alert_rules.json.example)
+DEFAULT_RULES = [
+    {'name': 'tablespace_full', 'metric': 'tablespace.*.pct_used', 'type': 'threshold',
+     'warning': 85, 'critical': 95, 'hysteresis': 2},
+    {'name': 'host_cpu_high', 'metric': 'cpu.host_cpu_utilization_pct', 'type': 'threshold',
+     'warning': 85, 'critical': 95, 'for': 3, 'hysteresis': 5},
+    {'name': 'active_sessions_spike', 'metric': 'sessions.active', 'type': 'anomaly',
+     'z': 4, 'z_critical': 8, 'min_delta': 5, 'direction': 'up', 'for': 2},
+    {'name': 'wait_time_spike', 'metric': 'wait.*.ms_per_sec', 'type': 'anomaly',
+     'z': 4, 'min_delta': 100, 'direction': 'up', 'for': 2},
+]
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+def collect_values(resources, metrics):
+    """Číselné metriky jednoho sběru pro pravidla po sekcích: {sekce: (čas načtení, {'metrika': číslo})}"""
+    sections = {}
+    if resources:
+        sections['system_resources'] = (resources.get('timestamp'), flatten_resources(resources))
+    if metrics:
+        info = metrics.get('_sections', {})
+
+        def add(name, values):
+            if name in info and 'fetched_at' in info[name]:
+                sections[name] = (info[name]['fetched_at'], values)
+
+        add('sessions', {'sessions.active': metrics.get('active_sessions'),
+                         'sessions.total': metrics.get('total_sessions')})
+        add('tablespaces', {f"tablespace.{ts['name']}.pct_used": ts['pct_used']
+                            for ts in metrics.get('tablespaces') or []})
+        add('system_events', {f"wait.{event['event']}.ms_per_sec": event['wait_ms_per_sec']
+                              for event in metrics.get('system_events') or []})
+        add('wait_events', {f"wait.{event['event']}.sessions": event['count']
+                            for event in metrics.get('wait_events') or []})
+    return sections
+
+
+class Rule:
+    """
+    Pravidlo nad metrikami podle jména (fnmatch, např. tablespace.*.pct_used).
+
+    threshold: warning/critical práh (above=False = alarm pod prahem).
+    anomaly: z-skóre proti klouzavé bázi (EWMA průměr a rozptyl, váha alpha),
+    až po warmup vzorcích a jen při odchylce aspoň min_delta. Směrodatná
+    odchylka má spodní mez min_std a min_std_ratio * |průměr| (plochá báze
+    by dala nekonečné z); po adapt_after odlehlých vzorcích po sobě se do
+    báze započítávají celé hodnoty (trvalá změna úrovně).
+    Alarm vzniká po for_samples porušeních po sobě a končí po clear_samples
+    vzorcích v pořádku; hysteresis posune práh pro už aktivní alarm.
+    """
+
+    def __init__(self, name, metric, type='threshold', warning=None, critical=None, above=True,
+                 hysteresis=0.0, for_samples=1, clear_samples=1, z=3.0, z_critical=None, alpha=0.1,
+                 warmup=20, min_delta=0.0, direction='both', min_std=0.0, min_std_ratio=0.05,
+                 adapt_after=10, targets=None):
+        if type not in ('threshold', 'anomaly'):
+            raise ValueError(f"Rule {name}: unknown type {type}")
+        if type == 'threshold' and warning is None and critical is None:
+            raise ValueError(f"Rule {name}: threshold rule needs warning or critical")
+        if direction not in ('up', 'down', 'both'):
+            raise ValueError(f"Rule {name}: direction must be up, down or both")
+        self.name = name
+        self.metric = metric
+        self.type = type
+        self.warning = warning
+        self.critical = critical
+        self.above = above
+        self.hysteresis = hysteresis
+        self.for_samples = max(1, int(for_samples))
+        self.clear_samples = max(1, int(clear_samples))
+        self.z = z
+        self.z_critical = z_critical
+        self.alpha = alpha
+        self.warmup = warmup
+        self.min_delta = min_delta
+        self.direction = direction
+        self.min_std = min_std
+        self.min_std_ratio = min_std_ratio
+        self.adapt_after = max(1, int(adapt_after))
+        self.targets = set(targets) if targets else None
+
+    @classmethod
+    def from_dict(cls, entry):
+        entry = dict(entry)
+        # V JSON "for"/"clear" - for je v Pythonu klíčové slovo
+        if 'for' in entry:
+            entry['for_samples'] = entry.pop('for')
+        if 'clear' in entry:
+            entry['clear_samples'] = entry.pop('clear')
+        if 'name' not in entry or 'metric' not in entry:
+            raise ValueError(f"Alert rule without name or metric: {entry}")
+        return cls(**entry)
+
+    def applies(self, target_id, metric):
+        return (self.targets is None or target_id in self.targets) and fnmatch.fnmatchcase(metric, self.metric)
+
+    def to_dict(self):
+        result = {'name': self.name, 'metric': self.metric, 'type': self.type,
+                  'for': self.for_samples, 'clear': self.clear_samples, 'hysteresis': self.hysteresis,
+                  'targets': sorted(self.targets) if self.targets else None}
+        if self.type == 'threshold':
+            result.update(warning=self.warning, critical=self.critical, above=self.above)
+        else:
+            result.update(z=self.z, z_critical=self.z_critical, alpha=self.alpha, warmup=self.warmup,
+                          min_delta=self.min_delta, direction=self.direction, min_std=self.min_std,
+                          min_std_ratio=self.min_std_ratio, adapt_after=self.adapt_after)
+        return result
+
+
+class _Series:
+    """Stav jedné dvojice (pravidlo, metrika) cíle - konstantní paměť"""
+    __slots__ = ('mean', 'var', 'n', 'outliers', 'breaches', 'oks', 'alert')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+        self.outliers = 0
+        self.breaches = 0
+        self.oks = 0
+        self.alert = None
+
+
+def load_rules(path):
+    """Pravidla z JSON souboru ({"rules": [...]}), jinak DEFAULT_RULES"""
+    entries = DEFAULT_RULES
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        entries = data.get('rules', []) if isinstance(data, dict) else data
+    return [Rule.from_dict(entry) for entry in entries]
+
+
+class AlertEngine:
+    """
+    Vyhodnocuje pravidla průběžně nad každým dokončeným sběrem.
+
+    observe() projde jen metriky sběru; každá má předpočítaný seznam
+    pravidel a pevný stav (_Series), takže vzorek stojí O(1) na metriku.
+    Aktivní alarm je jeden na (cíl, pravidlo, metrika) - opakovaná porušení
+    ho jen aktualizují, vyřešené alarmy jdou do omezené historie.
+    """
+
+    def __init__(self, rules, history=500, stale_after=600):
+        self.rules = list(rules)
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._series = {}
+        self._matches = {}
+        self._active = {}
+        # Čas načtení a metriky posledního vyhodnoceného sběru sekce: {(cíl, sekce): (čas, {metriky})}
+        self._sections = {}
+        # Poslední sběr cíle - alarmy cíle, který se dlouho nesbírá, jsou stale
+        self._target_seen = {}
+        self._history = deque(maxlen=history)
+        self.samples = 0
+        self.evaluations = 0
+        self.fired = 0
+        self.resolved = 0
+
+    def _rules_for(self, target_id, metric):
+        key = (target_id, metric)
+        rules = self._matches.get(key)
+        if rules is None:
+            rules = self._matches[key] = [rule for rule in self.rules if rule.applies(target_id, metric)]
+        return rules
+
+    def observe(self, target_id, values, ts=None):
+        """Vyhodnotí jeden sběr cíle: values = {'metrika': číslo}"""
+        if ts is None:
+            ts = time.time()
+        with self._lock:
+            self.samples += 1
+            self._target_seen[target_id] = ts
+            for metric, value in values.items():
+                if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                for rule in self._rules_for(target_id, metric):
+                    key = (target_id, rule.name, metric)
+                    series = self._series.get(key)
+                    if series is None:
+                        series = self._series[key] = _Series()
+                    self._evaluate(key, rule, series, float(value), ts)
+                    self.evaluations += 1
+
+    def observe_sections(self, target_id, sections, ts=None):
+        """
+        Vyhodnotí sběr po sekcích (collect_values). Sekce z cache (stejný čas
+        načtení jako minule) se přeskočí - opakovaná hodnota by zužovala bázi.
+        Alarmy metrik, které z nově načtené sekce zmizely, se vyřeší.
+        """
+        if ts is None:
+            ts = time.time()
+        values = {}
+        missing = []
+        with self._lock:
+            self._target_seen[target_id] = ts
+            for name, (fetched_at, section_values) in sections.items():
+                previous = self._sections.get((target_id, name))
+                if previous is not None and previous[0] == fetched_at:
+                    continue
+                present = {metric for metric, value in section_values.items() if value is not None}
+                if previous is not None:
+                    missing.extend(previous[1] - present)
+                self._sections[(target_id, name)] = (fetched_at, present)
+                values.update(section_values)
+            for metric in missing:
+                for rule in self._rules_for(target_id, metric):
+                    key = (target_id, rule.name, metric)
+                    series = self._series.pop(key, None)
+                    if series is not None and series.alert is not None:
+                        self._resolve(key, series, None, ts)
+                self._matches.pop((target_id, metric), None)
+        if values:
+            self.observe(target_id, values, ts)
+
+    def _evaluate(self, key, rule, series, value, ts):
+        current = series.alert['severity'] if series.alert else None
+        if rule.type == 'threshold':
+            severity, detail = self._threshold(rule, value, current), None
+        else:
+            severity, detail = self._anomaly(rule, series, value, current)
+
+        if severity is not None:
+            series.oks = 0
+            series.breaches += 1
+            if series.alert is not None:
+                alert = series.alert
+                alert.update(severity=severity, value=value, last_seen=_iso(ts), samples=alert['samples'] + 1)
+                if rule.type == 'threshold':
+                    alert['threshold'] = rule.critical if severity == 'critical' else rule.warning
+                # Nejhorší hodnota - u alarmů "pod prahem" nejmenší
+                low = not rule.above if rule.type == 'threshold' else rule.direction == 'down'
+                alert['peak'] = min(alert['peak'], value) if low else max(alert['peak'], value)
+                if detail:
+                    alert.update(detail)
+            elif series.breaches >= rule.for_samples:
+                series.alert = self._fire(key, rule, severity, value, ts, detail)
+        else:
+            series.breaches = 0
+            if series.alert is not None:
+                series.oks += 1
+                if series.oks >= rule.clear_samples:
+                    self._resolve(key, series, value, ts)
+
+    def _threshold(self, rule, value, current):
+        for severity, limit in (('critical', rule.critical), ('warning', rule.warning)):
+            if limit is None:
+                continue
+            # Hysterese: aktivní alarm dané úrovně drží i kousek pod prahem
+            margin = rule.hysteresis if current and SEVERITY_RANK[current] >= SEVERITY_RANK[severity] else 0
+            if (value >= limit - margin) if rule.above else (value <= limit + margin):
+                return severity
+        return None
+
+    def _anomaly(self, rule, series, value, current):
+        severity = detail = None
+        update = value
+        if series.n >= rule.warmup:
+            deviation = value - series.mean
+            std = max(math.sqrt(series.var), rule.min_std, rule.min_std_ratio * abs(series.mean), 1e-9)
+            z = deviation / std
+            score = z if rule.direction == 'up' else -z if rule.direction == 'down' else abs(z)
+            margin = rule.hysteresis if current else 0
+            if abs(deviation) >= rule.min_delta:
+                if rule.z_critical is not None and score >= rule.z_critical - margin:
+                    severity = 'critical'
+                elif score >= rule.z - margin:
+                    severity = 'warning'
+            detail = {'baseline': round(series.mean, 3), 'z_score': round(z, 2)}
+            if abs(z) > rule.z:
+                series.outliers += 1
+                # Odlehlý vzorek se do báze započte jen na hranici z - jinak by ji
+                # špička sama rozšířila; trvalá změna úrovně se po adapt_after vzorcích započte celá
+                if series.outliers < rule.adapt_after:
+                    update = series.mean + math.copysign(rule.z * std, deviation)
+            else:
+                series.outliers = 0
+        # EWMA průměr a rozptyl
+        if series.n == 0:
+            series.mean = value
+        else:
+            diff = update - series.mean
+            increment = rule.alpha * diff
+            series.mean += increment
+            series.var = (1 - rule.alpha) * (series.var + diff * increment)
+        series.n += 1
+        return severity, detail
+
+    def _fire(self, key, rule, severity, value, ts, detail):
+        target_id, rule_name, metric = key
+        alert = {
+            'id': ':'.join(key),
+            'target': target_id,
+            'rule': rule_name,
+            'metric': metric,
+            'type': rule.type,
+            'severity': severity,
+            'value': value,
+            'peak': value,
+            'started_at': _iso(ts),
+            'last_seen': _iso(ts),
+            'samples': 1,
+        }
+        if rule.type == 'threshold':
+            alert['threshold'] = rule.critical if severity == 'critical' else rule.warning
+        if detail:
+            alert.update(detail)
+        self._active[key] = alert
+        self.fired += 1
+        print(f"Alert {severity}: {alert['id']} = {value}")
+        return alert
+
+    def _resolve(self, key, series, value, ts):
+        alert = self._active.pop(key, series.alert)
+        alert['resolved_at'] = _iso(ts)
+        alert['resolved_value'] = value
+        self._history.append(alert)
+        series.alert = None
+        series.oks = 0
+        self.resolved += 1
+        print(f"Alert resolved: {alert['id']} = {value}")
+
+    def active(self, target_id=None, severity=None):
+        """Aktivní alarmy, nejzávažnější a nejstarší první"""
+        now = time.time()
+        with self._lock:
+            alerts = [dict(alert) for alert in self._active.values()
+                      if (target_id is None or alert['target'] == target_id)
+                      and (severity is None or alert['severity'] == severity)]
+            for alert in alerts:
+                # Cíl se dlouho nesbírá (nedostupný) - stav alarmu není ověřený
+                alert['stale'] = now - self._target_seen.get(alert['target'], now) > self.stale_after
+        alerts.sort(key=lambda alert: (-SEVERITY_RANK[alert['severity']], alert['started_at']))
+        return alerts
+
+    def history(self, target_id=None, limit=100):
+        """Vyřešené alarmy, nejnovější první"""
+        with self._lock:
+            alerts = [dict(alert) for alert in reversed(self._history)
+                      if target_id is None or alert['target'] == target_id]
+        return alerts[:limit]
+
+    def on_collection(self, target, metrics, resources, ts):
+        """Listener scheduleru - jeden dokončený sběr cíle"""
+        self.observe_sections(target.id, collect_values(resources, metrics), ts)
+
+    def on_sample(self, sample, target_id):
+        """Listener sampleru (výchozí DB), když scheduler neběží"""
+        self.observe_sections(target_id, collect_values(sample['resources'], sample['metrics']), sample['ts'])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rules': len(self.rules),
+                'series': len(self._series),
+                'active': len(self._active),
+                'samples': self.samples,
+                'evaluations': self.evaluations,
+                'fired': self.fired,
+                'resolved': self.resolved,
+            }
+
+
+_engine = None
+_lock = threading.Lock()
+
+
+def get_alert_engine():
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = AlertEngine(load_rules(Config.ALERT_RULES_FILE), Config.ALERT_HISTORY, Config.ALERT_STALE_AFTER)
+        return _engine
@@ -1,18 +1,104 @@
+import atexit
+import os
+import threading
 from flask import Flask
 from flask_cors import CORS
-from config import Config
+from settings import Config
 from routes import api
+from db import drain_pools
+from sampler import get_sampler, start_sampler, stop_sampler
+from scheduler import get_scheduler, start_scheduler, stop_scheduler
+from ash import start_ash, stop_ash
+from alerts import get_alert_engine
+from warmup import start_warmup
+from recording import open_replay, stop_recording
+from services import query_cursors, set_replay
+import services
+from stream import broadcaster
+from encoding import FastJSONProvider, compress_response
+from targets import registry
+from telemetry import start_request, record_request
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)  # Povolí CORS pro frontend
+# Latence route handlerů do /api/metrics (měří se před kompresí odpovědi)
+app.before_request(start_request)
+app.after_request(compress_response)
+app.after_request(record_request)
 
 # Register Blueprint
 app.register_blueprint(api)
 
+
+def enable_replay(path, speed=1.0, loop=False):
+    """Health, system-resources i stream ze záznamu místo DB (sběr na pozadí se nespustí)"""
+    set_replay(open_replay(path, speed, loop))
+
+
+if Config.REPLAY_FILE:
+    enable_replay(Config.REPLAY_FILE, Config.REPLAY_SPEED, Config.REPLAY_LOOP)
+
+
+def start_background():
+    """Spustí sampler, scheduler a ASH sampler - jednou v procesu, který obsluhuje požadavky"""
+    if services.replay_player is not None:
+        # Při přehrávání se do DB nepřipojuje nic
+        return
+    if Config.WARMUP_ENABLED:
+        start_warmup()
+    if Config.ALERTS_ENABLED:
+        # Alarmy ze sběrů scheduleru (všechny cíle), bez něj aspoň ze sampleru výchozí DB
+        engine = get_alert_engine()
+        if Config.SCHEDULER_ENABLED:
+            get_scheduler().add_listener(engine.on_collection)
+        elif Config.SAMPLER_ENABLED:
+            get_sampler().add_listener(lambda sample: engine.on_sample(sample, registry.default.id))
+    # Zavírání nepoužívaných stránkovaných kurzorů (drží spojení z poolu) i bez dalších požadavků
+    if Config.SCHEDULER_ENABLED:
+        get_scheduler().add_listener(lambda *collection: query_cursors.reap())
+    elif Config.SAMPLER_ENABLED:
+        get_sampler().add_listener(lambda sample: query_cursors.reap())
+    if Config.SAMPLER_ENABLED:
+        start_sampler()
+    if Config.SCHEDULER_ENABLED:
+        start_scheduler()
+    if Config.ASH_ENABLED:
+        start_ash()
+
+
+_shutdown_lock = threading.Lock()
+_shut_down = False
+
+
+def shutdown(timeout=0):
+    """Ukončí SSE streamy a sběr, zavře kurzory a po vrácení spojení (max. timeout s) pooly - jen jednou"""
+    global _shut_down
+    with _shutdown_lock:
+        if _shut_down:
+            return
+        _shut_down = True
+    broadcaster.close()
+    stop_sampler()
+    stop_scheduler()
+    stop_ash()
+    stop_recording()
+    query_cursors.close_all()
+    drain_pools(timeout)
+
+
+# Při ukončení procesu vrátit všechna spojení z poolu
+atexit.register(shutdown)
+
 if __name__ == '__main__':
     print("=" * 60)
     print("Starting Oracle Monitoring Backend...")
-    print(f"Database: {Config.ORACLE_USER}@{Config.ORACLE_HOST}:{Config.ORACLE_PORT}/{Config.ORACLE_SERVICE}")
+    print(f"Database: {registry.default.dsn}")
+    print(f"Targets: {', '.join(registry.ids())}")
     print(f"API will be available at: http://localhost:5000")
     print("=" * 60)
+    # Debug reloader spouští skript dvakrát - sampler jen v procesu, který obsluhuje požadavky
+    # Vývojový server - pro produkci serve.py (README)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,283 @@
+import bisect
+import threading
+import time
+from array import array
+from collections import Counter
+
+from settings import Config
+from services import sample_active_sessions
+
+# Stav vzorku: na CPU, nebo čekání (event/wait class z V$SESSION)
+ON_CPU = 0
+WAITING = 1
+
+# Rozměry agregací -> sloupce kruhového bufferu
+DIMENSIONS = {
+    'event': ('event',),
+    'wait_class': ('wait_class',),
+    'sql_id': ('sql_id',),
+    'username': ('username',),
+    'session': ('sid', 'serial'),
+}
+
+
+class _Strings:
+    """Slovník řetězců -> malá celá čísla (v bufferu jsou jen kódy)"""
+
+    def __init__(self):
+        self.codes = {None: 0}
+        self.values = [None]
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AshBuffer:
+    """
+    Kruhový buffer vzorků aktivních sessions s pevnou pamětí (Active Session
+    History v malém).
+
+    Každý sloupec je array.array o kapacitě capacity řádků; textové hodnoty
+    (event, sql_id, uživatel...) se ukládají jako kódy do sdíleného slovníku.
+    Vzorky jsou seřazené podle času, takže okno posledních N s se najde
+    půlením intervalu a počítá se nad řezy polí. Slovník se promazává, až
+    když naroste na dvojnásobek hodnot živých při minulém promazání (aspoň
+    capacity) - při mnoha různých SQL_ID se tak nepromazává každý vzorek.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._columns = {
+            'ts': array('d', [0.0]) * capacity,
+            'sid': array('i', [0]) * capacity,
+            'serial': array('i', [0]) * capacity,
+            'username': array('i', [0]) * capacity,
+            'sql_id': array('i', [0]) * capacity,
+            'event': array('i', [0]) * capacity,
+            'wait_class': array('i', [0]) * capacity,
+            'state': array('b', [0]) * capacity,
+        }
+        self._strings = _Strings()
+        self._compact_at = capacity
+        self._start = 0
+        self._size = 0
+        self.samples = 0
+        self.compactions = 0
+        self.first_ts = None
+
+    def append(self, ts, rows):
+        """Uloží jeden vzorek: rows = [(sid, serial, username, sql_id, event, wait_class, state)]"""
+        columns = self._columns
+        with self._lock:
+            if self.first_ts is None:
+                self.first_ts = ts
+            strings = self._strings
+            for sid, serial, username, sql_id, event, wait_class, state in rows:
+                if self._size < self.capacity:
+                    index = (self._start + self._size) % self.capacity
+                    self._size += 1
+                else:
+                    # Plný buffer - přepíše se nejstarší řádek
+                    index = self._start
+                    self._start = (self._start + 1) % self.capacity
+                columns['ts'][index] = ts
+                columns['sid'][index] = sid
+                columns['serial'][index] = serial
+                columns['username'][index] = strings.code(username)
+                columns['sql_id'][index] = strings.code(sql_id)
+                columns['event'][index] = strings.code(event)
+                columns['wait_class'][index] = strings.code(wait_class)
+                columns['state'][index] = state
+            self.samples += 1
+            # Slovník roste s každou novou hodnotou - promazat, když přeroste živé hodnoty
+            if len(strings.values) > self._compact_at:
+                self._compact()
+
+    def _compact(self):
+        """Přečísluje kódy jen na hodnoty, které jsou ještě v bufferu"""
+        strings = _Strings()
+        old = self._strings.values
+        # Dokud buffer není plný, je _start 0 a řádky leží na indexech 0.._size-1
+        size = self._size
+        for name in ('username', 'sql_id', 'event', 'wait_class'):
+            column = self._columns[name]
+            column[:size] = array('i', [strings.code(old[code]) for code in column[:size]])
+        self._strings = strings
+        self._compact_at = max(self.capacity, 2 * len(strings.values))
+        self.compactions += 1
+
+    def _ranges(self, since):
+        """Fyzické rozsahy [(od, do)] řádků s ts >= since, nejvýš dva (buffer je kruhový)"""
+        ts = self._columns['ts']
+        start, size, capacity = self._start, self._size, self.capacity
+
+        class _Logical:
+            def __len__(self):
+                return size
+
+            def __getitem__(self, i):
+                return ts[(start + i) % capacity]
+
+        first = bisect.bisect_left(_Logical(), since)
+        begin = start + first
+        end = start + size
+        if end <= capacity:
+            return [(begin, end)]
+        if begin >= capacity:
+            return [(begin - capacity, end - capacity)]
+        return [(begin, capacity), (0, end - capacity)]
+
+    def covered(self, since, now):
+        """Kolik sekund okna od since buffer skutečně pokrývá (kratší po startu nebo přetečení)"""
+        with self._lock:
+            if self.first_ts is None:
+                return 0.0
+            oldest = self._columns['ts'][self._start] if self._size == self.capacity else self.first_ts
+        return max(0.0, now - max(since, oldest))
+
+    def _decode(self, dimension, key):
+        if dimension == 'session':
+            return {'sid': key[0], 'serial': key[1]}
+        return self._strings.values[key[0]]
+
+    def top(self, dimension, since, limit=10):
+        """Nejčastější hodnoty rozměru ve vzorcích od since: [(hodnota, vzorků, z toho na CPU)]"""
+        names = DIMENSIONS[dimension]
+        with self._lock:
+            counts = Counter()
+            on_cpu = Counter()
+            for begin, end in self._ranges(since):
+                keys = list(zip(*(self._columns[name][begin:end] for name in names)))
+                counts.update(keys)
+                on_cpu.update(key for key, state in zip(keys, self._columns['state'][begin:end])
+                              if state == ON_CPU)
+            total = sum(counts.values())
+            rows = [(self._decode(dimension, key), count, on_cpu[key]) for key, count in counts.most_common(limit)]
+        return rows, total
+
+    def timeline(self, dimension, since, bucket, limit=5):
+        """
+        Počty vzorků po intervalech délky bucket (s) pro limit nejčastějších
+        hodnot rozměru; ostatní se sečtou pod 'other'.
+        """
+        names = DIMENSIONS[dimension]
+        with self._lock:
+            rows = []
+            for begin, end in self._ranges(since):
+                rows.extend(zip(self._columns['ts'][begin:end],
+                                zip(*(self._columns[name][begin:end] for name in names))))
+            totals = Counter(key for _, key in rows)
+            top = [key for key, _ in totals.most_common(limit)]
+            labels = {key: self._decode(dimension, key) for key in top}
+        top_set = set(top)
+        buckets = {}
+        for ts, key in rows:
+            start = int(ts // bucket * bucket)
+            counts = buckets.setdefault(start, Counter())
+            counts[key if key in top_set else 'other'] += 1
+        series = [{'ts': start, 'counts': [counts.get(key, 0) for key in top] + [counts.get('other', 0)]}
+                  for start, counts in sorted(buckets.items())]
+        return [labels[key] for key in top] + ['other'], series
+
+    def stats(self):
+        with self._lock:
+            ts = self._columns['ts']
+            return {
+                'capacity': self.capacity,
+                'rows': self._size,
+                'samples': self.samples,
+                'distinct_values': len(self._strings.values),
+                'compactions': self.compactions,
+                'memory_bytes': sum(column.itemsize * len(column) for column in self._columns.values()),
+                'oldest_ts': ts[self._start] if self._size else None,
+            }
+
+
+class AshSampler:
+    """Vlákno, které jednou za interval uloží aktivní sessions výchozí DB do bufferu"""
+
+    def __init__(self, buffer, interval):
+        self.buffer = buffer
+        self.interval = interval
+        self.errors = 0
+        self.last_error = None
+        self.last_duration_ms = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample_once(self):
+        start = time.perf_counter()
+        ts = time.time()
+        rows = sample_active_sessions()
+        self.buffer.append(ts, rows)
+        self.last_error = None
+        self.last_duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        return len(rows)
+
+    def _run(self):
+        next_run = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.errors += 1
+                # Do logu jen změna chyby - při výpadku DB by se jinak tisklo každou sekundu
+                if str(e) != self.last_error:
+                    print(f"Warning: ASH sampler failed: {e}")
+                self.last_error = str(e)
+            next_run += self.interval
+            delay = next_run - time.monotonic()
+            if delay < 0:
+                next_run = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ash-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        return {
+            'running': self._thread is not None,
+            'interval_sec': self.interval,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_duration_ms': self.last_duration_ms,
+            'buffer': self.buffer.stats(),
+        }
+
+
+_sampler = None
+_lock = threading.Lock()
+
+
+def get_ash():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = AshSampler(AshBuffer(Config.ASH_CAPACITY), Config.ASH_INTERVAL)
+        return _sampler
+
+
+def start_ash():
+    sampler = get_ash()
+    sampler.start()
+    return sampler
+
+
+def stop_ash():
+    if _sampler is not None:
+        _sampler.stop()
@@ -0,0 +1,47 @@
+"""
+Benchmarky backendu nad in-process fake driverem (bez Oracle instance).
+
+Spouštět z adresáře backend, např. `python -m bench.bench_pool`.
+"""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+from bench import fake_oracledb
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def install(**driver_settings):
+    """Podstrčí fake oracledb (a config z config.py.example, pokud chybí config.py)"""
+    fake_oracledb.configure(**driver_settings)
+    sys.modules['oracledb'] = fake_oracledb
+    install_config()
+    return fake_oracledb
+
+
+def install_config():
+    """Config z config.py.example, pokud chybí config.py (bez záměny ovladače)"""
+    if _BACKEND_DIR not in sys.path:
+        sys.path.insert(0, _BACKEND_DIR)
+
+    if importlib.util.find_spec('config') is None:
+        for key, value in {'ORACLE_USER': 'bench', 'ORACLE_PASSWORD': 'bench', 'ORACLE_HOST': 'localhost',
+                           'ORACLE_PORT': '1521', 'ORACLE_SERVICE': 'FREEPDB1'}.items():
+            os.environ.setdefault(key, value)
+        path = os.path.join(_BACKEND_DIR, 'config.py.example')
+        loader = importlib.machinery.SourceFileLoader('config', path)
+        spec = importlib.util.spec_from_file_location('config', path, loader=loader)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules['config'] = module
+
+
+def percentile(values, pct):
+    """Percentil ze seznamu hodnot (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
@@ -0,0 +1,141 @@
+"""
+Zátěž API endpointů souběžnými klienty nad fake driverem ve velikosti
+produkční DB - propustnost, p50/p99 latence a špička paměti.
+
+    python -m bench.bench_api --clients 8 --requests 20 --sessions 10000 --sql 50000 --tables 5000
+
+Bez --cached se před každým požadavkem zahodí cache sekcí i výsledků
+vlastních dotazů, takže se měří plný sběr z DB (souběžné požadavky se ale
+dál slučují do jednoho). Paměť
+se měří zvlášť (tracemalloc zpomaluje) jedním kolem souběžných požadavků
+na endpoint.
+
+S --replay soubor.omr (recording.py) se health a system-resources obsluhují
+ze záznamu skutečné DB místo fake driveru - měří se jen API vrstva.
+"""
+import argparse
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import install, percentile
+
+ENDPOINTS = {
+    'health': ('GET', '/api/health', None),
+    'system-resources': ('GET', '/api/system-resources', None),
+    'execute-query': ('POST', '/api/execute-query', {'query': 'SELECT * FROM bench_rows'}),
+}
+# Endpointy, které umí obsloužit přehrávání záznamu
+REPLAYED_ENDPOINTS = ('health', 'system-resources')
+
+
+def _request(client, endpoint):
+    method, path, body = ENDPOINTS[endpoint]
+    if method == 'POST':
+        response = client.post(path, json=body)
+    else:
+        response = client.get(path)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return len(response.get_data())
+
+
+def _run(app, endpoint, clients, requests, before=None):
+    def client(i):
+        http = app.test_client()
+        # Každý klient jako jiný uživatel limitu souběžných dotazů
+        http.environ_base['REMOTE_ADDR'] = f'10.0.{i // 256}.{i % 256}'
+        local = []
+        size = 0
+        for _ in range(requests):
+            if before:
+                before()
+            start = time.perf_counter()
+            size = _request(http, endpoint)
+            local.append((time.perf_counter() - start) * 1000)
+        return local, size
+
+    latencies = []
+    size = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for chunk, size in executor.map(client, range(clients)):
+            latencies.extend(chunk)
+    return latencies, time.perf_counter() - start, size
+
+
+def _peak_memory(app, endpoint, clients, before=None):
+    """Špička alokací Pythonu (MB) při jednom kole souběžných požadavků"""
+    tracemalloc.start()
+    try:
+        _run(app, endpoint, clients, 1, before)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=20, help='requests per client and endpoint')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--sql', type=int, default=50000, help='V$SQL rows')
+    parser.add_argument('--tables', type=int, default=5000)
+    parser.add_argument('--custom-rows', type=int, default=5000, help='rows returned to execute-query')
+    parser.add_argument('--query-latency', type=float, default=0.002)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--cached', action='store_true', help='keep the section cache between requests')
+    parser.add_argument('--replay', default=None, help='serve health/system-resources from a snapshot recording')
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {sorted(unknown)} (choose from {list(ENDPOINTS)})")
+    if args.replay:
+        endpoints = [name for name in endpoints if name in REPLAYED_ENDPOINTS]
+
+    fake = install(connect_latency=args.connect_latency, query_latency=args.query_latency,
+                   sessions=args.sessions, sql_statements=args.sql, tables=args.tables,
+                   custom_rows=args.custom_rows)
+    from app import app, enable_replay
+    import db
+    import services
+
+    if args.replay:
+        enable_replay(args.replay, loop=True)
+
+    cache = services.target_state().cache
+
+    def invalidate():
+        cache.invalidate()
+        services.query_results.clear()
+
+    before = None if args.cached else invalidate
+
+    print(f"{args.clients} clients x {args.requests} requests   sessions {args.sessions}   V$SQL {args.sql}"
+          f"   tables {args.tables}   query latency {args.query_latency * 1000:.1f} ms"
+          f"   {'cached' if args.cached else 'uncached'}"
+          f"{f'   replay {args.replay}' if args.replay else ''}")
+    # Zahřátí - pool, importy a první sběr se nepočítají
+    for endpoint in endpoints:
+        _run(app, endpoint, 1, 1)
+
+    for endpoint in endpoints:
+        fake.reset_counters()
+        latencies, wall, size = _run(app, endpoint, args.clients, args.requests, before)
+        counters = fake.get_counters()
+        peak = _peak_memory(app, endpoint, args.clients, before)
+        print(f"{endpoint:<18} {len(latencies) / wall:>8.1f} req/s   p50 {percentile(latencies, 50):>8.2f} ms"
+              f"   p99 {percentile(latencies, 99):>8.2f} ms   peak {peak:>7.1f} MB   response {size / 1024:>8.1f} KiB"
+              f"   {counters['executes'] / len(latencies):.1f} queries/req")
+
+    # ru_maxrss je v KiB na Linuxu (v bajtech na macOS)
+    print(f"process max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    db.close_pool()
+
+
+if __name__ == '__main__':
+    main()
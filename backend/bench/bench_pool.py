@@ -0,0 +1,68 @@
+"""
+Porovná connect-per-request s connection poolem nad fake driverem.
+
+    python -m bench.bench_pool --clients 8 --requests 50 --connect-latency 0.05
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import install, percentile
+
+
+def _run(label, worker, clients, requests):
+    latencies = []
+
+    def client(_):
+        local = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            worker()
+            local.append((time.perf_counter() - start) * 1000)
+        return local
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for chunk in executor.map(client, range(clients)):
+            latencies.extend(chunk)
+    wall = time.perf_counter() - start
+    print(f"{label:<22} {len(latencies) / wall:>9.1f} req/s   p50 {percentile(latencies, 50):>8.2f} ms"
+          f"   p99 {percentile(latencies, 99):>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--query-latency', type=float, default=0.002)
+    args = parser.parse_args()
+
+    fake = install(connect_latency=args.connect_latency, query_latency=args.query_latency)
+    import db
+    import services
+
+    pooled_connection = services.get_oracle_connection
+    cache = services.target_state().cache
+
+    def collect():
+        # Bez sdílené cache - měří se cena spojení, ne cache
+        cache.invalidate('system_resources')
+        services.fetch_system_resources()
+
+    # Původní chování: nový oracledb.connect() pro každý požadavek
+    services.get_oracle_connection = lambda target=None: fake.connect(**db._connect_params(target))
+    fake.reset_counters()
+    _run('connect per request', collect, args.clients, args.requests)
+    print(f"  {fake.get_counters()}")
+
+    services.get_oracle_connection = pooled_connection
+    fake.reset_counters()
+    _run('pooled', collect, args.clients, args.requests)
+    print(f"  {fake.get_counters()}")
+    print(f"  pool: {db.get_pool_stats()}")
+    db.close_pool()
+
+
+if __name__ == '__main__':
+    main()
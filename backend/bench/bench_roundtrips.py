@@ -0,0 +1,42 @@
+"""
+Počet round tripů a latence sběru systémových zdrojů a počtu sessions
+po jednotlivých pohledech vs. sloučenými dotazy (METRICS_BATCHED_QUERIES).
+
+    python -m bench.bench_roundtrips --iterations 50 --query-latency 0.002
+"""
+import argparse
+import time
+
+from bench import install, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--query-latency', type=float, default=0.002)
+    args = parser.parse_args()
+
+    fake = install(connect_latency=0.0, query_latency=args.query_latency)
+    from settings import Config
+    import services
+
+    for label, batched in (('separate queries', False), ('batched', True)):
+        Config.METRICS_BATCHED_QUERIES = batched
+        state = services.target_state()
+        state.batch_unsupported = False
+        latencies = []
+        fake.reset_counters()
+        for _ in range(args.iterations):
+            # Bez cache - každá iterace je plný sběr z DB
+            state.cache.invalidate()
+            start = time.perf_counter()
+            services.fetch_system_resources()
+            services.fetch_metrics(sections=['sessions'], parallel=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+        counters = fake.get_counters()
+        print(f"{label:<18} {counters['executes'] / args.iterations:>5.1f} round trips/collection"
+              f"   p50 {percentile(latencies, 50):>7.2f} ms   p99 {percentile(latencies, 99):>7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Čas startu backendu: import app, první /api/ping a první /api/health ve
+studeném procesu - bez warmupu a s warmupem na pozadí (fake driver), a
+import app se skutečným oracledb (načte se až při prvním použití).
+
+    python -m bench.bench_startup --runs 5 --connect-latency 0.05 --query-latency 0.002
+
+Každý běh je nový proces, výsledek je medián.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from bench import install, install_config
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def _timed_get(client, path):
+    start = time.perf_counter()
+    response = client.get(path)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} -> {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return _ms(start), response
+
+
+def _child_import():
+    """Import app se skutečným ovladačem (bez připojení)"""
+    install_config()
+    start = time.perf_counter()
+    import app  # noqa: F401
+    result = {'import_ms': _ms(start), 'driver_loaded': 'oracledb' in sys.modules}
+    from db import oracledb
+    start = time.perf_counter()
+    oracledb.load()
+    result['driver_ms'] = _ms(start)
+    return result
+
+
+def _child_requests(args, warm):
+    fake = install(connect_latency=args.connect_latency, query_latency=args.query_latency,
+                   sessions=args.sessions, sql_statements=args.sql, tables=args.tables)
+    start = time.perf_counter()
+    import app
+    from warmup import start_warmup
+    result = {'import_ms': _ms(start)}
+    client = app.app.test_client()
+    warmup = start_warmup() if warm else None
+    result['ping_ms'], response = _timed_get(client, '/api/ping')
+    result['ping_warmup'] = response.json['warmup']
+    if warmup is not None:
+        warmup.wait()
+        result['warmup_ms'] = warmup.duration_ms
+    fake.reset_counters()
+    result['first_health_ms'], _ = _timed_get(client, '/api/health')
+    counters = fake.get_counters()
+    result['first_connects'] = counters.get('connects', 0)
+    result['first_parses'] = counters.get('parses', 0)
+    result['second_health_ms'], _ = _timed_get(client, '/api/health')
+    return result
+
+
+def _run_child(mode, args):
+    command = [sys.executable, '-m', 'bench.bench_startup', '--child', mode,
+               '--connect-latency', str(args.connect_latency), '--query-latency', str(args.query_latency),
+               '--sessions', str(args.sessions), '--sql', str(args.sql), '--tables', str(args.tables)]
+    completed = subprocess.run(command, cwd=_BACKEND_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{mode} run failed:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _median(runs, key):
+    return statistics.median(run[key] for run in runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--sql', type=int, default=5000, help='V$SQL rows')
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--query-latency', type=float, default=0.002)
+    parser.add_argument('--child', choices=['import', 'cold', 'warm'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'import':
+        print(json.dumps(_child_import()))
+        return
+    if args.child is not None:
+        print(json.dumps(_child_requests(args, args.child == 'warm')))
+        return
+
+    print(f"{args.runs} runs (median)   sessions {args.sessions}   V$SQL {args.sql}   tables {args.tables}"
+          f"   connect latency {args.connect_latency * 1000:.0f} ms   query latency {args.query_latency * 1000:.1f} ms")
+    try:
+        runs = [_run_child('import', args) for _ in range(args.runs)]
+        print(f"{'real driver':<12} import app {_median(runs, 'import_ms'):>7.1f} ms"
+              f"   driver loaded by import: {'yes' if any(r['driver_loaded'] for r in runs) else 'no'}"
+              f"   driver import on first use {_median(runs, 'driver_ms'):>7.1f} ms")
+    except RuntimeError as e:
+        print(f"{'real driver':<12} skipped ({str(e).strip().splitlines()[-1]})")
+
+    for mode in ('cold', 'warm'):
+        runs = [_run_child(mode, args) for _ in range(args.runs)]
+        warmup = f"   warmup {_median(runs, 'warmup_ms'):>7.1f} ms" if mode == 'warm' else ''
+        print(f"{mode + ' start':<12} import app {_median(runs, 'import_ms'):>7.1f} ms"
+              f"   ping {_median(runs, 'ping_ms'):>6.2f} ms ({runs[0]['ping_warmup']}){warmup}"
+              f"   first health {_median(runs, 'first_health_ms'):>8.2f} ms"
+              f" ({_median(runs, 'first_connects'):.0f} connects, {_median(runs, 'first_parses'):.0f} parses)"
+              f"   second {_median(runs, 'second_health_ms'):>6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
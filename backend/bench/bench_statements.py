@@ -0,0 +1,65 @@
+"""
+Parse vs. execute počty při opakovaném sběru nad fake driverem.
+
+1. active_sql s limitem jako literál (původní f-string) vs. bind proměnná
+2. celý sběr (/api/health + system resources) bez statement cache a s ní
+
+    python -m bench.bench_statements --polls 50
+"""
+import argparse
+import random
+
+from bench import install
+
+
+def _report(label, counters):
+    print(f"{label:<24} executes {counters['executes']:>6}   parses {counters['parses']:>6}"
+          f"   hard parses {counters['hard_parses']:>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--polls', type=int, default=50)
+    args = parser.parse_args()
+
+    fake = install(connect_latency=0.0, query_latency=0.0)
+    from settings import Config
+    import db
+    import queries
+    import services
+
+    # Limity, které posílá ActiveSQLTab (10-500, 999999 = ALL)
+    rnd = random.Random(0)
+    limits = [rnd.choice([10, 20, 50, 100, 200, 500, 999999]) for _ in range(args.polls)]
+
+    for label, binds in (('active_sql literal', False), ('active_sql bind', True)):
+        fake.reset_counters()
+        for limit in limits:
+            with db.get_oracle_connection() as conn:
+                cur = conn.cursor()
+                if binds:
+                    cur.execute(queries.SQL_ACTIVE_SQL, row_limit=limit)
+                else:
+                    cur.execute(queries.SQL_ACTIVE_SQL.replace(':row_limit', str(limit)))
+                cur.fetchall()
+                cur.close()
+        _report(label, fake.get_counters())
+
+    cache_size = Config.ORACLE_STMT_CACHE_SIZE
+    for label, size in (('collection, no cache', 0), (f'collection, cache {cache_size}', cache_size)):
+        Config.ORACLE_STMT_CACHE_SIZE = size
+        db.close_pool()
+        services._states.clear()
+        fake.reset_counters()
+        for limit in limits:
+            # Bez sdílené cache - každý poll jde do DB
+            services.target_state().cache.invalidate()
+            services.fetch_metrics(sql_limit=limit)
+            services.fetch_system_resources()
+        _report(label, fake.get_counters())
+    Config.ORACLE_STMT_CACHE_SIZE = cache_size
+    db.close_pool()
+
+
+if __name__ == '__main__':
+    main()
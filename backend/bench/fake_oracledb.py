@@ -0,0 +1,699 @@
+"""
+In-process náhrada modulu oracledb pro benchmarky bez Oracle instance.
+
+Poskytuje connect(), create_pool(), Connection, Cursor a výjimky ve stejném
+tvaru jako python-oracledb a vrací syntetické výsledky V$ pohledů. Latenci
+handshake a dotazů i velikost dat lze nastavit přes configure(), počty
+handshaků, round tripů a pingů vrací get_counters().
+"""
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+AUTH_MODE_DEFAULT = 0
+AUTH_MODE_SYSDBA = 2
+
+DB_TYPE_DATE = 'DB_TYPE_DATE'
+DB_TYPE_TIMESTAMP = 'DB_TYPE_TIMESTAMP'
+DB_TYPE_TIMESTAMP_TZ = 'DB_TYPE_TIMESTAMP_TZ'
+DB_TYPE_TIMESTAMP_LTZ = 'DB_TYPE_TIMESTAMP_LTZ'
+DB_TYPE_NUMBER = 'DB_TYPE_NUMBER'
+DB_TYPE_VARCHAR = 'DB_TYPE_VARCHAR'
+
+POOL_GETMODE_WAIT = 0
+POOL_GETMODE_NOWAIT = 1
+POOL_GETMODE_FORCEGET = 2
+POOL_GETMODE_TIMEDWAIT = 3
+
+
+class _ErrorInfo:
+    def __init__(self, full_code, message):
+        self.full_code = full_code
+        self.message = f"{full_code}: {message}"
+
+    def __str__(self):
+        return self.message
+
+
+class Error(Exception):
+    def __init__(self, full_code, message):
+        super().__init__(_ErrorInfo(full_code, message))
+
+    def __str__(self):
+        return str(self.args[0])
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+settings = {
+    'connect_latency': 0.05,     # TCP + auth handshake (s)
+    'query_latency': 0.002,      # jeden round trip (s)
+    'sessions': 200,
+    'active_ratio': 0.1,
+    'sql_statements': 500,
+    'hot_sql_ratio': 0.02,       # podíl příkazů, které právě běží (rostou jim čítače V$SQLSTATS)
+    'tables': 100,
+    'tablespaces': 8,
+    'custom_rows': 1000,
+    'seed': 42,
+    'slow_queries': {},          # podřetězec SQL -> latence (s), např. {'DBA_TABLES': 2.0}
+    # host -> přepsání pro jednu DB, např. {'db2': {'query_latency': 30}, 'db3': {'down': True}}
+    'hosts': {},
+}
+
+_counters_lock = threading.Lock()
+_counters = {}
+# Shared pool: text dotazu -> [parse_calls, executions, loads]
+_sql_area = {}
+_start = time.time()
+
+
+def configure(**kwargs):
+    """Nastaví latence a velikost syntetických dat"""
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise KeyError(f"Unknown fake driver settings: {sorted(unknown)}")
+    settings.update(kwargs)
+
+
+def _host_setting(host, name):
+    return settings['hosts'].get(host, {}).get(name, settings.get(name))
+
+
+def reset_counters():
+    with _counters_lock:
+        _counters.clear()
+        _counters.update({'connects': 0, 'pings': 0, 'executes': 0, 'parses': 0, 'hard_parses': 0, 'rows': 0})
+        _sql_area.clear()
+
+
+def get_counters():
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _count(name, n=1):
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _record_statement(connection, statement, execute=True):
+    """Parse jen pokud text není ve statement cache spojení; hard parse při prvním výskytu"""
+    cache = connection._stmt_cache
+    with _counters_lock:
+        stats = _sql_area.get(statement)
+        if stats is None:
+            stats = _sql_area[statement] = [0, 0, 1]
+            _counters['hard_parses'] = _counters.get('hard_parses', 0) + 1
+        if statement in cache:
+            cache.move_to_end(statement)
+        else:
+            stats[0] += 1
+            _counters['parses'] = _counters.get('parses', 0) + 1
+            if connection.stmtcachesize > 0:
+                cache[statement] = True
+                while len(cache) > connection.stmtcachesize:
+                    cache.popitem(last=False)
+        if execute:
+            stats[1] += 1
+
+
+def _sql_area_rows():
+    with _counters_lock:
+        items = list(_sql_area.items())
+    return [(hashlib.md5(text.encode()).hexdigest()[:13], text[:1000], parse_calls, executions, loads, 1)
+            for text, (parse_calls, executions, loads) in sorted(items, key=lambda item: -item[1][1])]
+
+
+reset_counters()
+
+
+# --- Syntetická data -------------------------------------------------------
+
+_EVENTS = ['db file sequential read', 'db file scattered read', 'log file sync',
+           'direct path read', 'enq: TX - row lock contention', 'latch: shared pool',
+           'buffer busy waits', 'log file parallel write', 'control file sequential read',
+           'library cache lock', 'read by other session', 'free buffer waits']
+_WAIT_CLASSES = {'db file sequential read': 'User I/O', 'db file scattered read': 'User I/O',
+                 'direct path read': 'User I/O', 'read by other session': 'User I/O',
+                 'log file sync': 'Commit', 'enq: TX - row lock contention': 'Application',
+                 'latch: shared pool': 'Concurrency', 'library cache lock': 'Concurrency',
+                 'buffer busy waits': 'Concurrency', 'free buffer waits': 'Configuration',
+                 'log file parallel write': 'System I/O', 'control file sequential read': 'System I/O'}
+_USERS = ['APP', 'HR', 'SALES', 'BATCH', 'REPORTING', 'SYSTEM']
+_PROGRAMS = ['JDBC Thin Client', 'python@app01', 'sqlplus@db01', 'w3wp.exe', 'batch_loader']
+_SYSMETRIC = {
+    'Host CPU Utilization (%)': 37.5,
+    'CPU Usage Per Sec': 142.3,
+    'CPU Usage Per Txn': 3.1,
+    'Database CPU Time Ratio': 61.2,
+    'Host CPU Usage Per Sec': 301.7,
+    'Physical Memory': 16384.0,
+    'Physical Memory GB': 16.0,
+    'Physical Reads Per Sec': 812.4,
+    'Physical Writes Per Sec': 95.6,
+    'Physical Read Bytes Per Sec': 6655180.8,
+    'Physical Write Bytes Per Sec': 783155.2,
+    'I/O Megabytes per Second': 7.1,
+    'I/O Requests per Second': 908.0,
+    'Average Active Sessions': 2.4,
+}
+_SGA_POOLS = {'shared pool': 512.0, 'large pool': 32.0, 'java pool': 16.0, 'streams pool': 8.0}
+_PGA = {'total PGA allocated': 412.5, 'total PGA inuse': 301.2, 'maximum PGA allocated': 655.0}
+
+
+def _elapsed():
+    return time.time() - _start
+
+
+def _os_stat():
+    t = _elapsed()
+    return {
+        'BUSY_TIME': int(1_000_000 + t * 150),
+        'IDLE_TIME': int(4_000_000 + t * 250),
+        'NUM_CPUS': 4,
+        'NUM_CPU_CORES': 2,
+        'PHYSICAL_MEMORY_BYTES': 16 * 1024 ** 3,
+        'LOAD': 1.37,
+    }
+
+
+def _time_model():
+    t = _elapsed()
+    return {'DB CPU': round(5000 + t * 1.4, 2), 'background cpu time': round(800 + t * 0.1, 2),
+            'DB time': round(9000 + t * 2.4, 2)}
+
+
+def _sessions():
+    rnd = random.Random(settings['seed'])
+    now = datetime.fromtimestamp(_start)
+    n_active = int(settings['sessions'] * settings['active_ratio'])
+    rows = []
+    for i in range(settings['sessions']):
+        status = 'ACTIVE' if i < n_active else 'INACTIVE'
+        event = rnd.choice(_EVENTS) if status == 'ACTIVE' else 'SQL*Net message from client'
+        rows.append((
+            100 + i, 1000 + i, rnd.choice(_USERS), f"os{i % 50}", f"host{i % 20}",
+            rnd.choice(_PROGRAMS), status, event, rnd.randint(0, 600),
+            now - timedelta(seconds=rnd.randint(10, 86400)),
+            rnd.randint(0, 10 ** 6), rnd.randint(0, 10 ** 5), rnd.randint(0, 10 ** 5),
+        ))
+    return rows
+
+
+def _sql_rows(limit):
+    rnd = random.Random(settings['seed'] + 1)
+    rows = []
+    for i in range(min(limit, settings['sql_statements'])):
+        elapsed = 10_000.0 / (i + 1)
+        rows.append((
+            f"sql{i:09d}", _sql_text(i),
+            rnd.randint(1, 10 ** 5), elapsed, elapsed * 0.6, rnd.randint(0, 10 ** 7),
+            rnd.randint(0, 10 ** 5), rnd.randint(0, 10 ** 6), rnd.choice(_USERS), rnd.choice(_USERS + [None]),
+        ))
+    return rows
+
+
+def _sql_text(i):
+    return f"SELECT /* bench {i} */ col1, col2, col3 FROM table_{i % 97} WHERE id = :1"
+
+
+def _sql_index(sql_id):
+    return int(sql_id[3:]) if sql_id and sql_id.startswith('sql') and sql_id[3:].isdigit() else None
+
+
+def _sqlstats_rows(since):
+    """V$SQLSTATS po sql_id: prvním hot_sql_ratio příkazům čítače rostou, ostatní stojí"""
+    n = settings['sql_statements']
+    hot = max(1, int(n * settings['hot_sql_ratio']))
+    start = datetime.fromtimestamp(_start)
+    now = datetime.now()
+    t = _elapsed()
+    # Neaktivní příkazy naposledy běžely před startem - inkrementální dotaz je vynechá
+    indexes = range(n) if since is None or since < start else range(min(hot, n))
+    rows = []
+    for i in indexes:
+        growth = t * 1000 / (i + 1) if i < hot else 0.0
+        elapsed = 10 ** 10 / (i + 1) + growth * 1000
+        last_active = now if i < hot else start - timedelta(seconds=i + 1)
+        if since is not None and last_active < since:
+            continue
+        rows.append((f"sql{i:09d}", (i * 7919) % 10 ** 5 + 1 + int(growth), int(elapsed), int(elapsed * 0.6),
+                     (i * 104729) % 10 ** 7 + int(growth * 100), (i * 1299709) % 10 ** 5 + int(growth),
+                     (i * 15485863) % 10 ** 6 + int(growth * 10), last_active))
+    return rows
+
+
+def _ash_rows():
+    """Aktivní sessions v tomto okamžiku - mění se každou sekundu"""
+    rnd = random.Random(int(time.time()))
+    n = settings['sessions']
+    hot = max(1, int(settings['sql_statements'] * settings['hot_sql_ratio']))
+    rows = []
+    for sid in rnd.sample(range(n), min(n, max(1, int(n * settings['active_ratio'] * rnd.uniform(0.5, 1.5))))):
+        sql_id = f"sql{min(int(rnd.expovariate(0.2)), hot - 1):09d}"
+        if rnd.random() < 0.4:
+            rows.append((100 + sid, 1000 + sid, _USERS[sid % len(_USERS)], sql_id, 'ON CPU', 'CPU', 0))
+        else:
+            event = _EVENTS[min(int(rnd.expovariate(0.5)), len(_EVENTS) - 1)]
+            rows.append((100 + sid, 1000 + sid, _USERS[sid % len(_USERS)], sql_id, event, _WAIT_CLASSES[event], 1))
+    return rows
+
+
+# Každých tolik sekund se sesbírají statistiky další tabulky (roste LAST_ANALYZED)
+_GATHER_INTERVAL = 30
+
+
+def _table_rows(since=None):
+    rnd = random.Random(settings['seed'] + 2)
+    start = datetime.fromtimestamp(_start).replace(microsecond=0)
+    n = settings['tables']
+    gathered = int(_elapsed() // _GATHER_INTERVAL)
+    rows = []
+    for i in range(n):
+        num_rows, blocks, avg_row_len = rnd.randint(0, 10 ** 7), rnd.randint(0, 10 ** 5), rnd.randint(20, 400)
+        last_analyzed = None if i % 50 == 49 else start - timedelta(days=rnd.randint(0, 60))
+        if i < gathered:
+            num_rows += 1000
+            last_analyzed = start + timedelta(seconds=_GATHER_INTERVAL * (i + 1))
+        if since is None or (last_analyzed is not None and last_analyzed > since):
+            rows.append((f"TABLE_{i:05d}", num_rows, blocks, avg_row_len, last_analyzed,
+                         ['USERS', 'DATA', 'INDX'][i % 3]))
+    return rows
+
+
+def _in_list(sql):
+    """Vrátí řetězcové literály z IN (...) seznamu dotazu"""
+    names = []
+    for match in re.finditer(r"IN\s*\(((?:'[^']*'|[^')])*)\)", sql, re.I):
+        names.extend(re.findall(r"'([^']*)'", match.group(1)))
+    return names
+
+
+def _name_values(sql, values):
+    return [(name, values[name]) for name in _in_list(sql) if name in values]
+
+
+def _fetch_limit(sql, params):
+    match = re.search(r"FETCH FIRST\s+(\S+)\s+ROWS", sql, re.I)
+    if not match:
+        return None
+    token = match.group(1)
+    if token.startswith(':'):
+        return int(_bind_value(params, token[1:]))
+    return int(token)
+
+
+def _bind_value(params, name):
+    if isinstance(params, dict):
+        return params[name]
+    return params[int(name) - 1] if name.isdigit() else params[0]
+
+
+def _number(value):
+    # DATE - DATE '1970-01-01' v Oracle = dny od epochy; dotaz je násobí 86400
+    if isinstance(value, datetime):
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value
+
+
+_UNION_BRANCH = re.compile(r"SELECT\s+'([^']*)'(?:\s+AS\s+\w+)?\s*,\s*(?:'([^']*)'(?:\s+AS\s+\w+)?\s*,\s*)?", re.I)
+
+
+def _resolve_union(branches, params):
+    """Sloučený dotaz (zdroj, název, hodnota) - každá větev se vyhodnotí zvlášť"""
+    rows = []
+    for branch in branches:
+        match = _UNION_BRANCH.match(branch)
+        source, name = match.group(1), match.group(2)
+        _, branch_rows = _resolve('SELECT ' + branch[match.end():], params)
+        for row in branch_rows:
+            if name is not None:
+                rows.append((source, name, _number(row[0])))
+            else:
+                rows.append((source, row[0], _number(row[1])))
+    return ['SOURCE', 'NAME', 'VALUE'], rows
+
+
+def _resolve(sql, params):
+    """Vrátí (názvy sloupců, řádky) pro daný dotaz"""
+    text = ' '.join(sql.split())
+    upper = text.upper()
+    sessions = settings['sessions']
+    n_active = int(sessions * settings['active_ratio'])
+
+    # UNION ALL větví, které začínají literálem zdroje (sloučené V$ dotazy)
+    branches = re.split(r'\s+UNION ALL\s+', text, flags=re.I)
+    if len(branches) > 1 and all(_UNION_BRANCH.match(branch) for branch in branches):
+        return _resolve_union(branches, params)
+    if "SYS_CONTEXT('USERENV', 'SID')" in upper and 'FROM V$SESSION' in upper:
+        return ['SID', 'SERIAL#', 'USERNAME', 'SQL_ID', 'EVENT', 'WAIT_CLASS', 'STATE'], _ash_rows()
+    if 'SUM(CASE WHEN STATUS' in upper and 'FROM V$SESSION WHERE' in upper:
+        return ['COUNT(*)', 'ACTIVE'], [(sessions, n_active)]
+    if 'FROM V$SESSION WHERE STATUS=' in upper.replace(' = ', '='):
+        return ['COUNT(*)'], [(n_active,)]
+    if upper.startswith('SELECT COUNT(*) FROM V$SESSION'):
+        return ['COUNT(*)'], [(sessions,)]
+    if 'FROM V$SESSION_WAIT' in upper:
+        return ['EVENT', 'CNT'], [(e, 10 - i) for i, e in enumerate(_EVENTS[:10])]
+    if 'FROM V$SYSTEM_EVENT' in upper:
+        t = _elapsed()
+        return ['EVENT', 'TOTAL_WAITS', 'TIME_WAITED', 'AVERAGE_WAIT'], [
+            (e, int(10 ** 6 / (i + 1) + t * 10), int(10 ** 5 / (i + 1) + t), round(0.1 * (i + 1), 2))
+            for i, e in enumerate(_EVENTS[:10])]
+    if 'V$SGA_DYNAMIC_COMPONENTS' in upper:
+        return ['COMPONENT', 'SIZE_MB'], [('DEFAULT buffer cache', 1024.0), ('shared pool', 512.0),
+                                         ('large pool', 32.0), ('java pool', 16.0)]
+    if 'DBA_TABLESPACE_USAGE_METRICS' in upper:
+        # Obsazení roste o (i + 1) * 5 MB za hodinu běhu (prognóza kapacity)
+        rows = []
+        for i in range(settings['tablespaces']):
+            used = min(1000.0, 900.0 - i * 70 + (i + 1) * 5 * _elapsed() / 3600)
+            rows.append((f"TS_{i}", round(used / 10, 2), used, 1000.0))
+        return ['TABLESPACE_NAME', 'PCT_USED', 'USED_MB', 'TOTAL_MB'], rows
+    if 'V$DIAG_ALERT_EXT' in upper:
+        now = datetime.now()
+        return ['MESSAGE_TEXT', 'MESSAGE_LEVEL', 'ORIGINATING_TIMESTAMP'], [
+            (f"ORA-0{1000 + i}: synthetic alert", 1, now - timedelta(minutes=i)) for i in range(5)]
+    if 'V$SQL_MONITOR' in upper:
+        now = datetime.now()
+        return ['SQL_ID', 'SQL_EXEC_START', 'ELAPSED_SEC', 'CPU_SEC', 'BUFFER_GETS', 'DISK_READS', 'STATUS'], [
+            (f"mon{i:010d}", now - timedelta(seconds=60 * (i + 1)), 60.0 * (i + 1), 30.0 * (i + 1),
+             10 ** 6, 10 ** 4, 'EXECUTING') for i in range(5)]
+    if 'FROM V$INSTANCE' in upper:
+        return ['STARTUP_TIME'], [(datetime.fromtimestamp(_start),)]
+    if 'FROM V$DATABASE' in upper:
+        return ['NAME', 'OPEN_MODE', 'LOG_MODE'], [('FREE', 'READ WRITE', 'NOARCHIVELOG')]
+    if 'GROUP BY S.USERNAME, S.OSUSER' in upper:
+        groups = {}
+        for r in _sessions():
+            key = (r[2], r[3], r[4], r[5])
+            g = groups.setdefault(key, [0, 0, 0, 0, 0, 0])
+            g[0] += 1
+            g[1] += r[6] == 'ACTIVE'
+            g[2] += r[10]
+            g[3] += r[11]
+            g[4] += r[11] * 3
+            g[5] += r[12]
+        rows = [k + tuple(v) for k, v in groups.items()]
+        rows.sort(key=lambda r: r[9], reverse=True)
+        return ['USERNAME', 'OSUSER', 'MACHINE', 'PROGRAM', 'SESSION_COUNT', 'ACTIVE_COUNT',
+                'TOTAL_PHYSICAL_READS', 'TOTAL_BLOCK_GETS', 'TOTAL_CONSISTENT_GETS', 'TOTAL_CPU_CENTISEC'], rows
+    if 'S.SERIAL#' in upper and 'FROM V$SESSION S' in upper:
+        return ['SID', 'SERIAL#', 'USERNAME', 'OSUSER', 'MACHINE', 'PROGRAM', 'STATUS', 'EVENT',
+                'SECONDS_IN_WAIT', 'LOGON_TIME', 'PHYSICAL_READS', 'BLOCK_GETS', 'CPU_CENTISEC'], _sessions()
+    if 'FROM V$SQL S' in upper:
+        limit = _fetch_limit(text, params) or settings['sql_statements']
+        return ['SQL_ID', 'SQL_TEXT', 'EXECUTIONS', 'ELAPSED_SEC', 'CPU_SEC', 'BUFFER_GETS', 'DISK_READS',
+                'ROWS_PROCESSED', 'PARSING_SCHEMA_NAME', 'LAST_ACTIVE_USER'], _sql_rows(limit)
+    if 'FROM V$SQLSTATS' in upper:
+        return ['SQL_ID', 'EXECUTIONS', 'ELAPSED_TIME', 'CPU_TIME', 'BUFFER_GETS', 'DISK_READS',
+                'ROWS_PROCESSED', 'LAST_ACTIVE_TIME'], _sqlstats_rows(_bind_value(params, 'since'))
+    if 'FROM V$SESSION WHERE SQL_ID IS NOT NULL' in upper:
+        rnd = random.Random(settings['seed'] + 3)
+        hot = max(1, int(settings['sql_statements'] * settings['hot_sql_ratio']))
+        return ['SQL_ID', 'USERNAME'], [(f"sql{i:09d}", rnd.choice(_USERS)) for i in range(hot)]
+    if 'FROM V$SQLAREA' in upper and 'PARSING_SCHEMA_NAME' in upper:
+        columns = ['SQL_ID', 'PARSING_SCHEMA_NAME', 'SQL_FULLTEXT' if 'SQL_FULLTEXT' in upper else 'SQL_TEXT']
+        if 'WHERE SQL_ID' not in upper:
+            sql_ids = [f"sql{i:09d}" for i in range(settings['sql_statements'])]
+        elif isinstance(params, dict):
+            sql_ids = [params['sql_id']]
+        else:
+            sql_ids = list(params)
+        indexes = [_sql_index(sql_id) for sql_id in sql_ids]
+        return columns, [(f"sql{i:09d}", _USERS[i % len(_USERS)], _sql_text(i)) for i in indexes
+                         if i is not None and i < settings['sql_statements']]
+    if 'FROM DBA_TABLES' in upper and 'COUNT(*)' in upper:
+        analyzed = [row[4] for row in _table_rows() if row[4] is not None]
+        n = settings['tables']
+        return ['COUNT(*)', 'MAX(T.LAST_ANALYZED)', 'SUM(O.OBJECT_ID)', 'MAX(O.CREATED)'], \
+            [(n, max(analyzed, default=None), n * (n + 1) // 2, datetime.fromtimestamp(_start))]
+    if 'FROM DBA_TABLES' in upper and 'LAST_ANALYZED >' in upper:
+        return ['TABLE_NAME', 'NUM_ROWS', 'BLOCKS', 'AVG_ROW_LEN', 'LAST_ANALYZED', 'TABLESPACE_NAME'], \
+            _table_rows(_bind_value(params, 'since'))
+    if 'FROM DBA_TAB_MODIFICATIONS' in upper:
+        return ['TABLE_NAME', 'CHANGES'], [(f"TABLE_{i:05d}", 10 ** 5 * (i % 7 + 1))
+                                           for i in range(0, settings['tables'], 10)]
+    if 'FROM DBA_TABLES' in upper:
+        return ['TABLE_NAME', 'NUM_ROWS', 'BLOCKS', 'AVG_ROW_LEN', 'LAST_ANALYZED', 'TABLESPACE_NAME'], _table_rows()
+    if 'FROM V$OSSTAT' in upper:
+        return ['STAT_NAME', 'VALUE'], _name_values(text, _os_stat())
+    if 'FROM V$SYSMETRIC' in upper:
+        return ['METRIC_NAME', 'VALUE'], _name_values(text, _SYSMETRIC)
+    if 'FROM V$SYS_TIME_MODEL' in upper:
+        return ['STAT_NAME', 'VALUE_SEC'], _name_values(text, _time_model())
+    if 'FROM V$SGASTAT' in upper:
+        return ['POOL', 'MB'], list(_SGA_POOLS.items())
+    if 'FROM V$SGA' in upper:
+        return ['ROUND(SUM(VALUE)/1024/1024,2)'], [(1600.0,)]
+    if 'FROM V$PGASTAT' in upper:
+        return ['NAME', 'MB'], _name_values(text, _PGA)
+    if 'FROM V$SQLAREA' in upper:
+        return ['SQL_ID', 'SQL_TEXT', 'PARSE_CALLS', 'EXECUTIONS', 'LOADS', 'VERSION_COUNT'], _sql_area_rows()
+    if upper == 'SELECT 1 FROM DUAL':
+        return ['1'], [(1,)]
+
+    # Libovolný vlastní dotaz - generická tabulka
+    now = datetime.now()
+    rows = [(i, f"name_{i}", i * 1.5, now - timedelta(seconds=i), None) for i in range(settings['custom_rows'])]
+    return ['ID', 'NAME', 'VALUE', 'CREATED', 'NOTE'], rows
+
+
+# --- DB API ----------------------------------------------------------------
+
+def _type_code(rows, index):
+    for row in rows:
+        value = row[index]
+        if isinstance(value, datetime):
+            return DB_TYPE_TIMESTAMP
+        if isinstance(value, (int, float)):
+            return DB_TYPE_NUMBER
+        if value is not None:
+            return DB_TYPE_VARCHAR
+    return DB_TYPE_VARCHAR
+
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self.rowcount = 0
+        self._rows = iter(())
+
+    def _iterate(self, rows):
+        # rowcount jako v oracledb = počet dosud načtených řádků
+        for row in rows:
+            self.rowcount += 1
+            yield row
+
+    def execute(self, statement, parameters=None, **keyword_parameters):
+        if self.connection._closed:
+            raise DatabaseError('DPY-1001', 'not connected to database')
+        _count('executes')
+        _record_statement(self.connection, statement)
+        latency = _host_setting(self.connection.host, 'query_latency')
+        for pattern, slow_latency in settings['slow_queries'].items():
+            if pattern.upper() in statement.upper():
+                latency = max(latency, slow_latency)
+        call_timeout = self.connection.call_timeout / 1000
+        timed_out = call_timeout and latency > call_timeout
+        # conn.cancel() z jiného vlákna přeruší čekání jako break na serveru
+        if self.connection._cancel.wait(call_timeout if timed_out else latency):
+            self.connection._cancel.clear()
+            _count('cancels')
+            raise DatabaseError('ORA-01013', 'user requested cancel of current operation')
+        if timed_out:
+            raise DatabaseError('DPY-4024', f"call timeout of {self.connection.call_timeout} ms exceeded")
+        columns, rows = _resolve(statement, parameters if parameters is not None else keyword_parameters)
+        self.description = [(c, _type_code(rows, i), None, None, None, None, True) for i, c in enumerate(columns)]
+        _count('rows', len(rows))
+        self.rowcount = 0
+        self._rows = self._iterate(rows)
+        return self
+
+    def parse(self, statement):
+        # Jen parse (round trip bez provedení) - text zůstane ve statement cache
+        if self.connection._closed:
+            raise DatabaseError('DPY-1001', 'not connected to database')
+        time.sleep(_host_setting(self.connection.host, 'query_latency'))
+        _record_statement(self.connection, statement, execute=False)
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        batch = []
+        for row in self._rows:
+            batch.append(row)
+            if len(batch) >= size:
+                break
+        return batch
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def __iter__(self):
+        return self._rows
+
+    def close(self):
+        self._rows = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Connection:
+    def __init__(self, pool=None, host=None):
+        time.sleep(_host_setting(host, 'connect_latency'))
+        if _host_setting(host, 'down'):
+            raise OperationalError('DPY-6005', f"cannot connect to database (host {host})")
+        _count('connects')
+        self.host = host
+        self._pool = pool
+        self._closed = False
+        self.stmtcachesize = 20
+        self._stmt_cache = OrderedDict()
+        self.call_timeout = 0
+        self._cancel = threading.Event()
+        self.module = None
+        self.action = None
+        self.client_identifier = None
+
+    def cursor(self):
+        return Cursor(self)
+
+    def ping(self):
+        _count('pings')
+        time.sleep(settings['query_latency'])
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def cancel(self):
+        self._cancel.set()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, min=1, max=2, increment=1, getmode=POOL_GETMODE_WAIT, wait_timeout=0,
+                 ping_interval=60, stmtcachesize=20, **connect_params):
+        self.min = min
+        self.max = max
+        self.increment = increment
+        self.getmode = getmode
+        self.wait_timeout = wait_timeout
+        self.ping_interval = ping_interval
+        self.stmtcachesize = stmtcachesize
+        self.host = connect_params.get('host')
+        self.session_callback = connect_params.get('session_callback')
+        self._cond = threading.Condition()
+        self._idle = []
+        self._busy = 0
+        self._open = True
+        for _ in range(min):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = Connection(pool=self, host=self.host)
+        conn.stmtcachesize = self.stmtcachesize
+        if self.session_callback is not None:
+            self.session_callback(conn, None)
+        return conn
+
+    @property
+    def opened(self):
+        with self._cond:
+            return len(self._idle) + self._busy
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._busy
+
+    def acquire(self):
+        deadline = None
+        if self.getmode == POOL_GETMODE_TIMEDWAIT and self.wait_timeout:
+            deadline = time.monotonic() + self.wait_timeout / 1000
+        with self._cond:
+            while True:
+                if not self._open:
+                    raise DatabaseError('DPY-1002', 'connection pool is not open')
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    self._busy += 1
+                    break
+                if len(self._idle) + self._busy < self.max:
+                    self._busy += 1
+                    conn, released_at = None, None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DatabaseError('DPY-4005', 'timed out waiting for the connection pool to return a connection')
+                self._cond.wait(remaining)
+        if conn is None:
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify()
+                raise
+        elif self.ping_interval >= 0 and time.monotonic() - released_at >= self.ping_interval:
+            conn.ping()
+        return conn
+
+    def release(self, connection):
+        # Zrušení mimo probíhající volání se spojením do poolu nevrací
+        connection._cancel.clear()
+        with self._cond:
+            self._busy -= 1
+            if self._open:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    def close(self, force=False):
+        with self._cond:
+            if self._busy and not force:
+                raise DatabaseError('DPY-1005', 'unable to close pool with busy connections')
+            self._open = False
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+def connect(dsn=None, **params):
+    return Connection(host=params.get('host'))
+
+
+def create_pool(dsn=None, **params):
+    return ConnectionPool(**params)
@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+def parse_ttls(spec):
+    """Převede 'sekce=sekundy,...' (např. z .env) na slovník TTL"""
+    ttls = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        name, value = item.split('=', 1)
+        ttls[name.strip()] = float(value)
+    return ttls
+
+
+class _Entry:
+    __slots__ = ('value', 'loaded_at', 'loaded_wall')
+
+    def __init__(self, value):
+        self.value = value
+        self.loaded_at = time.monotonic()
+        self.loaded_wall = datetime.now()
+
+
+class _InFlight:
+    __slots__ = ('event', 'entry', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.entry = None
+        self.error = None
+
+
+class SectionCache:
+    """
+    Sdílená cache sekcí snapshotu s vlastním TTL pro každou sekci.
+
+    Souběžné požadavky na stejnou prošlou sekci se slučují - dotaz do DB
+    provede jen první z nich, ostatní počkají na jeho výsledek.
+    """
+
+    def __init__(self, ttls=None, default_ttl=5.0):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def ttl_for(self, key):
+        name = key[0] if isinstance(key, tuple) else key
+        return self.ttls.get(name, self.default_ttl)
+
+    def get(self, key, loader):
+        """Vrátí (hodnota, stáří v s, čas načtení); při prošlém TTL zavolá loader()"""
+        ttl = self.ttl_for(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.loaded_at < ttl:
+                self.hits += 1
+                return entry.value, time.monotonic() - entry.loaded_at, entry.loaded_wall
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _InFlight()
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.coalesced += 1
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            entry = flight.entry
+            return entry.value, time.monotonic() - entry.loaded_at, entry.loaded_wall
+
+        try:
+            entry = flight.entry = _Entry(loader())
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = entry
+            return entry.value, 0.0, entry.loaded_wall
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def peek(self, key, stale=False):
+        """Vrátí (hodnota, stáří, čas načtení) bez dotazu do DB, nebo None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry.loaded_at
+        if not stale and age >= self.ttl_for(key):
+            return None
+        return entry.value, age, entry.loaded_wall
+
+    def invalidate(self, name=None):
+        """Zahodí všechny položky, nebo jen položky dané sekce"""
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key == name or (isinstance(key, tuple) and key[0] == name):
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses, 'coalesced': self.coalesced}
+
+
+class Retry(Exception):
+    """Loader se vzdal (zrušený dotaz) - čekající požadavky mají načíst samy"""
+
+
+class QueryResultCache:
+    """
+    LRU cache výsledků vlastních dotazů (/api/execute-query).
+
+    Položky platí ttl sekund a celková velikost je omezená max_bytes (odhad
+    z loaderu) i max_entries - při překročení se vyhazují nejdéle nepoužité.
+    Souběžné stejné dotazy se slučují jako v SectionCache: do DB jde jen
+    první, ostatní počkají na jeho výsledek.
+    """
+
+    def __init__(self, ttl=30.0, max_bytes=64 * 1024 * 1024, max_entries=256):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key, loader):
+        """
+        Vrátí (hodnota, stáří v s nebo None při novém načtení).
+        loader() vrací (hodnota, velikost v B); velikost None = neukládat.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, size, loaded_at = entry
+                    age = time.monotonic() - loaded_at
+                    if age < self.ttl:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return value, age
+                    self._remove(key)
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _InFlight()
+                    owner = True
+                    self.misses += 1
+                else:
+                    owner = False
+                    self.coalesced += 1
+
+            if owner:
+                break
+            flight.event.wait()
+            if isinstance(flight.error, Retry):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.entry, 0.0
+
+        try:
+            value, size = loader()
+            flight.entry = value
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            if size is not None and self.ttl > 0 and size <= self.max_bytes:
+                with self._lock:
+                    self._store(key, value, size)
+            return value, None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _store(self, key, value, size):
+        self._remove(key)
+        self._entries[key] = (value, size, time.monotonic())
+        self.bytes += size
+        while self._entries and (self.bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses,
+                    'coalesced': self.coalesced, 'evictions': self.evictions}
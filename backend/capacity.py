@@ -0,0 +1,304 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from settings import Config
+
+DAY = 86400.0
+# Sezónní profil: průměrná odchylka od trendu po hodinách dne (UTC)
+SEASON_BUCKETS = 24
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS capacity_samples (
+        target TEXT NOT NULL,
+        tablespace TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        used_mb REAL NOT NULL,
+        total_mb REAL NOT NULL,
+        PRIMARY KEY (target, tablespace, ts)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS capacity_models (
+        target TEXT NOT NULL,
+        tablespace TEXT NOT NULL,
+        state TEXT NOT NULL,
+        PRIMARY KEY (target, tablespace)
+    ) WITHOUT ROWID;
+"""
+
+# Jak často (počet zápisů) mazat vzorky mimo retenci
+_PRUNE_EVERY = 100
+# Zaplnění za víc než 10 let se bere jako "neroste" (šum u stabilních tablespaců)
+MAX_FORECAST_DAYS = 3650
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+class GrowthModel:
+    """
+    Inkrementální model růstu obsazeného místa jednoho tablespace.
+
+    Trend je vážená lineární regrese (used_mb ~ čas) s exponenciálním
+    zapomínáním - drží se jen součty, které se při každém vzorku přenásobí
+    vahou 0.5^(Δt / half_life), takže starší historie se nepřepočítává.
+    Denní sezónnost (noční loady, purge) je hodinový profil odchylek od
+    trendu; trend se fituje na hodnotách očištěných o tento profil.
+    """
+
+    def __init__(self, half_life_days=14.0, season_alpha=0.1):
+        self.half_life_days = half_life_days
+        self.season_alpha = season_alpha
+        self.origin = None
+        self.first_ts = None
+        self.last_ts = None
+        self.samples = 0
+        self.used_mb = None
+        self.total_mb = None
+        # Vážené součty: w, w*t, w*t^2, w*y, w*t*y, w*y^2 (t ve dnech od origin)
+        self.s0 = self.s1 = self.s2 = self.sy = self.sty = self.syy = 0.0
+        self.season = [0.0] * SEASON_BUCKETS
+
+    def _t(self, ts):
+        return (ts - self.origin) / DAY
+
+    @staticmethod
+    def _bucket(ts):
+        return int(ts // 3600) % SEASON_BUCKETS
+
+    def update(self, ts, used_mb, total_mb):
+        if self.origin is None:
+            self.origin = self.first_ts = ts
+        if self.last_ts is not None:
+            decay = 0.5 ** ((ts - self.last_ts) / DAY / self.half_life_days)
+            self.s0 *= decay
+            self.s1 *= decay
+            self.s2 *= decay
+            self.sy *= decay
+            self.sty *= decay
+            self.syy *= decay
+        t = self._t(ts)
+        bucket = self._bucket(ts)
+        fit = self.fit()
+        if fit is not None:
+            slope, intercept, _ = fit
+            residual = used_mb - (intercept + slope * t)
+            self.season[bucket] += self.season_alpha * (residual - self.season[bucket])
+        y = used_mb - self.season[bucket]
+        self.s0 += 1.0
+        self.s1 += t
+        self.s2 += t * t
+        self.sy += y
+        self.sty += t * y
+        self.syy += y * y
+        self.last_ts = ts
+        self.samples += 1
+        self.used_mb = used_mb
+        self.total_mb = total_mb
+
+    def fit(self):
+        """(růst MB/den, průsečík, R²), nebo None dokud nejsou aspoň dva různé časy"""
+        denominator = self.s0 * self.s2 - self.s1 * self.s1
+        if self.samples < 2 or denominator <= 1e-12 * max(1.0, self.s0 * self.s2):
+            return None
+        slope = (self.s0 * self.sty - self.s1 * self.sy) / denominator
+        intercept = (self.sy - slope * self.s1) / self.s0
+        total = self.syy - self.sy * self.sy / self.s0
+        residual = self.syy - intercept * self.sy - slope * self.sty
+        r2 = 1 - residual / total if total > 1e-9 else None
+        return slope, intercept, r2
+
+    def predict(self, ts):
+        fit = self.fit()
+        if fit is None:
+            return None
+        slope, intercept, _ = fit
+        return intercept + slope * self._t(ts) + self.season[self._bucket(ts)]
+
+    def projection(self, now=None, min_samples=12):
+        """Prognóza: růst za den, dny do zaplnění (None = neroste / málo dat) a datum"""
+        if now is None:
+            now = time.time()
+        result = {
+            'used_mb': self.used_mb,
+            'total_mb': self.total_mb,
+            'pct_used': round(100 * self.used_mb / self.total_mb, 2) if self.total_mb else None,
+            'samples': self.samples,
+            'span_days': round((self.last_ts - self.first_ts) / DAY, 2) if self.samples else 0.0,
+            'growth_mb_per_day': None,
+            'r2': None,
+            'seasonal_amplitude_mb': None,
+            'days_to_full': None,
+            'full_at': None,
+            'status': 'insufficient_data',
+        }
+        fit = self.fit()
+        if fit is None or self.samples < min_samples:
+            return result
+        slope, intercept, r2 = fit
+        peak = max(self.season)
+        result.update(growth_mb_per_day=round(slope, 3), r2=round(r2, 3) if r2 is not None else None,
+                      seasonal_amplitude_mb=round(peak - min(self.season), 2))
+        if self.used_mb >= self.total_mb:
+            result.update(days_to_full=0.0, full_at=_iso(now), status='full')
+        else:
+            # Konzervativně: zaplní se, až trend + nejvyšší denní výkyv dosáhne kapacity
+            days = None
+            if slope > 0:
+                days = max(0.0, (self.total_mb - peak - intercept) / slope - self._t(now))
+            if days is None or days > MAX_FORECAST_DAYS:
+                result['status'] = 'not_growing'
+            else:
+                result.update(days_to_full=round(days, 2), full_at=_iso(now + days * DAY), status='growing')
+        return result
+
+    def to_state(self):
+        return {key: getattr(self, key) for key in (
+            'half_life_days', 'season_alpha', 'origin', 'first_ts', 'last_ts', 'samples', 'used_mb',
+            'total_mb', 's0', 's1', 's2', 'sy', 'sty', 'syy', 'season')}
+
+    @classmethod
+    def from_state(cls, state):
+        model = cls(state['half_life_days'], state['season_alpha'])
+        for key, value in state.items():
+            setattr(model, key, value)
+        return model
+
+
+class CapacityStore:
+    """Vzorky used/total MB a stav modelů v SQLite (ve výchozím stavu vedle historie metrik)"""
+
+    def __init__(self, path, retention_days=400):
+        self.path = path
+        self.retention = retention_days * DAY
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._writes = 0
+
+    def save(self, target_id, ts, samples, models):
+        """samples = [(tablespace, used_mb, total_mb)], models = {tablespace: GrowthModel}"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO capacity_samples VALUES (?, ?, ?, ?, ?)',
+                [(target_id, name, int(ts), used, total) for name, used, total in samples])
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO capacity_models VALUES (?, ?, ?)',
+                [(target_id, name, json.dumps(model.to_state())) for name, model in models.items()])
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._conn.execute('DELETE FROM capacity_samples WHERE ts < ?', (int(ts - self.retention),))
+
+    def load_models(self, target_id):
+        with self._lock:
+            rows = self._conn.execute('SELECT tablespace, state FROM capacity_models WHERE target = ?',
+                                      (target_id,)).fetchall()
+        return {name: GrowthModel.from_state(json.loads(state)) for name, state in rows}
+
+    def samples(self, target_id, tablespace, since):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT ts, used_mb, total_mb FROM capacity_samples '
+                'WHERE target = ? AND tablespace = ? AND ts >= ? ORDER BY ts',
+                (target_id, tablespace, int(since))).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CapacityTracker:
+    """
+    Modely růstu tablespaců jedné cílové DB. observe() dostává řádky
+    sekce tablespaces při každém skutečném načtení z DB; vzorky hustší než
+    min_interval se přeskočí (stejný stav z cache by jen zvýšil váhu).
+    """
+
+    def __init__(self, target_id, store_factory, min_interval=300, half_life_days=14.0):
+        self.target_id = target_id
+        self.min_interval = min_interval
+        self.half_life_days = half_life_days
+        self._store_factory = store_factory
+        self._lock = threading.Lock()
+        self._models = None
+
+    def _loaded(self):
+        # Modely z minulého běhu - jen jednou, ne přepočtem historie
+        if self._models is None:
+            self._models = self._store_factory().load_models(self.target_id)
+        return self._models
+
+    def observe(self, ts, rows):
+        """rows = [(tablespace, pct_used, used_mb, total_mb)] ze SQL_TABLESPACE_USAGE"""
+        with self._lock:
+            models = self._loaded()
+            samples = []
+            changed = {}
+            for name, _, used_mb, total_mb in rows:
+                if used_mb is None or not total_mb:
+                    continue
+                model = models.get(name)
+                if model is None:
+                    model = models[name] = GrowthModel(self.half_life_days)
+                elif ts - model.last_ts < self.min_interval:
+                    continue
+                model.update(ts, float(used_mb), float(total_mb))
+                samples.append((name, float(used_mb), float(total_mb)))
+                changed[name] = model
+            if changed:
+                self._store_factory().save(self.target_id, ts, samples, changed)
+        return len(changed)
+
+    def forecast(self, min_samples=12, now=None):
+        """Prognózy všech tablespaců, nejdřív ty, které se zaplní nejdřív"""
+        with self._lock:
+            models = dict(self._loaded())
+            result = []
+            for name, model in models.items():
+                projection = model.projection(now, min_samples)
+                projection['name'] = name
+                result.append(projection)
+        result.sort(key=lambda p: (p['days_to_full'] is None, p['days_to_full'] or 0, -(p['pct_used'] or 0)))
+        return result
+
+    def detail(self, name, days=30, horizon_days=30, min_samples=12, step=3600, now=None):
+        """Vzorky za posledních days dní a předpověď na horizon_days dopředu, nebo None"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            model = self._loaded().get(name)
+            if model is None:
+                return None
+            projection = model.projection(now, min_samples)
+            forecast = []
+            if model.fit() is not None:
+                ts = (now // step + 1) * step
+                while ts <= now + horizon_days * DAY:
+                    forecast.append((_iso(ts), round(model.predict(ts), 2)))
+                    ts += step
+        samples = self._store_factory().samples(self.target_id, name, now - days * DAY)
+        return {
+            'name': name,
+            'projection': projection,
+            'samples': [(_iso(ts), used, total) for ts, used, total in samples],
+            'forecast': forecast,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_capacity_store():
+    """Sdílené úložiště vzorků a modelů (vytvoří se při prvním použití)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CapacityStore(Config.CAPACITY_DB_PATH, Config.CAPACITY_RETENTION_DAYS)
+        return _store
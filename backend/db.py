@@ -1,28 +1,191 @@
-import oracledb
-from config import Config
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import telemetry
+from settings import Config
+from lazy import LazyModule
+from targets import registry
 
-def get_oracle_connection():
-    """Vytvoří nové připojení k Oracle DB v thin mode (bez Instant Client)"""
+# Ovladač se načte až při prvním použití (warmup, první dotaz)
+oracledb = LazyModule('oracledb')
+
+# Vlastní pool pro každou cílovou DB (podle id) - nedostupná DB nevyčerpá spojení ostatním
+_pools = {}
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _new_stats():
+    return {
+        'acquired': 0,
+        'acquire_errors': 0,
+        'acquire_timeouts': 0,
+        'acquire_wait_ms_total': 0.0,
+        'acquire_wait_ms_max': 0.0,
+    }
+
+
+def _connect_params(target=None):
+    """Společné parametry pro connect i pool"""
+    target = target or registry.default
+    params = {
+        'user': target.user,
+        'password': target.password,
+        'host': target.host,
+        'port': target.port,
+        'service_name': target.service,
+        # Nedostupný server nesmí blokovat sběr na výchozích 20 s
+        'tcp_connect_timeout': Config.ORACLE_CONNECT_TIMEOUT,
+    }
+    # Pokud se připojujeme jako SYS, použijeme SYSDBA mode
+    if target.user.upper() == 'SYS':
+        params['mode'] = oracledb.AUTH_MODE_SYSDBA
+    return params
+
+
+def _init_session(conn, requested_tag):
+    """Nové spojení v poolu: MODULE pro dohledání našich dotazů ve V$SQLAREA"""
+    conn.module = Config.ORACLE_MODULE
+
+
+def get_pool(target=None):
+    """Vrátí sdílený connection pool cílové DB, při prvním volání ho vytvoří"""
+    target = target or registry.default
+    pool = _pools.get(target.id)
+    if pool is not None:
+        return pool
+    with _pool_lock:
+        pool = _pools.get(target.id)
+        if pool is None:
+            try:
+                pool = oracledb.create_pool(
+                    min=Config.ORACLE_POOL_MIN,
+                    max=Config.ORACLE_POOL_MAX,
+                    increment=Config.ORACLE_POOL_INCREMENT,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=int(Config.ORACLE_POOL_TIMEOUT * 1000),
+                    ping_interval=Config.ORACLE_POOL_PING_INTERVAL,
+                    # Statement cache na každém spojení - opakované dotazy bez nového parse
+                    stmtcachesize=Config.ORACLE_STMT_CACHE_SIZE,
+                    session_callback=_init_session,
+                    **_connect_params(target)
+                )
+            except oracledb.Error as error:
+                print(f"Oracle pool creation error ({target.id}): {error}")
+                raise
+            _pools[target.id] = pool
+    return pool
+
+
+def get_oracle_connection(target=None):
+    """Vypůjčí spojení z poolu (conn.close() ho vrátí zpět do poolu)"""
+    target = target or registry.default
+    with _stats_lock:
+        stats = _stats.setdefault(target.id, _new_stats())
+    start = time.perf_counter()
     try:
-        # Pokud se připojujeme jako SYS, použijeme SYSDBA mode
-        if Config.ORACLE_USER.upper() == 'SYS':
-            conn = oracledb.connect(
-                user=Config.ORACLE_USER,
-                password=Config.ORACLE_PASSWORD,
-                host=Config.ORACLE_HOST,
-                port=int(Config.ORACLE_PORT),
-                service_name=Config.ORACLE_SERVICE,
-                mode=oracledb.AUTH_MODE_SYSDBA
-            )
-        else:
-            conn = oracledb.connect(
-                user=Config.ORACLE_USER,
-                password=Config.ORACLE_PASSWORD,
-                host=Config.ORACLE_HOST,
-                port=int(Config.ORACLE_PORT),
-                service_name=Config.ORACLE_SERVICE
-            )
-        return conn
+        conn = get_pool(target).acquire()
     except oracledb.Error as error:
-        print(f"Oracle connection error: {error}")
+        timeout = getattr(error.args[0], 'full_code', None) == 'DPY-4005'
+        with _stats_lock:
+            stats['acquire_errors'] += 1
+            if timeout:
+                stats['acquire_timeouts'] += 1
+        telemetry.acquire_error(target.id, timeout)
+        print(f"Oracle connection error ({target.id}): {error}")
         raise
+    wait = time.perf_counter() - start
+    telemetry.observe_acquire(target.id, wait)
+    wait_ms = wait * 1000
+    with _stats_lock:
+        stats['acquired'] += 1
+        stats['acquire_wait_ms_total'] += wait_ms
+        stats['acquire_wait_ms_max'] = max(stats['acquire_wait_ms_max'], wait_ms)
+    return conn
+
+
+def warm_pool(target=None, connections=None, statements=()):
+    """
+    Otevře pool s connections spojeními (výchozí min poolu) a na každém
+    připraví statements - parse bez provedení, text zůstane ve statement
+    cache spojení. Vrátí počet zahřátých spojení.
+    """
+    pool = get_pool(target)
+    count = max(1, min(pool.max, connections or pool.min))
+
+    def prime(conn):
+        cur = conn.cursor()
+        try:
+            for sql in statements:
+                cur.parse(sql)
+        finally:
+            cur.close()
+
+    # Všechna spojení najednou (jinak by pool vracel pořád to samé) a souběžně jako paralelní sběr
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix='warmup') as executor:
+        futures = [executor.submit(get_oracle_connection, target) for _ in range(count)]
+        conns = []
+        error = None
+        for future in futures:
+            try:
+                conns.append(future.result())
+            except Exception as e:
+                error = e
+        try:
+            list(executor.map(prime, conns))
+        finally:
+            for conn in conns:
+                conn.close()
+    if error is not None:
+        raise error
+    return count
+
+
+def get_pool_stats(target=None):
+    """Vrátí statistiky poolu (velikost, vytížení, čekání na spojení)"""
+    target = target or registry.default
+    with _stats_lock:
+        stats = dict(_stats.get(target.id) or _new_stats())
+    acquired = stats['acquired']
+    stats['acquire_wait_ms_avg'] = round(stats['acquire_wait_ms_total'] / acquired, 3) if acquired else 0.0
+    stats['acquire_wait_ms_total'] = round(stats['acquire_wait_ms_total'], 3)
+    stats['acquire_wait_ms_max'] = round(stats['acquire_wait_ms_max'], 3)
+    pool = _pools.get(target.id)
+    stats['open'] = pool is not None
+    if pool is not None:
+        stats['min'] = pool.min
+        stats['max'] = pool.max
+        stats['increment'] = pool.increment
+        stats['opened'] = pool.opened
+        stats['busy'] = pool.busy
+    return stats
+
+
+def close_pool():
+    """Zavře pooly všech cílů a uvolní spojení (při ukončení aplikace)"""
+    with _pool_lock:
+        pools = list(_pools.items())
+        _pools.clear()
+    for target_id, pool in pools:
+        try:
+            pool.close(force=True)
+        except oracledb.Error as error:
+            print(f"Oracle pool close error ({target_id}): {error}")
+
+
+def drain_pools(timeout):
+    """Počká (max. timeout s) na vrácení vypůjčených spojení a pak zavře pooly"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and any(pool.busy for pool in list(_pools.values())):
+        time.sleep(0.1)
+    close_pool()
+
+
+def _pool_gauge(attribute):
+    return lambda: {(('target', target_id),): getattr(pool, attribute) for target_id, pool in list(_pools.items())}
+
+
+telemetry.registry.gauge('pool_busy_connections', 'Connections currently borrowed from the pool',
+                         _pool_gauge('busy'))
+telemetry.registry.gauge('pool_open_connections', 'Connections open in the pool', _pool_gauge('opened'))
@@ -0,0 +1,73 @@
+import threading
+import time
+
+
+class DeltaTracker:
+    """
+    Převádí kumulativní čítače (V$OSSTAT, V$SYSTEM_EVENT, V$SESS_IO...) na
+    hodnoty za poslední interval.
+
+    Pro každý klíč drží předchozí vzorek. Pokles hodnoty nebo změna epochy
+    (např. STARTUP_TIME instance) se bere jako reset čítače - vzorek se jen
+    uloží jako nový základ a delta se nevrací. Klíče neaktualizované déle
+    než max_age (odhlášené sessions, zmizelé eventy) se zahazují průběžně
+    při delta() nejvýše jednou za prune_interval s, z kterékoli sekce.
+    """
+
+    def __init__(self, max_age=3600, prune_interval=60):
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._lock = threading.Lock()
+        self._previous = {}
+        self._pruned_at = None
+        self.resets = 0
+
+    def delta(self, key, value, now=None, epoch=None):
+        """Vrátí (přírůstek, interval v s) od minulého vzorku, nebo None"""
+        if value is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            previous = self._previous.get(key)
+            self._previous[key] = (value, now, epoch)
+            if self._pruned_at is None:
+                self._pruned_at = now
+            elif now - self._pruned_at >= self.prune_interval:
+                self._prune(now)
+        if previous is None:
+            return None
+        prev_value, prev_time, prev_epoch = previous
+        interval = now - prev_time
+        if interval <= 0:
+            return None
+        if epoch != prev_epoch or value < prev_value:
+            self.resets += 1
+            return None
+        return value - prev_value, interval
+
+    def rate(self, key, value, now=None, epoch=None, ndigits=2):
+        """Přírůstek za sekundu od minulého vzorku, nebo None"""
+        result = self.delta(key, value, now, epoch)
+        if result is None:
+            return None
+        delta, interval = result
+        return round(delta / interval, ndigits)
+
+    def prune(self, now=None):
+        """Zapomene klíče, které se dlouho neaktualizovaly (odhlášené sessions)"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return self._prune(now)
+
+    def _prune(self, now):
+        stale = [key for key, (_, ts, _) in self._previous.items() if now - ts > self.max_age]
+        for key in stale:
+            del self._previous[key]
+        self._pruned_at = now
+        return len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._previous), 'resets': self.resets}
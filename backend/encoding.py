@@ -0,0 +1,84 @@
+import gzip
+import json
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from settings import Config
+
+# Volitelné rychlejší knihovny - bez nich se použije stdlib json a jen gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Typy odpovědí, které se nekomprimují (streamy se posílají průběžně)
+_STREAMING_MIMETYPES = ('text/event-stream', 'application/x-ndjson')
+
+
+def _default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def dumps(obj):
+    """Kompaktní JSON jako str (orjson, pokud je k dispozici)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # orjson neumí celá čísla nad 64 bitů (NUMBER(38), POWER(2,70)) - stdlib ano
+            pass
+    return json.dumps(obj, default=_default, separators=(',', ':'))
+
+
+def loads(data):
+    """JSON z bytes/str (orjson, pokud je k dispozici)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider pro jsonify: kompaktní výstup bez řazení klíčů"""
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        # jsonify předává jen separators pro kompaktní výstup - ten dělá i orjson
+        if orjson is not None and set(kwargs) <= {'separators'}:
+            return dumps(obj)
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+
+def compress_response(response):
+    """after_request: brotli/gzip komprese větších JSON odpovědí podle Accept-Encoding"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype in _STREAMING_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_SIZE:
+        return response
+
+    accept = request.headers.get('Accept-Encoding', '')
+    if brotli is not None and 'br' in accept:
+        response.set_data(brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY))
+        response.headers['Content-Encoding'] = 'br'
+    elif 'gzip' in accept:
+        response.set_data(gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        return response
+    response.headers.add('Vary', 'Accept-Encoding')
+    return response
@@ -0,0 +1,28 @@
+"""
+Konfigurace pro gunicorn (Linux):
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Záměrně jeden worker s vlákny - sampler, scheduler, cache a pooly jsou per
+proces, více workerů by stejnou DB dotazovalo násobně.
+"""
+from settings import Config
+
+bind = f"{Config.SERVER_HOST}:{Config.SERVER_PORT}"
+workers = 1
+worker_class = 'gthread'
+threads = Config.SERVER_THREADS
+graceful_timeout = Config.SERVER_SHUTDOWN_TIMEOUT
+
+
+def post_worker_init(worker):
+    from app import start_background
+    from stream import broadcaster, stream_limit
+    # gthread: SSE odběratel drží jedno z threads vláken po celou dobu spojení
+    broadcaster.max_subscribers = stream_limit(threads)
+    start_background()
+
+
+def worker_exit(server, worker):
+    from app import shutdown
+    shutdown(Config.SERVER_SHUTDOWN_TIMEOUT)
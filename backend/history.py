@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import time
+
+# Úrovně historie: (bucket v s, retence v s). Každý vzorek se přičte do
+# bucketu všech úrovní, takže hrubší úrovně vznikají průběžně bez přepočtu.
+TIERS = [
+    (10, 6 * 3600),          # 10 s body za posledních 6 hodin
+    (60, 7 * 86400),         # minutové průměry za 7 dní
+    (900, 90 * 86400),       # 15min průměry za 90 dní
+]
+
+# Jak často (počet zápisů) mazat body mimo retenci
+_PRUNE_EVERY = 100
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS metrics (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS samples (
+        metric_id INTEGER NOT NULL,
+        tier INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        sum REAL NOT NULL,
+        count INTEGER NOT NULL,
+        min REAL NOT NULL,
+        max REAL NOT NULL,
+        PRIMARY KEY (metric_id, tier, ts)
+    ) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+    INSERT INTO samples (metric_id, tier, ts, sum, count, min, max)
+    VALUES (?, ?, ?, ?, 1, ?, ?)
+    ON CONFLICT (metric_id, tier, ts) DO UPDATE SET
+        sum = sum + excluded.sum,
+        count = count + 1,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max)
+"""
+
+
+class HistoryStore:
+    """Lokální time-series úložiště vzorků v SQLite s retencí a downsamplingem"""
+
+    def __init__(self, path, tiers=TIERS):
+        self.path = path
+        self.tiers = list(tiers)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._metric_ids = dict((name, id_) for id_, name in self._conn.execute('SELECT id, name FROM metrics'))
+        self._writes = 0
+
+    def _metric_id(self, name):
+        metric_id = self._metric_ids.get(name)
+        if metric_id is None:
+            cur = self._conn.execute('INSERT INTO metrics (name) VALUES (?)', (name,))
+            metric_id = self._metric_ids[name] = cur.lastrowid
+        return metric_id
+
+    def append(self, ts, values):
+        """Zapíše vzorek {metrika: hodnota} s časem ts (epoch s) do všech úrovní"""
+        rows = []
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                metric_id = self._metric_id(name)
+                value = float(value)
+                for tier, (bucket, _) in enumerate(self.tiers):
+                    rows.append((metric_id, tier, int(ts // bucket * bucket), value, value, value))
+            with self._conn:
+                self._conn.executemany(_UPSERT, rows)
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(ts)
+
+    def _prune(self, now):
+        with self._conn:
+            for tier, (_, retention) in enumerate(self.tiers):
+                self._conn.execute('DELETE FROM samples WHERE tier = ? AND ts < ?', (tier, int(now - retention)))
+
+    def metric_names(self):
+        with self._lock:
+            return sorted(self._metric_ids)
+
+    def pick_tier(self, start, end, max_points):
+        """Nejjemnější úroveň, která pokrývá začátek rozsahu a nepřekročí max_points"""
+        now = time.time()
+        for tier, (bucket, retention) in enumerate(self.tiers):
+            if start >= now - retention and (end - start) / bucket <= max_points:
+                return tier
+        return len(self.tiers) - 1
+
+    def query(self, names, start, end, tier=None, max_points=500):
+        """Vrátí {metrika: [[ts, avg, min, max], ...]} pro časový rozsah"""
+        if tier is None:
+            tier = self.pick_tier(start, end, max_points)
+        result = {}
+        with self._lock:
+            for name in names:
+                metric_id = self._metric_ids.get(name)
+                if metric_id is None:
+                    result[name] = []
+                    continue
+                cur = self._conn.execute(
+                    'SELECT ts, sum / count, min, max FROM samples '
+                    'WHERE metric_id = ? AND tier = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                    (metric_id, tier, int(start), int(end)))
+                result[name] = [list(row) for row in cur]
+        return tier, result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,32 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Modul, který se naimportuje až při prvním přístupu k atributu.
+
+    Import ovladače (oracledb s thin implementací a cryptography) je
+    nejdražší část startu - takto se zaplatí až ve warmupu na pozadí nebo v
+    prvním požadavku, který DB opravdu potřebuje. Souběžný první přístup je
+    bezpečný, import_module drží zámek modulu.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
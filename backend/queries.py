@@ -3,6 +3,13 @@ SQL_ACTIVE_SESSIONS = "SELECT COUNT(*) FROM V$SESSION WHERE STATUS='ACTIVE' AND
 
 SQL_TOTAL_SESSIONS = "SELECT COUNT(*) FROM V$SESSION WHERE USERNAME IS NOT NULL"
 
+# Celkový i aktivní počet sessions jedním průchodem V$SESSION
+SQL_SESSION_COUNTS = """
+    SELECT COUNT(*), SUM(CASE WHEN STATUS='ACTIVE' THEN 1 ELSE 0 END)
+    FROM V$SESSION
+    WHERE USERNAME IS NOT NULL
+"""
+
 SQL_WAIT_EVENTS = """
     SELECT EVENT, COUNT(*) as CNT 
     FROM V$SESSION_WAIT
@@ -27,12 +34,15 @@ SQL_SGA_COMPONENTS = """
     ORDER BY CURRENT_SIZE DESC
 """
 
+# Metriky jsou v blocích - velikost bloku podle tablespace (BLOCK_SIZE může být 2-32 kB).
+# TABLESPACE_SIZE zahrnuje i autoextend do MAXSIZE, TOTAL_MB je tedy skutečná kapacita.
 SQL_TABLESPACE_USAGE = """
-    SELECT TABLESPACE_NAME, 
-           ROUND(100*USED_SPACE/TABLESPACE_SIZE,2) as PCT_USED,
-           ROUND(USED_SPACE*8192/1024/1024,2) as USED_MB,
-           ROUND(TABLESPACE_SIZE*8192/1024/1024,2) as TOTAL_MB
-    FROM DBA_TABLESPACE_USAGE_METRICS
+    SELECT m.TABLESPACE_NAME,
+           ROUND(100*m.USED_SPACE/m.TABLESPACE_SIZE,2) as PCT_USED,
+           ROUND(m.USED_SPACE*t.BLOCK_SIZE/1024/1024,2) as USED_MB,
+           ROUND(m.TABLESPACE_SIZE*t.BLOCK_SIZE/1024/1024,2) as TOTAL_MB
+    FROM DBA_TABLESPACE_USAGE_METRICS m
+    JOIN DBA_TABLESPACES t ON t.TABLESPACE_NAME = m.TABLESPACE_NAME
     ORDER BY PCT_USED DESC
 """
 
@@ -110,29 +120,92 @@ SQL_SESSION_DETAILS = """
     ORDER BY s.LOGON_TIME DESC
 """
 
-def get_active_sql_query(limit):
-    return f"""
-        SELECT 
-            s.sql_id,
-            s.sql_text,
-            s.executions,
-            s.elapsed_time / 1000000 as elapsed_sec,
-            s.cpu_time / 1000000 as cpu_sec,
-            s.buffer_gets,
-            s.disk_reads,
-            s.rows_processed,
-            s.parsing_schema_name,
-            sess.username as last_active_user
-        FROM v$sql s
-        LEFT JOIN (
-            SELECT sql_id, username, ROW_NUMBER() OVER (PARTITION BY sql_id ORDER BY last_call_et DESC) as rn
-            FROM v$session
-            WHERE sql_id IS NOT NULL AND username IS NOT NULL
-        ) sess ON s.sql_id = sess.sql_id AND sess.rn = 1
-        WHERE s.executions > 0
-        ORDER BY s.elapsed_time DESC
-        FETCH FIRST {limit} ROWS ONLY
-    """
+# Řádkový limit jako bind proměnná - jeden kurzor ve shared poolu pro všechny limity
+SQL_ACTIVE_SQL = """
+    SELECT 
+        s.sql_id,
+        s.sql_text,
+        s.executions,
+        s.elapsed_time / 1000000 as elapsed_sec,
+        s.cpu_time / 1000000 as cpu_sec,
+        s.buffer_gets,
+        s.disk_reads,
+        s.rows_processed,
+        s.parsing_schema_name,
+        sess.username as last_active_user
+    FROM v$sql s
+    LEFT JOIN (
+        SELECT sql_id, username, ROW_NUMBER() OVER (PARTITION BY sql_id ORDER BY last_call_et DESC) as rn
+        FROM v$session
+        WHERE sql_id IS NOT NULL AND username IS NOT NULL
+    ) sess ON s.sql_id = sess.sql_id AND sess.rn = 1
+    WHERE s.executions > 0
+    ORDER BY s.elapsed_time DESC
+    FETCH FIRST :row_limit ROWS ONLY
+"""
+
+# ASH vzorek: sessions na CPU nebo v čekání mimo třídu Idle (bez vlastní session)
+SQL_ASH_SAMPLE = """
+    SELECT
+        SID,
+        SERIAL#,
+        USERNAME,
+        SQL_ID,
+        CASE WHEN STATE = 'WAITING' THEN EVENT ELSE 'ON CPU' END,
+        CASE WHEN STATE = 'WAITING' THEN WAIT_CLASS ELSE 'CPU' END,
+        CASE WHEN STATE = 'WAITING' THEN 1 ELSE 0 END
+    FROM V$SESSION
+    WHERE STATUS = 'ACTIVE'
+      AND (STATE <> 'WAITING' OR WAIT_CLASS <> 'Idle')
+      AND SID <> SYS_CONTEXT('USERENV', 'SID')
+"""
+
+# Top SQL: jen příkazy aktivní od minulého průchodu (V$SQLSTATS nedrží latche library cache)
+SQL_TOP_SQL_STATS = """
+    SELECT
+        sql_id,
+        SUM(executions),
+        SUM(elapsed_time),
+        SUM(cpu_time),
+        SUM(buffer_gets),
+        SUM(disk_reads),
+        SUM(rows_processed),
+        MAX(last_active_time)
+    FROM v$sqlstats
+    WHERE last_active_time >= :since
+    GROUP BY sql_id
+"""
+
+# Texty pro žebříček po dávkách - pevný počet bind proměnných (nevyužité = NULL), jeden kurzor
+TOP_SQL_TEXT_BATCH = 50
+SQL_TOP_SQL_TEXT = f"""
+    SELECT sql_id, parsing_schema_name, sql_text
+    FROM v$sqlarea
+    WHERE sql_id IN ({', '.join(f':{i + 1}' for i in range(TOP_SQL_TEXT_BATCH))})
+"""
+
+# Všechny texty najednou, když jich chybí hodně (žebříček ALL)
+SQL_TOP_SQL_TEXT_ALL = """
+    SELECT sql_id, parsing_schema_name, sql_text
+    FROM v$sqlarea
+"""
+
+SQL_TOP_SQL_FULLTEXT = """
+    SELECT sql_id, parsing_schema_name, sql_fulltext
+    FROM v$sqlarea
+    WHERE sql_id = :sql_id
+"""
+
+# Poslední uživatel, který příkaz spustil (V$SESSION je malý, V$SQL se neprochází)
+SQL_SQL_LAST_USER = """
+    SELECT sql_id, username
+    FROM (
+        SELECT sql_id, username, ROW_NUMBER() OVER (PARTITION BY sql_id ORDER BY last_call_et DESC) as rn
+        FROM v$session
+        WHERE sql_id IS NOT NULL AND username IS NOT NULL
+    )
+    WHERE rn = 1
+"""
 
 SQL_TABLE_STATS = """
     SELECT 
@@ -147,33 +220,81 @@ SQL_TABLE_STATS = """
     ORDER BY num_rows DESC NULLS LAST
 """
 
-# System Resources
-SQL_OS_STAT = """
-    SELECT STAT_NAME, VALUE 
-    FROM V$OSSTAT 
-    WHERE STAT_NAME IN ('BUSY_TIME', 'IDLE_TIME', 'NUM_CPUS', 'NUM_CPU_CORES', 
-                        'PHYSICAL_MEMORY_BYTES', 'LOAD')
+# Změnily se statistiky tabulek? Jeden řádek místo celého DBA_TABLES.
+# Součet OBJECT_ID a nejnovější CREATED odhalí i drop + create se stejným počtem tabulek
+SQL_TABLE_STATS_SIGNATURE = """
+    SELECT COUNT(*), MAX(t.last_analyzed), SUM(o.object_id), MAX(o.created)
+    FROM dba_tables t
+    LEFT JOIN dba_objects o
+        ON o.owner = t.owner AND o.object_name = t.table_name AND o.object_type = 'TABLE'
+    WHERE t.owner = USER
 """
 
-SQL_SYSMETRIC = """
-    SELECT METRIC_NAME, VALUE
-    FROM V$SYSMETRIC
-    WHERE GROUP_ID = 2
-    AND METRIC_NAME IN (
+# Jen tabulky se statistikami sebranými od minulé kontroly
+SQL_TABLE_STATS_CHANGED = """
+    SELECT
+        table_name,
+        num_rows,
+        blocks,
+        avg_row_len,
+        last_analyzed,
+        tablespace_name
+    FROM dba_tables
+    WHERE owner = USER AND last_analyzed > :since
+"""
+
+# DML od posledního sběru statistik (jen změněné tabulky, bez partitions)
+SQL_TABLE_MODIFICATIONS = """
+    SELECT table_name, inserts + updates + deletes
+    FROM dba_tab_modifications
+    WHERE table_owner = USER AND partition_name IS NULL
+"""
+
+# System Resources
+SQL_INSTANCE_STARTUP = "SELECT STARTUP_TIME FROM V$INSTANCE"
+
+# Názvy statistik - společné pro samostatné dotazy i sloučený SQL_RESOURCE_STATS
+_OS_STAT_NAMES = """'BUSY_TIME', 'IDLE_TIME', 'NUM_CPUS', 'NUM_CPU_CORES',
+                        'PHYSICAL_MEMORY_BYTES', 'LOAD'"""
+
+# CPU i I/O metriky ze stejné skupiny V$SYSMETRIC (60s průměr) - jedno čtení
+_SYSMETRIC_NAMES = """
         'Host CPU Utilization (%)',
         'CPU Usage Per Sec',
         'CPU Usage Per Txn',
         'Database CPU Time Ratio',
         'Host CPU Usage Per Sec',
         'Physical Memory',
-        'Physical Memory GB'
-    )
+        'Physical Memory GB',
+        'Physical Reads Per Sec',
+        'Physical Writes Per Sec',
+        'Physical Read Bytes Per Sec',
+        'Physical Write Bytes Per Sec',
+        'I/O Megabytes per Second',
+        'I/O Requests per Second'
+"""
+
+_TIME_MODEL_NAMES = "'DB CPU', 'background cpu time', 'DB time'"
+
+_PGA_NAMES = "'total PGA allocated', 'total PGA inuse', 'maximum PGA allocated'"
+
+SQL_OS_STAT = f"""
+    SELECT STAT_NAME, VALUE 
+    FROM V$OSSTAT 
+    WHERE STAT_NAME IN ({_OS_STAT_NAMES})
+"""
+
+SQL_SYSMETRIC = f"""
+    SELECT METRIC_NAME, VALUE
+    FROM V$SYSMETRIC
+    WHERE GROUP_ID = 2
+    AND METRIC_NAME IN ({_SYSMETRIC_NAMES})
 """
 
-SQL_SYS_TIME_MODEL = """
+SQL_SYS_TIME_MODEL = f"""
     SELECT STAT_NAME, ROUND(VALUE/1000000, 2) as VALUE_SEC
     FROM V$SYS_TIME_MODEL
-    WHERE STAT_NAME IN ('DB CPU', 'background cpu time', 'DB time')
+    WHERE STAT_NAME IN ({_TIME_MODEL_NAMES})
 """
 
 SQL_SGA_STAT = """
@@ -185,22 +306,53 @@ SQL_SGA_STAT = """
 
 SQL_TOTAL_SGA = "SELECT ROUND(SUM(VALUE)/1024/1024, 2) FROM V$SGA"
 
-SQL_PGA_STAT = """
+SQL_PGA_STAT = f"""
     SELECT NAME, ROUND(VALUE/1024/1024, 2) as MB
     FROM V$PGASTAT
-    WHERE NAME IN ('total PGA allocated', 'total PGA inuse', 'maximum PGA allocated')
+    WHERE NAME IN ({_PGA_NAMES})
 """
 
-SQL_IO_METRICS = """
-    SELECT METRIC_NAME, VALUE
+# Všechny pohledy pro systémové zdroje jedním round tripem jako (zdroj, název, hodnota);
+# STARTUP_TIME jako sekundy od epochy, aby se vešel do číselného sloupce
+SQL_RESOURCE_STATS = f"""
+    SELECT 'instance' AS SOURCE, 'STARTUP_TIME' AS NAME,
+           (STARTUP_TIME - DATE '1970-01-01') * 86400 AS VALUE
+    FROM V$INSTANCE
+    UNION ALL
+    SELECT 'os', STAT_NAME, VALUE
+    FROM V$OSSTAT
+    WHERE STAT_NAME IN ({_OS_STAT_NAMES})
+    UNION ALL
+    SELECT 'sysmetric', METRIC_NAME, VALUE
     FROM V$SYSMETRIC
     WHERE GROUP_ID = 2
-    AND METRIC_NAME IN (
-        'Physical Reads Per Sec',
-        'Physical Writes Per Sec',
-        'Physical Read Bytes Per Sec',
-        'Physical Write Bytes Per Sec',
-        'I/O Megabytes per Second',
-        'I/O Requests per Second'
-    )
+    AND METRIC_NAME IN ({_SYSMETRIC_NAMES})
+    UNION ALL
+    SELECT 'time_model', STAT_NAME, ROUND(VALUE/1000000, 2)
+    FROM V$SYS_TIME_MODEL
+    WHERE STAT_NAME IN ({_TIME_MODEL_NAMES})
+    UNION ALL
+    SELECT 'sga', POOL, SUM(BYTES)/(1024*1024)
+    FROM V$SGASTAT
+    WHERE POOL IS NOT NULL
+    GROUP BY POOL
+    UNION ALL
+    SELECT 'sga_total', 'total', ROUND(SUM(VALUE)/1024/1024, 2)
+    FROM V$SGA
+    UNION ALL
+    SELECT 'pga', NAME, ROUND(VALUE/1024/1024, 2)
+    FROM V$PGASTAT
+    WHERE NAME IN ({_PGA_NAMES})
+"""
+
+# Parse/execute statistiky našich dotazů (podle MODULE nastaveného na spojeních z poolu)
+SQL_STATEMENT_STATS = """
+    SELECT SQL_ID, SQL_TEXT, PARSE_CALLS, EXECUTIONS, LOADS, VERSION_COUNT
+    FROM V$SQLAREA
+    WHERE MODULE = :module
+    ORDER BY EXECUTIONS DESC
 """
+
+# Všechny statické dotazy podle názvu (bez prefixu SQL_) - pro statistiky a velikost statement cache
+STATEMENTS = {name[4:].lower(): value for name, value in list(globals().items())
+              if name.startswith('SQL_') and isinstance(value, str)}
@@ -0,0 +1,123 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class OpenCursor:
+    """
+    Rozpracovaný výsledek vlastního dotazu držený mezi stránkami.
+
+    lock řadí stránky za sebe; begin()/end() ohraničují práci s kurzorem.
+    close() během rozpracované stránky jen označí kurzor - spojení vrátí
+    do poolu až end() držitele, ne uprostřed fetch.
+    """
+
+    def __init__(self, conn, cur, columns, date_columns):
+        self.conn = conn
+        self.cur = cur
+        self.columns = columns
+        self.date_columns = date_columns
+        self.rows_sent = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+        self.busy = False
+        self.closed = False
+        self._guard = threading.Lock()
+
+    def begin(self):
+        """Začátek práce s kurzorem (pod lock); False, pokud už je zavřený"""
+        with self._guard:
+            if self.closed:
+                return False
+            self.busy = True
+            return True
+
+    def end(self):
+        """Konec práce s kurzorem; pokud se mezitím zavřel, vrátí spojení teď"""
+        with self._guard:
+            self.busy = False
+            release = self.closed
+        if release:
+            self._release()
+
+    def close(self):
+        with self._guard:
+            if self.closed:
+                return
+            self.closed = True
+            release = not self.busy
+        if release:
+            self._release()
+
+    def _release(self):
+        try:
+            self.cur.close()
+        finally:
+            # Vrátí spojení do poolu
+            self.conn.close()
+
+
+class CursorRegistry:
+    """
+    Otevřené kurzory stránkovaných dotazů z /api/execute-query.
+
+    Každý drží spojení z poolu, proto je jejich počet omezený (nejstarší se
+    zavře) a nepoužívané se po idle_timeout zavírají (při add/get a z tiku
+    sběru na pozadí).
+    """
+
+    def __init__(self, max_open=4, idle_timeout=120):
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._cursors = OrderedDict()
+
+    def add(self, cursor):
+        self.reap()
+        token = secrets.token_urlsafe(16)
+        evicted = []
+        with self._lock:
+            self._cursors[token] = cursor
+            while len(self._cursors) > self.max_open:
+                evicted.append(self._cursors.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return token
+
+    def get(self, token):
+        self.reap()
+        with self._lock:
+            cursor = self._cursors.get(token)
+            if cursor is not None:
+                self._cursors.move_to_end(token)
+                cursor.last_used = time.monotonic()
+            return cursor
+
+    def close(self, token):
+        with self._lock:
+            cursor = self._cursors.pop(token, None)
+        if cursor is not None:
+            cursor.close()
+        return cursor is not None
+
+    def reap(self):
+        """Zavře kurzory, na které se dlouho nikdo neptal"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, cursor in self._cursors.items()
+                       if now - cursor.last_used > self.idle_timeout]
+            cursors = [self._cursors.pop(token) for token in expired]
+        for cursor in cursors:
+            cursor.close()
+
+    def close_all(self):
+        with self._lock:
+            cursors = list(self._cursors.values())
+            self._cursors.clear()
+        for cursor in cursors:
+            cursor.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._cursors)
@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+
+from cache import Retry
+
+# Komentáře, literály (i q'[...]' a nq'[...]') a uvozené identifikátory se nemění,
+# zbytek po mezerách a slovech
+_SQL_TOKENS = re.compile(r"""
+    (?P<comment>--[^\n]*)\s*
+  | (?P<keep>
+        /\*.*?(?:\*/|\Z)
+      | [nN]?[qQ]'(?:\[.*?\]|\{.*?\}|\(.*?\)|<.*?>|(?P<delim>[^\s\[{(<]).*?(?P=delim))'
+      | '(?:[^']|'')*'
+      | "[^"]*"
+    )
+  | (?P<space>\s+)
+  | [\w$#]+
+  | .
+""", re.S | re.X)
+
+
+def normalize_sql(query):
+    """Klíč cache výsledků: bílé znaky a velikost písmen mimo literály a komentáře nehrají roli"""
+    parts = []
+    for match in _SQL_TOKENS.finditer(query.strip()):
+        if match.group('comment'):
+            # Konec řádku ukončuje komentář - bez něj by k němu patřil zbytek dotazu
+            parts.append(match.group('comment') + '\n')
+        elif match.group('keep'):
+            parts.append(match.group())
+        elif match.group('space'):
+            parts.append(' ')
+        else:
+            parts.append(match.group().upper())
+    return ''.join(parts)
+
+
+class QueryBusy(Exception):
+    """Dotaz se nedostal na řadu (plná fronta nebo vypršelo čekání)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueryCancelled(Retry):
+    """Klient se odpojil a dotaz byl v DB zrušen"""
+
+
+class QueryLimiter:
+    """
+    Omezení souběžných vlastních dotazů - celkem max_concurrent, na jednoho
+    uživatele per_user. Ostatní čekají ve frontě nejvýše timeout sekund;
+    při max_queued čekajících se další odmítají hned.
+    """
+
+    def __init__(self, max_concurrent=4, per_user=2, max_queued=16, timeout=10.0):
+        self.max_concurrent = max_concurrent
+        self.per_user = per_user
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._running = 0
+        self._by_user = {}
+        self._waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_ms_max = 0.0
+
+    def _free(self, user):
+        return self._running < self.max_concurrent and self._by_user.get(user, 0) < self.per_user
+
+    def acquire(self, user):
+        start = time.monotonic()
+        with self._cond:
+            if not self._free(user):
+                if self._waiting >= self.max_queued:
+                    self.rejected += 1
+                    raise QueryBusy('Too many queries waiting, try again later', self.timeout)
+                self.queued += 1
+                self._waiting += 1
+                try:
+                    deadline = start + self.timeout
+                    while not self._free(user):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timeouts += 1
+                            raise QueryBusy('Timed out waiting for a free query slot', self.timeout)
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._running += 1
+            self._by_user[user] = self._by_user.get(user, 0) + 1
+            self.admitted += 1
+            self.wait_ms_max = max(self.wait_ms_max, (time.monotonic() - start) * 1000)
+
+    def release(self, user):
+        with self._cond:
+            self._running -= 1
+            count = self._by_user.get(user, 0) - 1
+            if count > 0:
+                self._by_user[user] = count
+            else:
+                self._by_user.pop(user, None)
+            self._cond.notify_all()
+
+    def slot(self, user):
+        return _Slot(self, user)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'per_user': self.per_user,
+                'running': self._running,
+                'waiting': self._waiting,
+                'users': len(self._by_user),
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'wait_ms_max': round(self.wait_ms_max, 3),
+            }
+
+
+class _Slot:
+    def __init__(self, limiter, user):
+        self.limiter = limiter
+        self.user = user
+
+    def __enter__(self):
+        self.limiter.acquire(self.user)
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(self.user)
+
+
+class DisconnectWatch:
+    """
+    Po dobu bloku hlídá odpojení HTTP klienta (disconnected() z WSGI serveru)
+    a při odpojení zavolá conn.cancel() - dotaz v DB skončí s ORA-01013 a
+    spojení se uvolní dřív, než by doběhl zbytečný výsledek.
+    """
+
+    def __init__(self, conn, disconnected, interval=0.25):
+        self.conn = conn
+        self.disconnected = disconnected
+        self.interval = interval
+        self.cancelled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.disconnected():
+                self.cancelled = True
+                self.conn.cancel()
+                return
+
+    def __enter__(self):
+        # Bez podpory serveru (Werkzeug) se nehlídá nic
+        if self.disconnected is not None:
+            self._thread = threading.Thread(target=self._run, name='query-watch', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,449 @@
+"""
+Záznam snapshotů /api/health a /api/system-resources do souboru a jejich
+přehrání bez spojení do DB.
+
+    python recording.py record --out incident.omr --interval 5 --duration 600
+    python recording.py info incident.omr
+    python serve.py --replay incident.omr --speed 10
+
+Soubor: hlavička s metadaty a za ní rámce (druh, čas, délka, JSON
+komprimovaný zlibem), které se jen přidávají na konec. Časový index
+(soubor.idx, záznamy pevné délky) se zapisuje až po rámci, takže po pádu
+zůstane nanejvýš neúplný poslední rámec - čtení ho přeskočí a chybějící
+záznamy indexu doplní průchodem rámců.
+"""
+import argparse
+import itertools
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime
+
+import encoding
+from settings import Config
+from services import fetch_metrics, fetch_system_resources, section_keys
+
+MAGIC = b'OMRC'
+VERSION = 1
+KIND_METRICS = 1
+KIND_RESOURCES = 2
+KINDS = {'metrics': KIND_METRICS, 'resources': KIND_RESOURCES}
+
+# Hlavička: magic, verze, délka metadat (JSON)
+_HEADER = struct.Struct('<4sBI')
+# Rámec: druh, čas (epoch s), délka komprimovaných dat
+_FRAME = struct.Struct('<BdI')
+# Záznam indexu: druh, čas, offset rámce
+_INDEX = struct.Struct('<BdQ')
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+def _is_table(value):
+    # Tabulkové sekce se zapisují sloupcově (columnar=True) - názvy sloupců jen jednou
+    return isinstance(value, dict) and len(value) == 2 and 'columns' in value and 'rows' in value
+
+
+class SnapshotWriter:
+    """Zápis nového záznamu (existující soubor se nepřepisuje)"""
+
+    def __init__(self, path, meta=None, level=6):
+        self.path = path
+        self.level = level
+        self._lock = threading.Lock()
+        self._file = open(path, 'xb')
+        self._index = open(path + '.idx', 'wb')
+        header = encoding.dumps(dict(meta or {}, created=_iso(time.time()))).encode()
+        self._file.write(_HEADER.pack(MAGIC, VERSION, len(header)) + header)
+        self._file.flush()
+        self.frames = 0
+        self.raw_bytes = 0
+        self.size = self._file.tell()
+
+    def append(self, kind, ts, obj):
+        raw = encoding.dumps(obj).encode()
+        # Komprese mimo zámek - zápis rámce a indexu je pak jen pár syscallů
+        data = zlib.compress(raw, self.level)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(_FRAME.pack(kind, ts, len(data)) + data)
+            self._file.flush()
+            self._index.write(_INDEX.pack(kind, ts, offset))
+            self._index.flush()
+            self.frames += 1
+            self.raw_bytes += len(raw)
+            self.size = offset + _FRAME.size + len(data)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._index.close()
+
+    def stats(self):
+        return {
+            'file': self.path,
+            'frames': self.frames,
+            'size_bytes': self.size,
+            'raw_bytes': self.raw_bytes,
+            'compression_ratio': round(self.raw_bytes / self.size, 2) if self.size else None,
+        }
+
+
+class SnapshotReader:
+    """Náhodný přístup k rámcům záznamu podle času (bisect nad indexem v paměti)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'rb')
+        try:
+            magic, version, length = _HEADER.unpack(self._file.read(_HEADER.size))
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError(f"Not a snapshot recording (version {VERSION}): {path}")
+        self.meta = encoding.loads(self._file.read(length))
+        self._start = _HEADER.size + length
+        self._times = {kind: [] for kind in KINDS.values()}
+        self._offsets = {kind: [] for kind in KINDS.values()}
+        self.size = self._load_index()
+
+    def _read_at(self, offset, size):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _frame_end(self, offset, file_size):
+        """Konec úplného rámce na offsetu, nebo None (neúplný konec po pádu)"""
+        header = self._read_at(offset, _FRAME.size)
+        if len(header) < _FRAME.size:
+            return None
+        end = offset + _FRAME.size + _FRAME.unpack(header)[2]
+        return end if end <= file_size else None
+
+    def _load_index(self):
+        file_size = os.fstat(self._file.fileno()).st_size
+        try:
+            with open(self.path + '.idx', 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        entries = list(_INDEX.iter_unpack(data[:len(data) - len(data) % _INDEX.size]))
+        # Index se píše až po rámci - kontrola stačí od konce
+        end = self._start
+        while entries:
+            frame_end = self._frame_end(entries[-1][2], file_size)
+            if frame_end is not None:
+                end = frame_end
+                break
+            entries.pop()
+        # Rámce bez záznamu v indexu (pád mezi zápisy, chybějící .idx)
+        while True:
+            frame_end = self._frame_end(end, file_size)
+            if frame_end is None:
+                break
+            kind, ts, _ = _FRAME.unpack(self._read_at(end, _FRAME.size))
+            entries.append((kind, ts, end))
+            end = frame_end
+        for kind, ts, offset in entries:
+            if kind in self._times:
+                self._times[kind].append(ts)
+                self._offsets[kind].append(offset)
+        return end
+
+    @property
+    def first_ts(self):
+        return min((times[0] for times in self._times.values() if times), default=None)
+
+    @property
+    def last_ts(self):
+        return max((times[-1] for times in self._times.values() if times), default=None)
+
+    def count(self, kind=None):
+        if kind is None:
+            return sum(len(times) for times in self._times.values())
+        return len(self._times[kind])
+
+    def find(self, kind, ts):
+        """(čas, offset) posledního rámce druhu kind s časem <= ts (před začátkem první), nebo None"""
+        times = self._times[kind]
+        if not times:
+            return None
+        i = max(0, bisect_right(times, ts) - 1)
+        return times[i], self._offsets[kind][i]
+
+    def read(self, offset):
+        length = _FRAME.unpack(self._read_at(offset, _FRAME.size))[2]
+        return encoding.loads(zlib.decompress(self._read_at(offset + _FRAME.size, length)))
+
+    def frames(self, kind):
+        """Všechny rámce druhu kind jako (čas, data) v pořadí záznamu"""
+        for ts, offset in zip(self._times[kind], self._offsets[kind]):
+            yield ts, self.read(offset)
+
+    def info(self):
+        return {
+            'file': self.path,
+            'meta': self.meta,
+            'size_bytes': self.size,
+            'frames': {name: self.count(kind) for name, kind in KINDS.items()},
+            'first': _iso(self.first_ts),
+            'last': _iso(self.last_ts),
+            'duration_sec': round(self.last_ts - self.first_ts, 3) if self.count() else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Recorder:
+    """Vlákno, které v pevném intervalu zapisuje plné snapshoty jedné cílové DB"""
+
+    def __init__(self, writer, target, interval, duration=None):
+        self.writer = writer
+        self.target = target
+        self.interval = interval
+        self.duration = duration
+        self.started = None
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_once(self):
+        ts = time.time()
+        # Stejná cesta jako požadavky dashboardu - sekce v cache se z DB znovu nečtou
+        metrics = fetch_metrics(columnar=True, target=self.target)
+        resources = fetch_system_resources(self.target)
+        if metrics is None and resources is None:
+            raise RuntimeError('No data from Oracle')
+        if metrics is not None:
+            self.writer.append(KIND_METRICS, ts, metrics)
+        if resources is not None:
+            self.writer.append(KIND_RESOURCES, ts, resources)
+
+    def _run(self):
+        next_run = time.monotonic()
+        deadline = next_run + self.duration if self.duration else None
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.record_once()
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Warning: Recording failed: {e}")
+                next_run += self.interval
+                if deadline is not None and next_run > deadline:
+                    break
+                self._stop.wait(max(0.0, next_run - time.monotonic()))
+        finally:
+            self.writer.close()
+
+    def start(self):
+        if self._thread is None:
+            self.started = time.time()
+            self._thread = threading.Thread(target=self._run, name='recorder', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self):
+        return dict(self.writer.stats(), running=self.running, target=self.target.id,
+                    interval_sec=self.interval, duration_sec=self.duration, started=_iso(self.started),
+                    errors=self.errors)
+
+
+class Player:
+    """
+    Přehrávání záznamu místo DB. Čas záznamu běží od prvního rámce
+    speed-krát rychleji než skutečný; na konci zůstane poslední stav, nebo se
+    s loop začne znovu. Poslední dekódovaný rámec každého druhu se drží v
+    paměti, takže souběžné požadavky ho nečtou ani nedekódují znovu.
+    """
+
+    def __init__(self, reader, speed=1.0, loop=False):
+        self.reader = reader
+        self.speed = speed
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._origin = reader.first_ts
+        self._started = time.monotonic()
+        # druh -> (offset, snapshot, {klíč: seznam slovníků}); nový rámec dekóduje jen jedno vlákno
+        self._decoded = {}
+        self._decode_lock = threading.Lock()
+
+    def position(self):
+        with self._lock:
+            ts = self._origin + (time.monotonic() - self._started) * self.speed
+        first, last = self.reader.first_ts, self.reader.last_ts
+        if ts > last:
+            ts = first + (ts - first) % (last - first) if self.loop and last > first else last
+        return max(first, ts)
+
+    def seek(self, ts=None, speed=None):
+        """Přesun na čas záznamu ts (epoch s) a/nebo změna rychlosti"""
+        position = self.position() if ts is None else min(max(ts, self.reader.first_ts), self.reader.last_ts)
+        with self._lock:
+            if speed is not None:
+                self.speed = speed
+            self._origin = position
+            self._started = time.monotonic()
+
+    def _frame(self, kind):
+        found = self.reader.find(kind, self.position())
+        if found is None:
+            return None, None
+        ts, offset = found
+        decoded = self._decoded.get(kind)
+        if decoded is None or decoded[0] != offset:
+            with self._decode_lock:
+                decoded = self._decoded.get(kind)
+                if decoded is None or decoded[0] != offset:
+                    decoded = self._decoded[kind] = (offset, self.reader.read(offset), {})
+        return ts, decoded
+
+    def _info(self, ts):
+        return {'recorded_at': _iso(ts), 'speed': self.speed, 'file': self.reader.path}
+
+    def metrics(self, sections=None, columnar=False):
+        """Snapshot /api/health z času přehrávání (stejný tvar jako fetch_metrics)"""
+        ts, decoded = self._frame(KIND_METRICS)
+        if decoded is None:
+            return None
+        _, snapshot, records = decoded
+        if sections is None:
+            keys = [key for key in snapshot if not key.startswith('_')]
+        else:
+            keys = ['timestamp'] + [key for name in sections for key in section_keys(name) if key in snapshot]
+        result = {}
+        for key in keys:
+            value = snapshot[key]
+            if not columnar and _is_table(value):
+                if key not in records:
+                    columns = value['columns']
+                    records[key] = [dict(zip(columns, row)) for row in value['rows']]
+                value = records[key]
+            result[key] = value
+        for meta in ('_sections', '_errors'):
+            if meta in snapshot:
+                result[meta] = {name: info for name, info in snapshot[meta].items()
+                                if sections is None or name in sections}
+        result['_replay'] = self._info(ts)
+        return result
+
+    def resources(self):
+        """Snapshot /api/system-resources z času přehrávání"""
+        ts, decoded = self._frame(KIND_RESOURCES)
+        if decoded is None:
+            return None
+        return dict(decoded[1], _replay=self._info(ts))
+
+    def status(self):
+        return dict(self.reader.info(), position=_iso(self.position()), speed=self.speed, loop=self.loop)
+
+
+def open_replay(path, speed=1.0, loop=False):
+    reader = SnapshotReader(path)
+    if not reader.count():
+        reader.close()
+        raise ValueError(f"Recording has no snapshots: {path}")
+    return Player(reader, speed, loop)
+
+
+_recorder = None
+_lock = threading.Lock()
+
+
+def start_recording(target, interval=None, duration=None, path=None):
+    """Spustí záznam v procesu serveru (sdílí cache s dashboardy); vyhodí RuntimeError, pokud už běží"""
+    global _recorder
+    interval = interval or Config.RECORDING_INTERVAL
+    with _lock:
+        if _recorder is not None and _recorder.running:
+            raise RuntimeError('A recording is already running')
+        header = {'target': target.id, 'database': target.dsn, 'interval_sec': interval}
+        if path is None:
+            os.makedirs(Config.RECORDING_DIR, exist_ok=True)
+            base = os.path.join(Config.RECORDING_DIR, f"{target.id}-{datetime.now():%Y%m%d-%H%M%S}")
+            # Nový záznam ve stejné sekundě (stop + start) dostane příponu -1, -2, ...
+            for attempt in itertools.count():
+                try:
+                    writer = SnapshotWriter(f"{base}-{attempt}.omr" if attempt else f"{base}.omr", header,
+                                            Config.RECORDING_COMPRESS_LEVEL)
+                    break
+                except FileExistsError:
+                    continue
+        else:
+            writer = SnapshotWriter(path, header, Config.RECORDING_COMPRESS_LEVEL)
+        _recorder = Recorder(writer, target, interval, duration)
+        _recorder.start()
+        return _recorder
+
+
+def stop_recording():
+    if _recorder is not None:
+        _recorder.stop()
+    return _recorder
+
+
+def get_recorder():
+    return _recorder
+
+
+def _record(args):
+    from db import drain_pools
+    from targets import registry
+    target = registry.get(args.target)
+    if target is None:
+        raise SystemExit(f"Unknown target: {args.target} (targets: {', '.join(registry.ids())})")
+    writer = SnapshotWriter(args.out, {'target': target.id, 'database': target.dsn, 'interval_sec': args.interval},
+                            args.level)
+    recorder = Recorder(writer, target, args.interval, args.duration)
+    print(f"Recording {target.id} ({target.dsn}) every {args.interval} s to {args.out} - Ctrl+C to stop")
+    recorder.start()
+    try:
+        while recorder.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    recorder.stop()
+    drain_pools(Config.SERVER_SHUTDOWN_TIMEOUT)
+    print(recorder.status())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record or inspect dashboard snapshots')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help='record snapshots of a database')
+    record.add_argument('--out', required=True)
+    record.add_argument('--target', default=None, help='target id (default database if omitted)')
+    record.add_argument('--interval', type=float, default=Config.RECORDING_INTERVAL)
+    record.add_argument('--duration', type=float, default=None, help='seconds (until Ctrl+C if omitted)')
+    record.add_argument('--level', type=int, default=Config.RECORDING_COMPRESS_LEVEL, help='zlib level')
+    info = commands.add_parser('info', help='print recording summary')
+    info.add_argument('file')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        _record(args)
+    else:
+        reader = SnapshotReader(args.file)
+        print(encoding.dumps(reader.info()))
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,690 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from datetime import datetime
-from services import fetch_metrics, fetch_system_resources, run_custom_query
-from config import Config
+import functools
+import math
+import time
+from services import (fetch_metrics, fetch_system_resources, fetch_session_diff, run_custom_query,
+                      check_custom_query, stream_custom_query, fetch_query_page, query_cursors,
+                      query_results, query_limiter, acquire_query_slot,
+                      fetch_statement_stats, fetch_top_sql, fetch_sql_text, fetch_table_stats, fetch_capacity,
+                      fetch_capacity_detail, target_state, next_poll_ms, parse_sections,
+                      METRIC_SECTIONS)
+from settings import Config
+from db import get_pool_stats
+from sampler import get_history_store, get_sampler
+from scheduler import get_scheduler
+from ash import get_ash, DIMENSIONS
+from alerts import get_alert_engine, SEVERITY_RANK
+from stream import broadcaster, event_stream, StreamFull
+from targets import registry
+from topsql import ORDER_BY
+from tablestats import SORT_KEYS
+from recording import start_recording, stop_recording, get_recorder
+from warmup import get_warmup
+import services
+import telemetry
 
 api = Blueprint('api', __name__)
 
-@api.route('/api/health', methods=['GET'])
-def get_health():
-    """Vrátí aktuální zdraví DB a metriky"""
+def _sql_limit_arg():
     sql_limit = request.args.get('sql_limit', default=50, type=int)
     # Omezit na rozumné hodnoty (999999 = ALL)
     if sql_limit == 999999:
         sql_limit = 999999  # Použije se pro ALL
     else:
         sql_limit = max(10, min(sql_limit, 500))
-    
-    metrics = fetch_metrics(sql_limit=sql_limit)
+    return sql_limit
+
+
+def _with_target(view):
+    """Předá view cílovou DB z /api/targets/<target_id>/... (bez prefixu výchozí DB)"""
+    @functools.wraps(view)
+    def wrapper(*args, target_id=None, **kwargs):
+        target = registry.get(target_id)
+        if target is None:
+            return jsonify({'error': f'Unknown target: {target_id}', 'targets': registry.ids()}), 404
+        return view(*args, target=target, **kwargs)
+    return wrapper
+
+
+def _columnar_arg():
+    # ?format=columnar - tabulkové sekce jako {"columns": [...], "rows": [[...]]}
+    return request.args.get('format') == 'columnar'
+
+
+def _timings_arg():
+    # ?timings=1 - časy sekcí, dotazů a čekání na spojení v bloku _timings
+    return request.args.get('timings') in ('1', 'true')
+
+
+def _with_poll_hint(payload, target):
+    # Doporučený odstup dalšího dotazu podle zátěže DB - klienti se jím řídí místo pevného intervalu
+    hint = next_poll_ms(target)
+    return dict(payload, next_poll_ms=hint) if hint is not None else payload
+
+
+def _metrics_response(sections, target):
+    metrics = fetch_metrics(sql_limit=_sql_limit_arg(), sections=sections, columnar=_columnar_arg(),
+                            target=target, timings=_timings_arg())
     if metrics is None:
         return jsonify({
             'error': 'Failed to fetch metrics from Oracle',
             'timestamp': datetime.now().isoformat()
         }), 500
-    return jsonify(metrics)
+    return jsonify(_with_poll_hint(metrics, target))
+
+
+@api.route('/api/health', methods=['GET'])
+@api.route('/api/targets/<target_id>/health', methods=['GET'])
+@_with_target
+def get_health(target):
+    """Vrátí aktuální zdraví DB a metriky (volitelně jen ?sections=a,b)"""
+    try:
+        sections = parse_sections(request.args.get('sections'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'sections': list(METRIC_SECTIONS)}), 400
+    return _metrics_response(sections, target)
+
+
+@api.route('/api/health/<section>', methods=['GET'])
+@api.route('/api/targets/<target_id>/health/<section>', methods=['GET'])
+@_with_target
+def get_health_section(section, target):
+    """Vrátí jednu sekci metrik (např. /api/health/tablespaces)"""
+    if section not in METRIC_SECTIONS:
+        return jsonify({'error': f'Unknown section: {section}', 'sections': list(METRIC_SECTIONS)}), 404
+    return _metrics_response([section], target)
+
+
+@api.route('/api/sessions/diff', methods=['GET'])
+@api.route('/api/targets/<target_id>/sessions/diff', methods=['GET'])
+@_with_target
+def get_session_diff(target):
+    """Inkrementální změny sessions od verze klienta (?since=<version>)"""
+    result = fetch_session_diff(since=request.args.get('since', type=int), target=target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch sessions from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    if 'error' in result:
+        return jsonify(result), 500
+    return jsonify(result)
 
 
 @api.route('/api/system-resources', methods=['GET'])
-def get_system_resources():
+@api.route('/api/targets/<target_id>/system-resources', methods=['GET'])
+@_with_target
+def get_system_resources(target):
     """Vrátí systémové zdroje (CPU, Memory, I/O)"""
-    resources = fetch_system_resources()
+    resources = fetch_system_resources(target, timings=_timings_arg())
     if resources is None:
         return jsonify({
             'error': 'Failed to fetch system resources from Oracle',
             'timestamp': datetime.now().isoformat()
         }), 500
-    return jsonify(resources)
+    return jsonify(_with_poll_hint(resources, target))
+
+
+@api.route('/api/stream', methods=['GET'])
+def stream():
+    """Server-Sent Events: snapshot jednou za interval (?sections=a,b&resources=1)"""
+    try:
+        sections = parse_sections(request.args.get('sections'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'sections': list(METRIC_SECTIONS)}), 400
+    resources = request.args.get('resources', default='1') != '0'
+    if not sections and not resources:
+        return jsonify({'error': 'Nothing to stream - select sections or resources'}), 400
+
+    try:
+        subscriber = broadcaster.subscribe(sections=sections, resources=resources, sql_limit=_sql_limit_arg())
+    except StreamFull as e:
+        # Klient přejde na polling (EventSource se po 503 už nepřipojuje)
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(max(1, math.ceil(Config.STREAM_HEARTBEAT)))}
+    return Response(stream_with_context(event_stream(broadcaster, subscriber, Config.STREAM_HEARTBEAT)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@api.route('/api/stream/stats', methods=['GET'])
+def stream_stats():
+    """Počet odběratelů streamu a zahozených zpráv"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'stream': broadcaster.stats()
+    })
 
 
 @api.route('/api/ping', methods=['GET'])
 def ping():
-    """Zdravotní check API"""
+    """Zdravotní check API (bez dotazu do DB - odpovídá i během warmupu)"""
+    warmup = get_warmup()
     return jsonify({
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
-        'database': f"{Config.ORACLE_USER}@{Config.ORACLE_HOST}:{Config.ORACLE_PORT}/{Config.ORACLE_SERVICE}"
+        'database': registry.default.dsn,
+        'targets': len(registry),
+        'warmup': warmup.state if warmup is not None else 'off'
     })
 
 
-@api.route('/api/execute-query', methods=['POST'])
-def execute_query():
-    """Vykoná vlastní SQL dotaz (pouze SELECT)"""
-    data = request.get_json()
-    query = data.get('query', '').strip()
-    
-    if not query:
-        return jsonify({'error': 'Query is required'}), 400
-    
-    result = run_custom_query(query)
-    
+@api.route('/api/warmup', methods=['GET'])
+def warmup_status():
+    """Průběh warmupu po startu (časy kroků)"""
+    warmup = get_warmup()
+    if warmup is None:
+        return jsonify({'state': 'off'})
+    return jsonify(warmup.status())
+
+
+@api.route('/api/targets', methods=['GET'])
+def list_targets():
+    """Seznam monitorovaných DB a stav jejich posledního sběru"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'default': registry.default.id,
+        'targets': get_scheduler().fleet()['targets']
+    })
+
+
+@api.route('/api/targets/<target_id>', methods=['GET'])
+@_with_target
+def get_target(target):
+    """Stav posledního sběru jedné DB"""
+    return jsonify(get_scheduler().status(target.id))
+
+
+@api.route('/api/fleet', methods=['GET'])
+def get_fleet():
+    """Souhrn všech DB (stav, sessions, CPU, zaplnění tablespaces, alerty)"""
+    scheduler = get_scheduler()
+    if not scheduler.running:
+        # Bez scheduleru na pozadí se cíle sesbírají souběžně teď
+        scheduler.run_once(timeout=Config.METRICS_SECTION_TIMEOUT)
+    return jsonify(dict(scheduler.fleet(), timestamp=datetime.now().isoformat()))
+
+
+@api.route('/api/pool', methods=['GET'])
+@api.route('/api/targets/<target_id>/pool', methods=['GET'])
+@_with_target
+def pool_stats(target):
+    """Statistiky connection poolu"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'pool': get_pool_stats(target)
+    })
+
+
+@api.route('/api/cache', methods=['GET'])
+@api.route('/api/targets/<target_id>/cache', methods=['GET'])
+@_with_target
+def cache_stats(target):
+    """Statistiky sdílené cache metrik"""
+    cache = target_state(target).cache
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'cache': cache.stats(),
+        'ttls': cache.ttls
+    })
+
+
+@api.route('/api/statements', methods=['GET'])
+@api.route('/api/targets/<target_id>/statements', methods=['GET'])
+@_with_target
+def statement_stats(target):
+    """Parse vs. execute počty dotazů kolektorů (klient + V$SQLAREA)"""
+    result = fetch_statement_stats(target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch statement statistics from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    return jsonify(result)
+
+
+@api.route('/api/top-sql', methods=['GET'])
+@api.route('/api/targets/<target_id>/top-sql', methods=['GET'])
+@_with_target
+def top_sql(target):
+    """Žebříček SQL za nedávné okno (?order=elapsed|cpu|buffer_gets|...&window=300&limit=20)"""
+    order = request.args.get('order', 'elapsed')
+    if order not in ORDER_BY:
+        return jsonify({'error': f'Unknown order: {order}', 'orders': list(ORDER_BY)}), 400
+    window = request.args.get('window', default='300')
+    # window=all - kumulativně od načtení příkazu do shared poolu
+    if window == 'all':
+        window = None
+    else:
+        try:
+            window = max(1.0, min(float(window), Config.TOPSQL_MAX_WINDOW))
+        except ValueError:
+            return jsonify({'error': f'Invalid window: {window}'}), 400
+    limit = max(1, min(request.args.get('limit', default=20, type=int), 500))
+    result = fetch_top_sql(order=order, window=window, limit=limit, target=target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch top SQL from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    return jsonify(result)
+
+
+@api.route('/api/top-sql/<sql_id>', methods=['GET'])
+@api.route('/api/targets/<target_id>/top-sql/<sql_id>', methods=['GET'])
+@_with_target
+def top_sql_text(sql_id, target):
+    """Celý text jednoho příkazu (žebříček posílá jen prvních 1000 znaků)"""
+    result = fetch_sql_text(sql_id, target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch SQL text from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    return _query_response(result)
+
+
+@api.route('/api/table-stats', methods=['GET'])
+@api.route('/api/targets/<target_id>/table-stats', methods=['GET'])
+@_with_target
+def table_stats(target):
+    """Statistiky tabulek po stránkách (?sort=num_rows&order=desc&search=&tablespace=&stale=1&offset=0&limit=50)"""
+    sort = request.args.get('sort', 'num_rows')
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f'Unknown sort column: {sort}', 'columns': list(SORT_KEYS)}), 400
+    result = fetch_table_stats(
+        sort=sort,
+        descending=request.args.get('order', 'desc') != 'asc',
+        search=request.args.get('search', '').strip() or None,
+        tablespace=request.args.get('tablespace') or None,
+        stale=request.args.get('stale') in ('1', 'true'),
+        offset=max(0, request.args.get('offset', default=0, type=int)),
+        limit=max(1, min(request.args.get('limit', default=50, type=int), 1000)),
+        target=target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch table statistics from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    return jsonify(result)
+
+
+@api.route('/api/capacity', methods=['GET'])
+@api.route('/api/targets/<target_id>/capacity', methods=['GET'])
+@_with_target
+def capacity(target):
+    """Prognóza růstu tablespaců - růst za den a dny do zaplnění"""
+    result = fetch_capacity(target=target)
+    if result is None:
+        return jsonify({
+            'error': 'Failed to fetch tablespace usage from Oracle',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+    return jsonify(result)
+
+
+@api.route('/api/capacity/<name>', methods=['GET'])
+@api.route('/api/targets/<target_id>/capacity/<name>', methods=['GET'])
+@_with_target
+def capacity_detail(target, name):
+    """Vzorky a předpověď jednoho tablespace (?days=30&horizon=30)"""
+    result = fetch_capacity_detail(
+        name,
+        days=max(1, min(request.args.get('days', default=30, type=int), 400)),
+        horizon_days=max(1, min(request.args.get('horizon', default=30, type=int), 365)),
+        target=target)
+    if result is None:
+        return jsonify({'error': f'No capacity samples for tablespace: {name}'}), 404
+    return jsonify(result)
+
+
+def _alert_filter():
+    """(id cíle, závažnost) z ?target=...&severity=..., nebo odpověď s chybou"""
+    target_id = request.args.get('target')
+    if target_id is not None and registry.get(target_id) is None:
+        return None, None, (jsonify({'error': f'Unknown target: {target_id}', 'targets': registry.ids()}), 404)
+    severity = request.args.get('severity')
+    if severity is not None and severity not in SEVERITY_RANK:
+        return None, None, (jsonify({'error': f'Unknown severity: {severity}', 'severities': list(SEVERITY_RANK)}), 400)
+    return target_id, severity, None
+
+
+@api.route('/api/alerts/active', methods=['GET'])
+def alerts_active():
+    """Aktivní alarmy pravidel nad sběry (?target=...&severity=warning|critical)"""
+    target_id, severity, error = _alert_filter()
+    if error:
+        return error
+    engine = get_alert_engine()
+    alerts = engine.active(target_id, severity)
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'count': len(alerts),
+        'critical': sum(1 for alert in alerts if alert['severity'] == 'critical'),
+        'alerts': alerts,
+        'engine': engine.stats(),
+    })
+
+
+@api.route('/api/alerts/history', methods=['GET'])
+def alerts_history():
+    """Vyřešené alarmy, nejnovější první (?target=...&limit=100)"""
+    target_id, _, error = _alert_filter()
+    if error:
+        return error
+    limit = max(1, min(request.args.get('limit', default=100, type=int), 1000))
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'alerts': get_alert_engine().history(target_id, limit),
+    })
+
+
+@api.route('/api/alerts/rules', methods=['GET'])
+def alerts_rules():
+    """Načtená pravidla alarmů"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'rules': [rule.to_dict() for rule in get_alert_engine().rules],
+    })
+
+
+@api.route('/api/recording', methods=['GET'])
+def recording_status():
+    """Stav posledního záznamu snapshotů"""
+    recorder = get_recorder()
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'recording': recorder.status() if recorder is not None else None,
+    })
+
+
+@api.route('/api/recording', methods=['POST'])
+def recording_start():
+    """Spustí záznam snapshotů ({"target": ..., "interval": 5, "duration": 600})"""
+    if services.replay_player is not None:
+        return jsonify({'error': 'Cannot record while replaying a recording'}), 409
+    data = request.get_json(silent=True) or {}
+    target = registry.get(data.get('target'))
+    if target is None:
+        return jsonify({'error': f"Unknown target: {data.get('target')}", 'targets': registry.ids()}), 404
+    try:
+        interval = float(data['interval']) if data.get('interval') else None
+        duration = float(data['duration']) if data.get('duration') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'interval and duration must be numbers (seconds)'}), 400
+    if any(value is not None and not (math.isfinite(value) and value > 0) for value in (interval, duration)):
+        return jsonify({'error': 'interval and duration must be positive'}), 400
+    try:
+        recorder = start_recording(target, interval, duration)
+    except RuntimeError as e:
+        return jsonify({'error': str(e), 'recording': get_recorder().status()}), 409
+    except OSError as e:
+        return jsonify({'error': f'Cannot create recording file: {e}'}), 500
+    return jsonify({'timestamp': datetime.now().isoformat(), 'recording': recorder.status()}), 201
+
+
+@api.route('/api/recording', methods=['DELETE'])
+def recording_stop():
+    """Ukončí běžící záznam"""
+    recorder = stop_recording()
+    if recorder is None:
+        return jsonify({'error': 'No recording'}), 404
+    return jsonify({'timestamp': datetime.now().isoformat(), 'recording': recorder.status()})
+
+
+def _replay_time(value):
+    """Čas v záznamu z epoch sekund nebo ISO řetězce"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+@api.route('/api/replay', methods=['GET', 'POST'])
+def replay():
+    """Stav přehrávání záznamu; POST {"at": ..., "speed": ...} přesune pozici nebo změní rychlost"""
+    player = services.replay_player
+    if player is None:
+        return jsonify({'error': 'Replay mode is off (start with serve.py --replay FILE)'}), 404
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            at = _replay_time(data['at']) if data.get('at') is not None else None
+            speed = float(data['speed']) if data.get('speed') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'at must be epoch seconds or ISO time, speed a number'}), 400
+        if at is not None and not math.isfinite(at):
+            return jsonify({'error': 'at must be a finite time'}), 400
+        if speed is not None and not (math.isfinite(speed) and speed > 0):
+            return jsonify({'error': 'speed must be a positive finite number'}), 400
+        player.seek(at, speed)
+    return jsonify(dict(player.status(), timestamp=datetime.now().isoformat()))
+
+
+def _ash_args():
+    """(rozměr, okno v s) z ?by=...&minutes=..., nebo odpověď s chybou"""
+    by = request.args.get('by', 'event')
+    if by not in DIMENSIONS:
+        return None, (jsonify({'error': f'Unknown dimension: {by}', 'dimensions': list(DIMENSIONS)}), 400)
+    minutes = request.args.get('minutes', default=5, type=float)
+    window = max(1.0, min(minutes * 60, Config.ASH_CAPACITY * Config.ASH_INTERVAL))
+    return (by, window), None
+
+
+@api.route('/api/ash', methods=['GET'])
+def ash_status():
+    """Stav ASH sampleru a kruhového bufferu"""
+    return jsonify(get_ash().status())
+
+
+@api.route('/api/ash/top', methods=['GET'])
+def ash_top():
+    """Nejčastější eventy/SQL/uživatelé/sessions v ASH vzorcích (?by=event&minutes=5&limit=10)"""
+    args, error = _ash_args()
+    if error:
+        return error
+    by, window = args
+    limit = max(1, min(request.args.get('limit', default=10, type=int), 100))
+    sampler = get_ash()
+    now = time.time()
+    rows, total = sampler.buffer.top(by, now - window, limit)
+    covered = sampler.buffer.covered(now - window, now)
+    # Average active sessions = vzorky / počet snímků v okně
+    snapshots = covered / sampler.interval if covered else 0
+    return jsonify({
+        'by': by,
+        'window_sec': window,
+        'covered_sec': round(covered, 1),
+        'samples': total,
+        'aas': round(total / snapshots, 2) if snapshots else None,
+        'top': [{
+            'value': value,
+            'samples': count,
+            'on_cpu': on_cpu,
+            'pct': round(count / total * 100, 2) if total else 0.0,
+            'aas': round(count / snapshots, 2) if snapshots else None,
+        } for value, count, on_cpu in rows],
+    })
+
+
+@api.route('/api/ash/timeline', methods=['GET'])
+def ash_timeline():
+    """Průměr aktivních sessions po intervalech pro graf (?by=wait_class&minutes=5&bucket=10&limit=5)"""
+    args, error = _ash_args()
+    if error:
+        return error
+    by, window = args
+    bucket = max(Config.ASH_INTERVAL, request.args.get('bucket', default=10, type=float))
+    limit = max(1, min(request.args.get('limit', default=5, type=int), 20))
+    sampler = get_ash()
+    labels, series = sampler.buffer.timeline(by, time.time() - window, bucket, limit)
+    snapshots = bucket / sampler.interval
+    return jsonify({
+        'by': by,
+        'window_sec': window,
+        'bucket_sec': bucket,
+        'labels': labels,
+        'series': [{'ts': point['ts'], 'aas': [round(count / snapshots, 2) for count in point['counts']]}
+                   for point in series],
+    })
+
+
+@api.route('/api/metrics', methods=['GET'])
+def self_metrics():
+    """Vlastní metriky backendu (latence dotazů a route, chyby, pool) pro Prometheus"""
+    return Response(telemetry.registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _time_arg(name, default):
+    """Čas z query stringu: epoch sekundy, nebo záporný offset od teď (-3600 = před hodinou)"""
+    value = request.args.get(name, default=default, type=float)
+    return time.time() + value if value <= 0 else value
+
+
+@api.route('/api/history', methods=['GET'])
+def get_history():
+    """Historie vzorkovaných metrik (?metrics=a,b&from=-3600&to=0)"""
+    store = get_history_store()
+    names = [n for n in request.args.get('metrics', '').split(',') if n] or store.metric_names()
+    start = _time_arg('from', -3600)
+    end = _time_arg('to', 0)
+    tier = request.args.get('tier', type=int)
+    if tier is not None and not 0 <= tier < len(store.tiers):
+        return jsonify({'error': f'tier must be between 0 and {len(store.tiers) - 1}'}), 400
+    max_points = max(10, min(request.args.get('max_points', default=500, type=int), 5000))
+
+    tier, series = store.query(names, start, end, tier=tier, max_points=max_points)
+    return jsonify({
+        'from': start,
+        'to': end,
+        'tier': tier,
+        'bucket_sec': store.tiers[tier][0],
+        'columns': ['ts', 'avg', 'min', 'max'],
+        'series': series
+    })
+
+
+@api.route('/api/history/metrics', methods=['GET'])
+def get_history_metrics():
+    """Seznam metrik v historii a stav sampleru"""
+    store = get_history_store()
+    return jsonify({
+        'metrics': store.metric_names(),
+        'tiers': [{'bucket_sec': bucket, 'retention_sec': retention} for bucket, retention in store.tiers],
+        'sampler': get_sampler().status()
+    })
+
+
+def _query_response(result):
     if 'error' in result:
         status = result.get('status', 500)
         # Remove status from result before sending
         if 'status' in result:
             del result['status']
+        if 'retry_after' in result:
+            return jsonify(result), status, {'Retry-After': str(max(1, math.ceil(result['retry_after'])))}
         return jsonify(result), status
-        
     return jsonify(result)
 
+
+def _query_user():
+    """Uživatel pro limit souběžných dotazů - od reverzní proxy, jinak IP klienta"""
+    return request.headers.get(Config.QUERY_USER_HEADER) or request.remote_addr
+
+
+def _client_disconnected():
+    # Jen waitress s channel_request_lookahead (serve.py) umí hlásit odpojení během požadavku
+    return request.environ.get('waitress.client_disconnected')
+
+
+def _page_size_arg(data):
+    """page_size z těla požadavku (None = bez stránkování); ValueError, pokud není číslo"""
+    page_size = data.get('page_size')
+    if page_size is None:
+        return None
+    try:
+        return max(1, min(int(page_size), Config.QUERY_MAX_ROWS))
+    except (TypeError, ValueError):
+        raise ValueError('page_size must be a number')
+
+
+@api.route('/api/execute-query', methods=['POST'])
+@api.route('/api/targets/<target_id>/execute-query', methods=['POST'])
+@_with_target
+def execute_query(target):
+    """Vykoná vlastní SQL dotaz (pouze SELECT), volitelně po stránkách (page_size)"""
+    data = request.get_json()
+    query = data.get('query', '').strip()
+    
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    try:
+        page_size = _page_size_arg(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return _query_response(run_custom_query(query, page_size=page_size,
+                                            columnar=data.get('format') == 'columnar', target=target,
+                                            user=_query_user(), disconnected=_client_disconnected(),
+                                            use_cache=data.get('cache', True) is not False))
+
+
+@api.route('/api/execute-query/next', methods=['POST'])
+def execute_query_next():
+    """Další stránka stránkovaného dotazu ({"cursor": ..., "page_size": ...})"""
+    data = request.get_json()
+    token = data.get('cursor')
+    if not token:
+        return jsonify({'error': 'Cursor is required'}), 400
+    try:
+        page_size = _page_size_arg(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _query_response(fetch_query_page(token, page_size or Config.QUERY_ARRAYSIZE,
+                                            columnar=data.get('format') == 'columnar',
+                                            user=_query_user(), disconnected=_client_disconnected()))
+
+
+@api.route('/api/execute-query/<token>', methods=['DELETE'])
+def execute_query_close(token):
+    """Zavře rozpracovaný stránkovaný dotaz a vrátí spojení do poolu"""
+    if not query_cursors.close(token):
+        return jsonify({'error': 'Cursor not found or expired'}), 404
+    return jsonify({'success': True})
+
+
+@api.route('/api/execute-query/stream', methods=['POST'])
+@api.route('/api/targets/<target_id>/execute-query/stream', methods=['POST'])
+@_with_target
+def execute_query_stream(target):
+    """Vykoná vlastní SQL dotaz a streamuje výsledek jako NDJSON"""
+    data = request.get_json()
+    query = data.get('query', '').strip()
+
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    user = _query_user()
+    error = check_custom_query(query) or acquire_query_slot(user)
+    if error:
+        return _query_response(error)
+    response = Response(stream_custom_query(query, target, _client_disconnected()),
+                        mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+    # Místo v limitu drží dotaz až do konce streamu
+    response.call_on_close(lambda: query_limiter.release(user))
+    return response
+
+
+@api.route('/api/execute-query/stats', methods=['GET'])
+def execute_query_stats():
+    """Cache výsledků vlastních dotazů a fronta limitu souběhu"""
+    return jsonify({
+        'timestamp': datetime.now().isoformat(),
+        'cache': query_results.stats(),
+        'limiter': query_limiter.stats(),
+        'open_cursors': len(query_cursors),
+    })
+
+
 @api.route('/', methods=['GET'])
 def index():
     """Root endpoint"""
@@ -74,7 +693,37 @@ def index():
         'version': '1.0.0',
         'endpoints': {
             '/api/ping': 'Health check',
-            '/api/health': 'Database metrics',
-            '/api/system-resources': 'System resources (CPU, Memory, I/O)'
+            '/api/health': 'Database metrics (?sections=a,b to select sections, ?format=columnar, ?timings=1); next_poll_ms = suggested delay of the next poll',
+            '/api/health/<section>': 'Single metrics section',
+            '/api/sessions/diff': 'Session list changes since a version (?since=<version>)',
+            '/api/system-resources': 'System resources (CPU, Memory, I/O) (?timings=1) with next_poll_ms',
+            '/api/stream': 'Server-Sent Events push of snapshots (?sections=a,b&resources=1)',
+            '/api/execute-query': 'Run a SELECT (optional page_size for cursor paging, format=columnar)',
+            '/api/execute-query/next': 'Next page of a paged query',
+            '/api/execute-query/stream': 'Run a SELECT and stream rows as NDJSON',
+            '/api/execute-query/stats': 'Custom query result cache and concurrency limiter statistics',
+            '/api/warmup': 'Startup warmup progress and step timings (driver import, pools, statement cache, first snapshot)',
+            '/api/targets': 'Monitored databases, their collection status and adaptive poll interval',
+            '/api/targets/<target_id>/...': 'Per-database health, sessions/diff, system-resources, pool, cache, execute-query',
+            '/api/fleet': 'Summary of all monitored databases',
+            '/api/pool': 'Connection pool statistics',
+            '/api/cache': 'Metrics cache statistics',
+            '/api/statements': 'Parse vs execute counts of collector queries',
+            '/api/metrics': 'Backend self-monitoring metrics in Prometheus text format',
+            '/api/top-sql': 'Top SQL over a recent window (?order=elapsed|cpu|buffer_gets|disk_reads|executions|rows&window=300|all&limit=20)',
+            '/api/top-sql/<sql_id>': 'Full text of one SQL statement',
+            '/api/table-stats': 'Table statistics with server-side sort, filter and paging (?sort=num_rows&order=desc&search=&offset=0&limit=50)',
+            '/api/ash': 'Active session sampler status',
+            '/api/ash/top': 'Top events/wait classes/SQL/users/sessions from 1 s samples (?by=event&minutes=5&limit=10)',
+            '/api/ash/timeline': 'Average active sessions over time (?by=wait_class&minutes=5&bucket=10)',
+            '/api/capacity': 'Tablespace growth per day and days-to-full forecast',
+            '/api/capacity/<name>': 'Samples and forecast for one tablespace (?days=30&horizon=30)',
+            '/api/alerts/active': 'Active threshold/anomaly alerts from collected samples (?target=&severity=)',
+            '/api/alerts/history': 'Resolved alerts, newest first (?target=&limit=100)',
+            '/api/alerts/rules': 'Loaded alert rules',
+            '/api/recording': 'Snapshot recording status (POST to start {"target", "interval", "duration"}, DELETE to stop)',
+            '/api/replay': 'Replay position and speed when serving a recording (POST {"at", "speed"} to seek)',
+            '/api/history': 'Sampled metric history (?metrics=a,b&from=-3600&to=0)',
+            '/api/history/metrics': 'Available history metrics and sampler status'
         }
     })
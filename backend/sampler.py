@@ -0,0 +1,138 @@
+import threading
+import time
+from settings import Config
+from history import HistoryStore
+from services import fetch_metrics, fetch_system_resources, refresh_top_sql, poll_interval
+
+# Sekce /api/health, ze kterých se berou základní čítače do historie
+SAMPLED_SECTIONS = ['sessions']
+
+
+def flatten_resources(resources):
+    """Převede odpověď fetch_system_resources na {'skupina.metrika': číslo}"""
+    values = {}
+    for group in ('cpu', 'memory', 'io', 'load'):
+        for key, value in (resources.get(group) or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[f"{group}.{key}"] = value
+    return values
+
+
+class Sampler:
+    """Vlákno, které v intervalu (pevném, nebo adaptivním podle zátěže) sbírá metriky do historie"""
+
+    def __init__(self, store, interval):
+        self.store = store
+        self.interval = interval
+        self.listeners = []
+        self.last_sample = None
+        self.samples_taken = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener):
+        """listener(sample) se zavolá po každém dokončeném vzorku"""
+        self.listeners.append(listener)
+
+    def next_interval(self):
+        return poll_interval() or self.interval
+
+    def sample_once(self):
+        ts = time.time()
+        resources = fetch_system_resources()
+        metrics = fetch_metrics(sections=SAMPLED_SECTIONS)
+        if resources is None and metrics is None:
+            raise RuntimeError('No data from Oracle')
+
+        values = flatten_resources(resources or {})
+        if metrics is not None:
+            values['sessions.active'] = metrics.get('active_sessions')
+            values['sessions.total'] = metrics.get('total_sessions')
+
+        if Config.TOPSQL_ENABLED:
+            try:
+                refresh_top_sql()
+            except Exception as e:
+                print(f"Warning: Top SQL refresh failed: {e}")
+
+        sample = {'ts': ts, 'values': values, 'resources': resources, 'metrics': metrics}
+        self.store.append(ts, values)
+        self.last_sample = sample
+        self.samples_taken += 1
+        for listener in self.listeners:
+            try:
+                listener(sample)
+            except Exception as e:
+                print(f"Warning: Sampler listener failed: {e}")
+        return sample
+
+    def _run(self):
+        next_run = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"Warning: Sampler failed: {e}")
+            # Doba sběru se od intervalu odečte
+            next_run += self.next_interval()
+            delay = next_run - time.monotonic()
+            if delay < 0:
+                next_run = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def status(self):
+        return {
+            'running': self._thread is not None,
+            'interval_sec': self.next_interval(),
+            'samples_taken': self.samples_taken,
+            'errors': self.errors,
+            'last_sample_ts': self.last_sample['ts'] if self.last_sample else None,
+        }
+
+
+_store = None
+_sampler = None
+_lock = threading.Lock()
+
+
+def get_history_store():
+    """Sdílené úložiště historie (vytvoří se při prvním použití)"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = HistoryStore(Config.HISTORY_DB_PATH)
+        return _store
+
+
+def get_sampler():
+    global _sampler
+    store = get_history_store()
+    with _lock:
+        if _sampler is None:
+            _sampler = Sampler(store, Config.SAMPLER_INTERVAL)
+        return _sampler
+
+
+def start_sampler():
+    sampler = get_sampler()
+    sampler.start()
+    return sampler
+
+
+def stop_sampler():
+    if _sampler is not None:
+        _sampler.stop()
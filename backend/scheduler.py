@@ -0,0 +1,241 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from settings import Config
+from services import fetch_metrics, fetch_system_resources, poll_interval, poll_status
+from targets import registry
+
+# Sekce, které scheduler sbírá z každé DB pro souhrn flotily a alarmy (ostatní až na vyžádání)
+FLEET_SECTIONS = ['sessions', 'database', 'tablespaces', 'alerts', 'system_events']
+
+
+def summarize(metrics, resources):
+    """Souhrn jedné DB pro /api/fleet z odpovědí fetch_metrics a fetch_system_resources"""
+    summary = {}
+    if metrics is not None:
+        tablespaces = metrics.get('tablespaces') or []
+        summary['database'] = metrics.get('database')
+        summary['active_sessions'] = metrics.get('active_sessions')
+        summary['total_sessions'] = metrics.get('total_sessions')
+        summary['max_tablespace_pct'] = max((ts['pct_used'] or 0 for ts in tablespaces), default=None)
+        summary['alerts'] = len(metrics.get('alerts') or [])
+        summary['section_errors'] = sorted(metrics.get('_errors', {}))
+    if resources is not None:
+        summary['cpu_pct'] = resources['cpu'].get('utilization_pct')
+        summary['aas'] = resources['cpu'].get('aas')
+    return summary
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+
+class TargetStatus:
+    """Výsledek posledního sběru jedné cílové DB"""
+
+    def __init__(self, target):
+        self.target = target
+        self.next_due = 0.0
+        self.queued_at = None
+        self.started_at = None
+        self.last_run = None
+        self.last_success = None
+        self.duration_ms = None
+        self.failures = 0
+        self.overruns = 0
+        self.error = None
+        self.summary = {}
+
+    @property
+    def interval(self):
+        return self.target.interval or Config.SCHEDULER_INTERVAL
+
+    def next_interval(self):
+        """Odstup dalšího sběru - vlastní interval cíle z targets.json, jinak adaptivní podle zátěže DB"""
+        if self.target.interval:
+            return self.target.interval
+        return poll_interval(self.target) or Config.SCHEDULER_INTERVAL
+
+    def state(self, now):
+        if self.started_at is not None:
+            # Sběr trvá déle než interval - DB nejspíš visí na timeoutech
+            return 'stalled' if now - self.started_at > self.interval else 'running'
+        if self.last_run is None:
+            return 'pending'
+        return 'down' if self.failures else 'up'
+
+    def to_dict(self, now):
+        result = self.target.to_dict()
+        result.update({
+            'state': self.state(now),
+            'last_run': _iso(self.last_run),
+            'last_success': _iso(self.last_success),
+            'age_sec': round(time.time() - self.last_success, 2) if self.last_success else None,
+            'duration_ms': self.duration_ms,
+            'failures': self.failures,
+            'overruns': self.overruns,
+            'error': self.error,
+            # Interval, podle kterého se cíl opravdu sbírá
+            'interval_sec': self.next_interval(),
+            'poll': poll_status(self.target),
+        })
+        result.update(self.summary)
+        return result
+
+
+class Scheduler:
+    """
+    Sbírá metriky ze všech cílových DB souběžně v omezeném počtu vláken.
+
+    Každý cíl má vlastní interval a nejvýše jeden rozpracovaný sběr, takže
+    zaseknutá DB drží jen jedno vlákno a ostatní se sbírají dál. Cíl, jehož
+    sběr selhal, se zkouší znovu s exponenciálním odstupem (max. max_backoff).
+    """
+
+    def __init__(self, registry, workers, max_backoff):
+        self.workers = workers
+        self.max_backoff = max_backoff
+        self._statuses = {target.id: TargetStatus(target) for target in registry}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.listeners = []
+        self.runs = 0
+
+    def add_listener(self, listener):
+        """listener(target, metrics, resources, ts) se zavolá po každém úspěšném sběru cíle"""
+        self.listeners.append(listener)
+
+    def _collect(self, status):
+        target = status.target
+        start = time.monotonic()
+        with self._lock:
+            status.started_at = start
+        error = None
+        metrics = resources = None
+        try:
+            resources = fetch_system_resources(target)
+            # Sekvenčně na jednom spojení - souběžnost je mezi cíli, ne uvnitř cíle
+            metrics = fetch_metrics(sections=FLEET_SECTIONS, parallel=False, target=target)
+            if metrics is None and resources is None:
+                error = 'No data from Oracle'
+        except Exception as e:
+            error = str(e)
+
+        now = time.monotonic()
+        with self._lock:
+            status.duration_ms = round((now - start) * 1000, 1)
+            status.started_at = status.queued_at = None
+            status.last_run = time.time()
+            if now - start > status.interval:
+                status.overruns += 1
+            if error is None:
+                status.failures = 0
+                status.error = None
+                status.last_success = status.last_run
+                status.summary = summarize(metrics, resources)
+                delay = status.next_interval()
+            else:
+                status.failures += 1
+                status.error = error
+                delay = min(status.interval * 2 ** (status.failures - 1), max(status.interval, self.max_backoff))
+            status.next_due = now + delay
+            self.runs += 1
+        if error is None:
+            for listener in self.listeners:
+                try:
+                    listener(target, metrics, resources, status.last_run)
+                except Exception as e:
+                    print(f"Warning: Scheduler listener failed: {e}")
+        self._wakeup.set()
+
+    def _submit_due(self, force=False):
+        """Odešle ke sběru cíle, které jsou na řadě; vrátí futures a čas dalšího termínu"""
+        now = time.monotonic()
+        next_wake = now + 1.0
+        futures = []
+        with self._lock:
+            for status in self._statuses.values():
+                if status.queued_at is not None:
+                    continue
+                if force or status.next_due <= now:
+                    status.queued_at = now
+                    futures.append(self._executor.submit(self._collect, status))
+                else:
+                    next_wake = min(next_wake, status.next_due)
+        return futures, next_wake
+
+    def _run(self):
+        while not self._stop.is_set():
+            _, next_wake = self._submit_due()
+            self._wakeup.wait(max(0.0, next_wake - time.monotonic()))
+            self._wakeup.clear()
+
+    def run_once(self, timeout):
+        """Jeden souběžný sběr všech volných cílů (když scheduler neběží na pozadí)"""
+        futures, _ = self._submit_due(force=True)
+        wait(futures, timeout=timeout)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def status(self, target_id):
+        with self._lock:
+            status = self._statuses.get(target_id)
+            return status.to_dict(time.monotonic()) if status is not None else None
+
+    def fleet(self):
+        """Souhrn všech cílů a počty podle stavu"""
+        now = time.monotonic()
+        with self._lock:
+            targets = [status.to_dict(now) for status in self._statuses.values()]
+            runs = self.runs
+        totals = {'targets': len(targets)}
+        for target in targets:
+            totals[target['state']] = totals.get(target['state'], 0) + 1
+        return {
+            'targets': targets,
+            'totals': totals,
+            'scheduler': {'running': self.running, 'workers': self.workers, 'runs': runs},
+        }
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(registry, Config.SCHEDULER_WORKERS, Config.SCHEDULER_MAX_BACKOFF)
+        return _scheduler
+
+
+def start_scheduler():
+    scheduler = get_scheduler()
+    scheduler.start()
+    return scheduler
+
+
+def stop_scheduler():
+    if _scheduler is not None:
+        _scheduler.stop()
@@ -0,0 +1,85 @@
+"""
+Produkční spuštění backendu (místo Flask debug serveru z app.py).
+
+Jeden proces s pevným počtem vláken: sampler, scheduler, cache sekcí a
+connection pooly sdílí všechny požadavky, takže DB nezatěžuje každý worker
+zvlášť. Vlákna stačí - při čekání na Oracle se GIL uvolňuje. Používá
+waitress, pokud je nainstalovaná, jinak vláknový server Werkzeugu.
+
+    python serve.py --threads 16 --port 5000
+"""
+import argparse
+import signal
+
+from settings import Config
+from app import app, enable_replay, start_background, shutdown
+from stream import broadcaster, stream_limit
+from targets import registry
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+
+def _interrupt(signum, frame):
+    # SIGTERM (systemd, docker stop) jako Ctrl+C - přeruší server v hlavním vlákně
+    raise KeyboardInterrupt
+
+
+def create_server(host, port, threads):
+    """Vrátí (run, close) zvoleného WSGI serveru"""
+    if waitress is not None:
+        # Lookahead čte socket i během zpracování požadavku - jen tak waitress
+        # pozná odpojeného klienta (waitress.client_disconnected) a dotaz se zruší
+        server = waitress.create_server(app, host=host, port=port, threads=threads,
+                                        channel_request_lookahead=5)
+        # Každý SSE odběratel drží vlákno po celou dobu spojení - zbytek pro REST API
+        broadcaster.max_subscribers = stream_limit(threads)
+        return server.run, server.close
+    print("Warning: waitress is not installed, using the Werkzeug threaded server (no thread limit)")
+    from werkzeug.serving import make_server
+    server = make_server(host, port, app, threaded=True)
+    return server.serve_forever, server.server_close
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Oracle Monitoring Backend (production server)')
+    parser.add_argument('--host', default=Config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT)
+    parser.add_argument('--threads', type=int, default=Config.SERVER_THREADS)
+    parser.add_argument('--replay', default=None, help='serve a snapshot recording instead of the database')
+    parser.add_argument('--speed', type=float, default=Config.REPLAY_SPEED, help='replay speed (x real time)')
+    parser.add_argument('--loop', action='store_true', default=Config.REPLAY_LOOP, help='restart replay at the end')
+    args = parser.parse_args()
+    if args.replay:
+        enable_replay(args.replay, args.speed, args.loop)
+
+    run, close = create_server(args.host, args.port, args.threads)
+    signal.signal(signal.SIGTERM, _interrupt)
+
+    print("=" * 60)
+    print("Starting Oracle Monitoring Backend...")
+    if args.replay:
+        print(f"Replay: {args.replay} ({args.speed}x{', loop' if args.loop else ''})")
+    else:
+        print(f"Database: {registry.default.dsn}")
+    print(f"Targets: {', '.join(registry.ids())}")
+    server_name = (f"waitress, {args.threads} threads, max {broadcaster.max_subscribers} streams"
+                   if waitress is not None else "werkzeug (threaded)")
+    print(f"Server: {server_name}")
+    print(f"API will be available at: http://{args.host}:{args.port}")
+    print("=" * 60)
+    start_background()
+    try:
+        run()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        close()
+        # Jediné vypnutí s timeoutem na dočerpání - atexit handler app.py pak už nic nedělá
+        shutdown(Config.SERVER_SHUTDOWN_TIMEOUT)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,290 +1,1218 @@
-from datetime import datetime
-import oracledb
-from db import get_oracle_connection
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+import sqlite3
+import threading
+import time
+from db import get_oracle_connection, oracledb
+from cache import SectionCache, QueryResultCache, parse_ttls
+from deltas import DeltaTracker
+from session_diff import SessionVersions
+from query_cursors import CursorRegistry, OpenCursor
+from query_limits import QueryLimiter, QueryBusy, QueryCancelled, DisconnectWatch, normalize_sql
+from tabular import Table, render
+from topsql import TopSQL, TextCache
+from tablestats import TableStatsStore
+from capacity import CapacityTracker, get_capacity_store
+from adaptive import AdaptiveInterval, default_signals
+from sqlstats import InstrumentedCursor, StatementCounter, match_statement
+from telemetry import Trace, timed
+import telemetry
+from encoding import dumps
+from targets import registry
+from settings import Config
 import queries
 
-def fetch_metrics(sql_limit=50):
-    """Načte aktuální metriky z Oracle DB"""
-    try:
-        conn = get_oracle_connection()
-        cur = conn.cursor()
+# Výchozí TTL sekcí (s) podle toho, jak rychle se data mění
+SECTION_TTLS = {
+    'sessions': 5,
+    'wait_events': 5,
+    'session_details': 5,
+    'user_sessions': 10,
+    'long_running_sql': 10,
+    'system_events': 15,
+    'active_sql': 15,
+    'alerts': 60,
+    'sga_stats': 60,
+    'tablespaces': 300,
+    'database': 300,
+    'table_stats': 600,
+    'system_resources': 5,
+}
+SECTION_TTLS.update(parse_ttls(Config.METRICS_CACHE_TTLS))
 
-        # 1. Aktivní sessions
-        cur.execute(queries.SQL_ACTIVE_SESSIONS)
-        active_sessions = cur.fetchone()[0]
 
-        # 2. Total sessions
-        cur.execute(queries.SQL_TOTAL_SESSIONS)
-        total_sessions = cur.fetchone()[0]
+class TargetState:
+    """Stav sběru jedné cílové DB - cache sekcí, čítače a verze sessions"""
 
-        # 3. Top wait events
-        cur.execute(queries.SQL_WAIT_EVENTS)
-        wait_events = [{'event': row[0], 'count': row[1]} for row in cur]
+    def __init__(self, target_id):
+        self.cache = SectionCache(SECTION_TTLS)
+        # Předchozí hodnoty kumulativních čítačů pro výpočet rychlostí za interval
+        self.deltas = DeltaTracker()
+        # Nedávné verze seznamu sessions pro /api/sessions/diff
+        self.session_versions = SessionVersions(Config.SESSION_DIFF_VERSIONS)
+        # STARTUP_TIME instance - změna znamená restart a reset všech čítačů
+        self.instance_epoch = None
+        # Sloučený dotaz na systémové zdroje selhal (oprávnění) - čte se po pohledech
+        self.batch_unsupported = False
+        # Počty execute() dotazů kolektorů pro /api/statements
+        self.statements = StatementCounter(target_id)
+        # Inkrementální žebříček SQL a texty příkazů pro active_sql a /api/top-sql
+        self.sql_texts = TextCache(Config.TOPSQL_TEXT_CACHE)
+        self.topsql = TopSQL(Config.TOPSQL_MAX_WINDOW, on_evict=self.sql_texts.discard)
+        # Statistiky tabulek obnovované jen po změnách (sekce table_stats, /api/table-stats)
+        self.table_stats = TableStatsStore()
+        # Modely růstu tablespaců pro /api/capacity (plní je sekce tablespaces)
+        self.capacity = CapacityTracker(target_id, get_capacity_store, Config.CAPACITY_SAMPLE_INTERVAL,
+                                        Config.CAPACITY_HALF_LIFE_DAYS)
+        # Doporučený interval sběru a dotazování podle zátěže (None = pevné intervaly)
+        self.poll = AdaptiveInterval(
+            Config.ADAPTIVE_MIN_INTERVAL, Config.ADAPTIVE_MAX_INTERVAL, Config.ADAPTIVE_BACKOFF,
+            default_signals(Config.ADAPTIVE_CPU_HIGH)) if Config.ADAPTIVE_POLLING else None
 
-        # 4. System-wide wait events
-        cur.execute(queries.SQL_SYSTEM_EVENTS)
-        system_events = [{'event': r[0], 'total_waits': r[1], 'time_waited': r[2], 'avg_wait': r[3]} 
-                         for r in cur]
 
-        # 5. SGA komponenty
-        cur.execute(queries.SQL_SGA_COMPONENTS)
-        sga_stats = [{'component': r[0], 'size_mb': r[1]} for r in cur]
+_states = {}
+_states_lock = threading.Lock()
 
-        # 6. Tablespace usage
-        cur.execute(queries.SQL_TABLESPACE_USAGE)
-        tablespaces = [{'name': r[0], 'pct_used': r[1], 'used_mb': r[2], 'total_mb': r[3]} 
-                       for r in cur]
 
-        # 8. Recent alerts (pokud existují)
-        try:
-            cur.execute(queries.SQL_RECENT_ALERTS)
-            alerts = [{'message': r[0], 'level': r[1], 'timestamp': r[2].isoformat() if r[2] else None} 
-                     for r in cur]
-        except:
-            alerts = []
+def target_state(target=None):
+    """Stav sběru cílové DB (None = výchozí), vytvoří se při prvním použití"""
+    target = target or registry.default
+    with _states_lock:
+        state = _states.get(target.id)
+        if state is None:
+            state = _states[target.id] = TargetState(target.id)
+        return state
 
-        # 9. Dlouhodobě běžící SQL (SQL Monitor)
-        try:
-            cur.execute(queries.SQL_LONG_RUNNING_SQL)
-            long_running = [{'sql_id': r[0], 'start_time': r[1].isoformat() if r[1] else None,
-                           'elapsed_sec': r[2], 'cpu_sec': r[3], 
-                           'buffer_gets': r[4], 'disk_reads': r[5], 'status': r[6]} 
-                          for r in cur]
-        except:
-            long_running = []
-
-        # 10. Database info
-        cur.execute(queries.SQL_DATABASE_INFO)
-        db_row = cur.fetchone()
-        db_info = {'name': db_row[0], 'open_mode': db_row[1], 'log_mode': db_row[2]}
-
-        # 11. User sessions with resource usage
-        cur.execute(queries.SQL_USER_SESSIONS)
-        user_sessions = [{'username': r[0], 'osuser': r[1], 'machine': r[2], 
-                         'program': r[3], 'session_count': r[4], 'active_count': r[5],
-                         'physical_reads': r[6] or 0, 'block_gets': r[7] or 0, 
-                         'consistent_gets': r[8] or 0, 'cpu_sec': round((r[9] or 0) / 100, 2)} 
-                        for r in cur]
-
-        # 12. Detailed session list
-        cur.execute(queries.SQL_SESSION_DETAILS)
-        session_details = [{'sid': r[0], 'serial': r[1], 'username': r[2], 'osuser': r[3],
-                           'machine': r[4], 'program': r[5], 'status': r[6], 'event': r[7],
-                           'wait_sec': r[8] or 0, 'logon_time': r[9].isoformat() if r[9] else None,
-                           'physical_reads': r[10] or 0, 'block_gets': r[11] or 0, 'cpu_sec': round((r[12] or 0) / 100, 2)}
-                          for r in cur]
-
-        # 13. Active SQL commands
-        cur.execute(queries.get_active_sql_query(sql_limit))
-        active_sql = [{'sql_id': r[0], 'sql_text': r[1], 'executions': r[2],
-                      'elapsed_sec': round(r[3], 2), 'cpu_sec': round(r[4], 2),
-                      'buffer_gets': r[5] or 0, 'disk_reads': r[6] or 0, 'rows_processed': r[7] or 0,
-                      'parsing_schema': r[8], 'last_user': r[9]}
-                     for r in cur]
-
-        # 14. Table statistics
-        cur.execute(queries.SQL_TABLE_STATS)
-        table_stats = [{'table_name': r[0], 'num_rows': r[1] or 0, 'blocks': r[2] or 0,
-                       'avg_row_len': r[3] or 0, 
-                       'last_analyzed': r[4].isoformat() if r[4] else None,
-                       'tablespace': r[5]}
-                      for r in cur]
 
-        cur.close()
-        conn.close()
-        
-        return {
-            'timestamp': datetime.now().isoformat(),
-            'database': db_info,
-            'active_sessions': active_sessions,
-            'total_sessions': total_sessions,
-            'wait_events': wait_events,
-            'system_events': system_events,
-            'sga_stats': sga_stats,
-            'tablespaces': tablespaces,
-            'alerts': alerts,
-            'long_running_sql': long_running,
-            'user_sessions': user_sessions,
-            'session_details': session_details,
-            'active_sql': active_sql,
-            'table_stats': table_stats
-        }
-    except oracledb.Error as error:
-        print(f"Oracle error: {error}")
-        return None
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        return None
+def poll_interval(target=None):
+    """Aktuální adaptivní interval sběru cílové DB v s, nebo None při pevných intervalech"""
+    poll = target_state(target).poll
+    return poll.interval if poll is not None else None
 
 
-def fetch_system_resources():
-    """Načte systémové zdroje (CPU, Memory, I/O) z Oracle DB"""
+def next_poll_ms(target=None):
+    """Doporučený odstup dalšího dotazu klienta v ms (pole next_poll_ms odpovědí), nebo None"""
+    poll = target_state(target).poll
+    return poll.next_poll_ms if poll is not None else None
+
+
+def poll_status(target=None):
+    """Stav adaptivního intervalu (interval, důvod poslední změny, průměry metrik), nebo None"""
+    poll = target_state(target).poll
+    return poll.status() if poll is not None else None
+
+
+def _observe_load(state, values):
+    if state.poll is not None:
+        state.poll.observe(values)
+
+
+# Přehrávání záznamu (recording.Player) - health a system-resources se neberou z DB
+replay_player = None
+
+
+def set_replay(player):
+    global replay_player
+    replay_player = player
+
+
+# Paralelní sběr sekcí - každá sekce na vlastním spojení z poolu (0 = sekvenčně)
+_executor = None
+if Config.METRICS_PARALLEL_WORKERS > 0:
+    _executor = ThreadPoolExecutor(max_workers=Config.METRICS_PARALLEL_WORKERS,
+                                   thread_name_prefix='metrics')
+
+
+def _collect_sessions(cur, sql_limit, state):
+    if Config.METRICS_BATCHED_QUERIES:
+        # 1.+2. Aktivní i celkové sessions jedním průchodem V$SESSION
+        cur.execute(queries.SQL_SESSION_COUNTS)
+        total_sessions, active_sessions = cur.fetchone()
+        _observe_load(state, {'sessions.active': active_sessions or 0})
+        return {'active_sessions': active_sessions or 0, 'total_sessions': total_sessions}
+
+    # 1. Aktivní sessions
+    cur.execute(queries.SQL_ACTIVE_SESSIONS)
+    active_sessions = cur.fetchone()[0]
+
+    # 2. Total sessions
+    cur.execute(queries.SQL_TOTAL_SESSIONS)
+    total_sessions = cur.fetchone()[0]
+    _observe_load(state, {'sessions.active': active_sessions})
+    return {'active_sessions': active_sessions, 'total_sessions': total_sessions}
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _collect_wait_events(cur, sql_limit, state):
+    # 3. Top wait events
+    cur.execute(queries.SQL_WAIT_EVENTS)
+    return {'wait_events': Table(['event', 'count'], cur.fetchall())}
+
+
+def _collect_system_events(cur, sql_limit, state):
+    # 4. System-wide wait events
+    cur.execute(queries.SQL_SYSTEM_EVENTS)
+    now = time.monotonic()
+    # TIME_WAITED je v setinách sekundy -> ms čekání za sekundu
+    return {'system_events': Table(
+        ['event', 'total_waits', 'time_waited', 'avg_wait', 'waits_per_sec', 'wait_ms_per_sec'],
+        [(r[0], r[1], r[2], r[3],
+          state.deltas.rate(('event', r[0], 'waits'), r[1], now, state.instance_epoch),
+          state.deltas.rate(('event', r[0], 'time'), (r[2] or 0) * 10, now, state.instance_epoch))
+         for r in cur])}
+
+
+def _collect_sga_stats(cur, sql_limit, state):
+    # 5. SGA komponenty
+    cur.execute(queries.SQL_SGA_COMPONENTS)
+    return {'sga_stats': Table(['component', 'size_mb'], cur.fetchall())}
+
+
+def _collect_tablespaces(cur, sql_limit, state):
+    # 6. Tablespace usage
+    cur.execute(queries.SQL_TABLESPACE_USAGE)
+    rows = cur.fetchall()
     try:
-        conn = get_oracle_connection()
-        cur = conn.cursor()
-        
-        result = {
-            'timestamp': datetime.now().isoformat(),
-            'cpu': {},
-            'memory': {},
-            'io': {},
-            'load': {}
-        }
-        
-        # 1. CPU Utilization z V$OSSTAT
+        state.capacity.observe(time.time(), rows)
+    except sqlite3.Error as e:
+        print(f"Warning: Capacity sample not stored: {e}")
+    return {'tablespaces': Table(['name', 'pct_used', 'used_mb', 'total_mb'], rows)}
+
+
+def _collect_alerts(cur, sql_limit, state):
+    # 8. Recent alerts (pokud existují)
+    try:
+        cur.execute(queries.SQL_RECENT_ALERTS)
+        alerts = [(r[0], r[1], _iso(r[2])) for r in cur]
+    except:
+        alerts = []
+    return {'alerts': Table(['message', 'level', 'timestamp'], alerts)}
+
+
+def _collect_long_running_sql(cur, sql_limit, state):
+    # 9. Dlouhodobě běžící SQL (SQL Monitor)
+    try:
+        cur.execute(queries.SQL_LONG_RUNNING_SQL)
+        long_running = [(r[0], _iso(r[1]), r[2], r[3], r[4], r[5], r[6]) for r in cur]
+    except:
+        long_running = []
+    return {'long_running_sql': Table(
+        ['sql_id', 'start_time', 'elapsed_sec', 'cpu_sec', 'buffer_gets', 'disk_reads', 'status'], long_running)}
+
+
+def _collect_database(cur, sql_limit, state):
+    # 10. Database info
+    cur.execute(queries.SQL_DATABASE_INFO)
+    db_row = cur.fetchone()
+    return {'database': {'name': db_row[0], 'open_mode': db_row[1], 'log_mode': db_row[2]}}
+
+
+def _collect_user_sessions(cur, sql_limit, state):
+    # 11. User sessions with resource usage
+    cur.execute(queries.SQL_USER_SESSIONS)
+    now = time.monotonic()
+    # Skupina sessions se mění - pokles součtu se bere jako reset
+    return {'user_sessions': Table(
+        ['username', 'osuser', 'machine', 'program', 'session_count', 'active_count',
+         'physical_reads', 'block_gets', 'consistent_gets', 'cpu_sec', 'reads_per_sec', 'cpu_pct'],
+        [(r[0], r[1], r[2], r[3], r[4], r[5], r[6] or 0, r[7] or 0, r[8] or 0, round((r[9] or 0) / 100, 2),
+          state.deltas.rate(('user', r[0], r[1], r[2], r[3], 'reads'), r[6] or 0, now, state.instance_epoch),
+          state.deltas.rate(('user', r[0], r[1], r[2], r[3], 'cpu'), r[9] or 0, now, state.instance_epoch))
+         for r in cur])}
+
+
+def _collect_session_details(cur, sql_limit, state):
+    # 12. Detailed session list
+    cur.execute(queries.SQL_SESSION_DETAILS)
+    now = time.monotonic()
+    # Klíč (SID, SERIAL#) - znovu použitý SID s novým SERIAL# je nová session;
+    # CPU v setinách s za sekundu = procento jednoho CPU
+    return {'session_details': Table(
+        ['sid', 'serial', 'username', 'osuser', 'machine', 'program', 'status', 'event', 'wait_sec',
+         'logon_time', 'physical_reads', 'block_gets', 'cpu_sec', 'reads_per_sec', 'cpu_pct'],
+        [(r[0], r[1], r[2], r[3], r[4], r[5], r[6], r[7], r[8] or 0, _iso(r[9]),
+          r[10] or 0, r[11] or 0, round((r[12] or 0) / 100, 2),
+          state.deltas.rate(('session', r[0], r[1], 'reads'), r[10] or 0, now, state.instance_epoch),
+          state.deltas.rate(('session', r[0], r[1], 'cpu'), r[12] or 0, now, state.instance_epoch))
+         for r in cur])}
+
+
+# Víc chybějících textů než tolik dávek = jeden dotaz na všechny texty
+_TEXT_BULK_BATCHES = 10
+
+
+def _refresh_top_sql(cur, state):
+    """Načte z V$SQLSTATS jen příkazy aktivní od minulého průchodu (nejvýš jednou za interval)"""
+    topsql = state.topsql
+    with topsql.refresh_lock:
+        if not topsql.due(Config.TOPSQL_REFRESH_INTERVAL):
+            return
+        cur.execute(queries.SQL_TOP_SQL_STATS, since=topsql.since())
+        topsql.apply(cur.fetchall())
+
+
+def _load_sql_texts(cur, state, sql_ids):
+    """Doplní do cache texty příkazů žebříčku, které v ní ještě nejsou; vrátí SQL_ID, které už v DB nejsou"""
+    texts = state.sql_texts
+    missing = texts.missing(sql_ids)
+    if not missing:
+        return set()
+    wanted = set(missing)
+    batch = queries.TOP_SQL_TEXT_BATCH
+    if len(missing) > _TEXT_BULK_BATCHES * batch:
+        cur.execute(queries.SQL_TOP_SQL_TEXT_ALL)
+        rows = cur
+    else:
+        rows = []
+        for i in range(0, len(missing), batch):
+            chunk = missing[i:i + batch]
+            cur.execute(queries.SQL_TOP_SQL_TEXT, chunk + [None] * (batch - len(chunk)))
+            rows.extend(cur.fetchall())
+    for sql_id, schema, text in rows:
+        if sql_id in wanted:
+            texts.put(sql_id, schema, text, keep=len(sql_ids))
+            wanted.discard(sql_id)
+    # Příkaz už ve V$SQLAREA není (vypadl ze shared poolu) - zapomenout i jeho čítače
+    if wanted:
+        state.topsql.evict(wanted)
+    return wanted
+
+
+def _ranked_sql(cur, state, order, window, limit):
+    """Žebříček s texty v cache; místo příkazů, které mezitím vypadly z DB, se doplní další"""
+    ranked, covered = state.topsql.top(order, window, limit)
+    # Každé kolo příkazy bez textu zapomene, takže skončí nejpozději s prázdným žebříčkem
+    while _load_sql_texts(cur, state, [sql_id for sql_id, _ in ranked]):
+        ranked, covered = state.topsql.top(order, window, limit)
+    return ranked, covered
+
+
+def _collect_active_sql(cur, sql_limit, state):
+    # 13. Active SQL commands
+    columns = ['sql_id', 'sql_text', 'executions', 'elapsed_sec', 'cpu_sec', 'buffer_gets', 'disk_reads',
+               'rows_processed', 'parsing_schema', 'last_user']
+    if not Config.TOPSQL_ENABLED:
+        cur.execute(queries.SQL_ACTIVE_SQL, row_limit=sql_limit)
+        return {'active_sql': Table(columns, [
+            (r[0], r[1], r[2], round(r[3], 2), round(r[4], 2), r[5] or 0, r[6] or 0, r[7] or 0, r[8], r[9])
+            for r in cur])}
+
+    # Kumulativně podle elapsed jako dřív, ale z inkrementálního žebříčku místo celého V$SQL
+    _refresh_top_sql(cur, state)
+    ranked, _ = _ranked_sql(cur, state, 'elapsed', None, sql_limit)
+    cur.execute(queries.SQL_SQL_LAST_USER)
+    last_users = dict(cur)
+    rows = []
+    for sql_id, (executions, elapsed, cpu, gets, reads, processed) in ranked:
+        schema, text = state.sql_texts.get(sql_id) or (None, None)
+        rows.append((sql_id, text, executions, round(elapsed / 1e6, 2), round(cpu / 1e6, 2), gets, reads,
+                     processed, schema, last_users.get(sql_id)))
+    return {'active_sql': Table(columns, rows)}
+
+
+def _refresh_table_stats(cur, state):
+    """Načte jen tabulky se změněnými statistikami (celý DBA_TABLES jen když je potřeba)"""
+    store = state.table_stats
+    with store.refresh_lock:
+        if not store.due(Config.TABLE_STATS_REFRESH_INTERVAL):
+            return
+        cur.execute(queries.SQL_TABLE_STATS_SIGNATURE)
+        count, max_analyzed, object_ids, max_created = cur.fetchone()
+        shape = (count, object_ids, max_created)
+        if store.needs_full(shape, Config.TABLE_STATS_FULL_REFRESH):
+            cur.execute(queries.SQL_TABLE_STATS)
+            store.replace(cur.fetchall(), shape)
+        elif max_analyzed is not None and (store.max_analyzed is None or max_analyzed > store.max_analyzed):
+            cur.execute(queries.SQL_TABLE_STATS_CHANGED, since=store.max_analyzed or _EPOCH)
+            store.update(cur.fetchall())
         try:
-            cur.execute(queries.SQL_OS_STAT)
-            os_stats = {row[0]: row[1] for row in cur}
-            
-            # CPU utilization calculation
-            busy_time = os_stats.get('BUSY_TIME', 0)
-            idle_time = os_stats.get('IDLE_TIME', 0)
-            total_time = busy_time + idle_time
-            
-            if total_time > 0:
-                cpu_utilization = round((busy_time / total_time) * 100, 2)
-            else:
-                cpu_utilization = 0
-            
-            result['cpu']['utilization_pct'] = cpu_utilization
-            result['cpu']['num_cpus'] = os_stats.get('NUM_CPUS', 0)
-            result['cpu']['num_cpu_cores'] = os_stats.get('NUM_CPU_CORES', 0)
-            result['cpu']['busy_time'] = busy_time
-            result['cpu']['idle_time'] = idle_time
-            result['load']['load_average'] = os_stats.get('LOAD', 0)
-            
-            # Physical memory
-            physical_memory_bytes = os_stats.get('PHYSICAL_MEMORY_BYTES', 0)
-            result['memory']['physical_memory_gb'] = round(physical_memory_bytes / (1024**3), 2)
-            
-        except Exception as e:
-            print(f"Warning: Could not fetch V$OSSTAT: {e}")
-        
-        # 2. CPU a Memory z V$SYSMETRIC (60-second average)
+            cur.execute(queries.SQL_TABLE_MODIFICATIONS)
+            store.set_modifications(cur.fetchall())
+        except oracledb.DatabaseError as error:
+            # Bez práva na DBA_TAB_MODIFICATIONS jen chybí informace o zastarání
+            print(f"Warning: DBA_TAB_MODIFICATIONS unavailable: {error}")
+        store.checked()
+
+
+def _collect_table_stats(cur, sql_limit, state):
+    # 14. Table statistics
+    _refresh_table_stats(cur, state)
+    return {'table_stats': Table(
+        ['table_name', 'num_rows', 'blocks', 'avg_row_len', 'last_analyzed', 'tablespace'],
+        [(r[0], r[1] or 0, r[2] or 0, r[3] or 0, _iso(r[4]), r[5]) for r in state.table_stats.rows()])}
+
+
+# Sekce snapshotu v pořadí, v jakém se načítají
+METRIC_SECTIONS = {
+    'sessions': _collect_sessions,
+    'wait_events': _collect_wait_events,
+    'system_events': _collect_system_events,
+    'sga_stats': _collect_sga_stats,
+    'tablespaces': _collect_tablespaces,
+    'alerts': _collect_alerts,
+    'long_running_sql': _collect_long_running_sql,
+    'database': _collect_database,
+    'user_sessions': _collect_user_sessions,
+    'session_details': _collect_session_details,
+    'active_sql': _collect_active_sql,
+    'table_stats': _collect_table_stats,
+}
+
+
+class _LazyCursor:
+    """Vypůjčí spojení z poolu až ve chvíli, kdy je opravdu potřeba dotaz do DB"""
+
+    def __init__(self, target, state, trace=None):
+        self._target = target
+        self._state = state
+        self._trace = trace
+        self._conn = None
+        self._cur = None
+        self._error = None
+
+    def cursor(self):
+        # Nepodařené vypůjčení se neopakuje pro každou další sekci
+        if self._error is not None:
+            raise self._error
+        if self._cur is None:
+            start = time.perf_counter()
+            try:
+                self._conn = get_oracle_connection(self._target)
+            except Exception as e:
+                self._error = e
+                raise
+            if self._trace is not None:
+                self._trace.acquire(time.perf_counter() - start)
+            self._conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+            self._cur = InstrumentedCursor(self._conn.cursor(), self._state.statements, self._trace)
+        return self._cur
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._conn is not None:
+            self._cur.close()
+            self._conn.close()
+
+
+def _section_key(name, sql_limit):
+    # Jen active_sql závisí na parametru požadavku
+    return (name, sql_limit) if name == 'active_sql' else (name,)
+
+
+# Hodnoty sekcí, které se nepodařilo načíst a nejsou ani v cache
+SECTION_DEFAULTS = {
+    'sessions': {'active_sessions': None, 'total_sessions': None},
+    'database': {'database': {'name': None, 'open_mode': None, 'log_mode': None}},
+}
+
+
+def section_keys(name):
+    """Klíče odpovědi /api/health, které plní sekce name"""
+    return tuple(SECTION_DEFAULTS.get(name, {name: None}))
+
+
+def _load_section(target, state, name, sql_limit, trace=None):
+    """Načte jednu sekci na vlastním spojení z poolu (s call_timeout)"""
+    start = time.perf_counter()
+    with get_oracle_connection(target) as conn:
+        if trace is not None:
+            trace.acquire(time.perf_counter() - start)
+        conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+        cur = InstrumentedCursor(conn.cursor(), state.statements, trace)
         try:
-            cur.execute(queries.SQL_SYSMETRIC)
-            sysmetrics = {row[0]: row[1] for row in cur}
-            
-            result['cpu']['host_cpu_utilization_pct'] = round(sysmetrics.get('Host CPU Utilization (%)', 0), 2)
-            result['cpu']['cpu_usage_per_sec'] = round(sysmetrics.get('CPU Usage Per Sec', 0), 2)
-            result['cpu']['db_cpu_time_ratio'] = round(sysmetrics.get('Database CPU Time Ratio', 0), 2)
-            
-        except Exception as e:
-            print(f"Warning: Could not fetch V$SYSMETRIC: {e}")
-        
-        # 3. DB CPU Time Model
+            return METRIC_SECTIONS[name](cur, sql_limit, state)
+        finally:
+            cur.close()
+
+
+def _collect_sequential(target, state, names, sql_limit, loaded, errors, trace):
+    with _LazyCursor(target, state, trace) as lazy:
+        for name in names:
+            try:
+                loaded[name] = state.cache.get(
+                    _section_key(name, sql_limit),
+                    timed(trace, name, lambda name=name: METRIC_SECTIONS[name](lazy.cursor(), sql_limit, state)))
+            except Exception as e:
+                errors[name] = str(e)
+
+
+def _collect_parallel(target, state, names, sql_limit, loaded, errors, trace):
+    futures = {}
+    for name in names:
+        key = _section_key(name, sql_limit)
+        cached = state.cache.peek(key)
+        if cached is not None:
+            loaded[name] = cached
+        else:
+            loader = timed(trace, name, lambda name=name: _load_section(target, state, name, sql_limit, trace))
+            futures[name] = _executor.submit(state.cache.get, key, loader)
+
+    # Společný deadline - pomalá sekce nezdrží odpověď déle než timeout
+    deadline = time.monotonic() + Config.METRICS_SECTION_TIMEOUT
+    for name, future in futures.items():
         try:
-            cur.execute(queries.SQL_SYS_TIME_MODEL)
-            time_model = {row[0]: row[1] for row in cur}
-            
-            result['cpu']['db_cpu_time_sec'] = time_model.get('DB CPU', 0)
-            result['cpu']['background_cpu_time_sec'] = time_model.get('background cpu time', 0)
-            result['cpu']['db_time_sec'] = time_model.get('DB time', 0)
-            
+            loaded[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            errors[name] = f"Timed out after {Config.METRICS_SECTION_TIMEOUT}s"
         except Exception as e:
-            print(f"Warning: Could not fetch V$SYS_TIME_MODEL: {e}")
-        
-        # 4. Memory Stats z V$SGASTAT
+            errors[name] = str(e)
+
+
+def parse_sections(value):
+    """Převede 'a,b,c' z query stringu na seznam sekcí; vyhodí ValueError pro neznámé"""
+    if not value:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in METRIC_SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}")
+    return names
+
+
+def fetch_metrics(sql_limit=50, parallel=None, sections=None, columnar=False, target=None, timings=False):
+    """Načte aktuální metriky z Oracle DB (prošlé sekce z DB, ostatní z cache)"""
+    if replay_player is not None:
+        return replay_player.metrics(sections, columnar)
+    target = target or registry.default
+    state = target_state(target)
+    # Časy sekcí a dotazů tohoto požadavku pro blok _timings
+    trace = Trace() if timings else None
+    if parallel is None:
+        parallel = _executor is not None
+    # Jen vyžádané sekce, v pořadí METRIC_SECTIONS
+    names = [name for name in METRIC_SECTIONS if sections is None or name in sections]
+    loaded = {}
+    errors = {}
+    if parallel and _executor is not None:
+        _collect_parallel(target, state, names, sql_limit, loaded, errors, trace)
+    else:
+        _collect_sequential(target, state, names, sql_limit, loaded, errors, trace)
+    for name in errors:
+        telemetry.section_error(target.id, name)
+
+    if not loaded:
+        print(f"Oracle error ({target.id}): {next(iter(errors.values()), 'no sections loaded')}")
+        return None
+
+    result = {'timestamp': datetime.now().isoformat()}
+    section_info = {}
+    for name in names:
+        info = {'ttl_sec': state.cache.ttl_for(name)}
+        if name in errors:
+            print(f"Warning: Could not fetch section {name} ({target.id}): {errors[name]}")
+            info['error'] = errors[name]
+            # Raději starší data z cache než prázdná sekce
+            loaded_section = state.cache.peek(_section_key(name, sql_limit), stale=True)
+            if loaded_section is None:
+                result.update(SECTION_DEFAULTS.get(name, {name: Table([], []).columnar() if columnar else []}))
+                section_info[name] = info
+                continue
+            info['stale'] = True
+        else:
+            loaded_section = loaded[name]
+        data, age, fetched_at = loaded_section
+        for key, value in data.items():
+            result[key] = render(value, columnar)
+        info['age_sec'] = round(age, 2)
+        info['fetched_at'] = fetched_at.isoformat()
+        section_info[name] = info
+    result['_sections'] = section_info
+    if errors:
+        result['_errors'] = errors
+    if trace is not None:
+        result['_timings'] = trace.to_dict()
+    return result
+
+
+def fetch_session_diff(since=None, target=None):
+    """Vrátí změny v seznamu sessions od verze since (nebo celý seznam)"""
+    session_versions = target_state(target).session_versions
+    metrics = fetch_metrics(sections=['session_details'], target=target)
+    if metrics is None:
+        return None
+    if 'session_details' in metrics.get('_errors', {}):
+        return {'error': metrics['_errors']['session_details'], 'timestamp': metrics['timestamp']}
+
+    version = session_versions.publish(metrics['session_details'])
+    result = {'timestamp': metrics['timestamp'], 'version': version,
+              '_sections': metrics['_sections']}
+    diff = session_versions.diff(since, version) if since is not None else None
+    if diff is None:
+        # Neznámá nebo příliš stará verze klienta - pošle se celý seznam
+        result['full'] = True
+        result['sessions'] = metrics['session_details']
+    else:
+        result['full'] = False
+        result['base_version'] = since
+        result.update(diff)
+    return result
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Pohledy čtené zvlášť, pokud sloučený dotaz není k dispozici: (zdroj, SQL, popis do logu)
+_RESOURCE_QUERIES = [
+    ('os', queries.SQL_OS_STAT, 'V$OSSTAT'),
+    ('sysmetric', queries.SQL_SYSMETRIC, 'V$SYSMETRIC'),
+    ('time_model', queries.SQL_SYS_TIME_MODEL, 'V$SYS_TIME_MODEL'),
+    ('sga', queries.SQL_SGA_STAT, 'memory stats'),
+    ('pga', queries.SQL_PGA_STAT, 'PGA stats'),
+]
+
+
+def _read_resource_stats_batched(cur):
+    """Všechny name/value pohledy pro systémové zdroje jedním dotazem (UNION ALL)"""
+    stats = {}
+    cur.execute(queries.SQL_RESOURCE_STATS)
+    for source, name, value in cur:
+        stats.setdefault(source, {})[name] = value
+    startup = stats.get('instance', {}).get('STARTUP_TIME')
+    if startup is not None:
+        # STARTUP_TIME přichází jako sekundy od epochy, aby šel do číselného sloupce
+        stats['instance']['STARTUP_TIME'] = _EPOCH + timedelta(seconds=float(startup))
+    return stats
+
+
+def _read_resource_stats_separate(cur):
+    """Stejná data po jednotlivých pohledech - chybějící oprávnění vyřadí jen daný pohled"""
+    stats = {}
+    for source, sql, label in _RESOURCE_QUERIES:
         try:
-            cur.execute(queries.SQL_SGA_STAT)
-            memory_pools = [{'pool': row[0], 'size_mb': round(row[1], 2)} for row in cur]
-            result['memory']['sga_pools'] = memory_pools
-            
-            # Total SGA
-            cur.execute(queries.SQL_TOTAL_SGA)
-            result['memory']['total_sga_mb'] = cur.fetchone()[0]
-            
+            cur.execute(sql)
+            stats[source] = {row[0]: row[1] for row in cur}
         except Exception as e:
-            print(f"Warning: Could not fetch memory stats: {e}")
-        
-        # 5. PGA Memory
+            print(f"Warning: Could not fetch {label}: {e}")
+    try:
+        cur.execute(queries.SQL_INSTANCE_STARTUP)
+        stats['instance'] = {'STARTUP_TIME': cur.fetchone()[0]}
+    except Exception as e:
+        print(f"Warning: Could not fetch V$INSTANCE: {e}")
+    try:
+        cur.execute(queries.SQL_TOTAL_SGA)
+        stats['sga_total'] = {'total': cur.fetchone()[0]}
+    except Exception as e:
+        print(f"Warning: Could not fetch memory stats: {e}")
+    return stats
+
+
+def _read_resource_stats(cur, state):
+    if Config.METRICS_BATCHED_QUERIES and not state.batch_unsupported:
         try:
-            cur.execute(queries.SQL_PGA_STAT)
-            pga_stats = {row[0]: row[1] for row in cur}
-            result['memory']['pga_allocated_mb'] = pga_stats.get('total PGA allocated', 0)
-            result['memory']['pga_inuse_mb'] = pga_stats.get('total PGA inuse', 0)
-            result['memory']['pga_max_allocated_mb'] = pga_stats.get('maximum PGA allocated', 0)
-            
-        except Exception as e:
-            print(f"Warning: Could not fetch PGA stats: {e}")
-        
-        # 6. I/O Stats
+            return _read_resource_stats_batched(cur)
+        except oracledb.Error as error:
+            if getattr(error.args[0], 'full_code', None) == 'DPY-4024':
+                raise
+            # Např. chybí oprávnění na jeden z pohledů - dál se čte po pohledech
+            print(f"Warning: Batched resource query failed, falling back to separate queries: {error}")
+            state.batch_unsupported = True
+    return _read_resource_stats_separate(cur)
+
+
+def _collect_system_resources(target, state, trace=None):
+    """Načte systémové zdroje (CPU, Memory, I/O) z Oracle DB"""
+    start = time.perf_counter()
+    with get_oracle_connection(target) as conn:
+        if trace is not None:
+            trace.acquire(time.perf_counter() - start)
+        # Zaseknutá DB nesmí držet vlákno (scheduler, broadcaster) donekonečna
+        conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+        cur = InstrumentedCursor(conn.cursor(), state.statements, trace)
         try:
-            cur.execute(queries.SQL_IO_METRICS)
-            io_metrics = {row[0]: row[1] for row in cur}
-            
-            result['io']['physical_reads_per_sec'] = round(io_metrics.get('Physical Reads Per Sec', 0), 2)
-            result['io']['physical_writes_per_sec'] = round(io_metrics.get('Physical Writes Per Sec', 0), 2)
-            result['io']['read_bytes_per_sec'] = round(io_metrics.get('Physical Read Bytes Per Sec', 0), 2)
-            result['io']['write_bytes_per_sec'] = round(io_metrics.get('Physical Write Bytes Per Sec', 0), 2)
-            result['io']['io_mb_per_sec'] = round(io_metrics.get('I/O Megabytes per Second', 0), 2)
-            result['io']['io_requests_per_sec'] = round(io_metrics.get('I/O Requests per Second', 0), 2)
-            
-        except Exception as e:
-            print(f"Warning: Could not fetch I/O stats: {e}")
-        
-        cur.close()
-        conn.close()
-        
+            stats = _read_resource_stats(cur, state)
+        finally:
+            cur.close()
+
+    result = {
+        'timestamp': datetime.now().isoformat(),
+        'cpu': {},
+        'memory': {},
+        'io': {},
+        'load': {}
+    }
+    now = time.monotonic()
+
+    # 0. Start instance - epocha pro detekci resetu čítačů
+    if 'instance' in stats:
+        startup_time = stats['instance'].get('STARTUP_TIME')
+        state.instance_epoch = startup_time.isoformat() if startup_time else None
+        result['instance_startup'] = state.instance_epoch
+
+    # 1. CPU Utilization z V$OSSTAT
+    if 'os' in stats:
+        os_stats = stats['os']
+
+        # CPU utilization calculation
+        busy_time = os_stats.get('BUSY_TIME', 0)
+        idle_time = os_stats.get('IDLE_TIME', 0)
+        total_time = busy_time + idle_time
+
+        if total_time > 0:
+            cpu_utilization = round((busy_time / total_time) * 100, 2)
+        else:
+            cpu_utilization = 0
+
+        # Vytížení za poslední interval, průměr od startu jen jako fallback
+        busy_delta = state.deltas.delta(('os', 'BUSY_TIME'), busy_time, now, state.instance_epoch)
+        idle_delta = state.deltas.delta(('os', 'IDLE_TIME'), idle_time, now, state.instance_epoch)
+        if busy_delta and idle_delta and busy_delta[0] + idle_delta[0] > 0:
+            result['cpu']['utilization_pct'] = round(busy_delta[0] / (busy_delta[0] + idle_delta[0]) * 100, 2)
+            result['cpu']['interval_sec'] = round(busy_delta[1], 2)
+        else:
+            result['cpu']['utilization_pct'] = cpu_utilization
+        result['cpu']['utilization_since_startup_pct'] = cpu_utilization
+        result['cpu']['num_cpus'] = os_stats.get('NUM_CPUS', 0)
+        result['cpu']['num_cpu_cores'] = os_stats.get('NUM_CPU_CORES', 0)
+        result['cpu']['busy_time'] = busy_time
+        result['cpu']['idle_time'] = idle_time
+        result['load']['load_average'] = os_stats.get('LOAD', 0)
+
+        # Physical memory
+        physical_memory_bytes = os_stats.get('PHYSICAL_MEMORY_BYTES', 0)
+        result['memory']['physical_memory_gb'] = round(physical_memory_bytes / (1024**3), 2)
+
+    # 2. CPU a Memory z V$SYSMETRIC (60-second average)
+    if 'sysmetric' in stats:
+        sysmetrics = stats['sysmetric']
+        result['cpu']['host_cpu_utilization_pct'] = round(sysmetrics.get('Host CPU Utilization (%)', 0), 2)
+        result['cpu']['cpu_usage_per_sec'] = round(sysmetrics.get('CPU Usage Per Sec', 0), 2)
+        result['cpu']['db_cpu_time_ratio'] = round(sysmetrics.get('Database CPU Time Ratio', 0), 2)
+
+    # 3. DB CPU Time Model
+    if 'time_model' in stats:
+        time_model = stats['time_model']
+        result['cpu']['db_cpu_time_sec'] = time_model.get('DB CPU', 0)
+        result['cpu']['background_cpu_time_sec'] = time_model.get('background cpu time', 0)
+        result['cpu']['db_time_sec'] = time_model.get('DB time', 0)
+
+        # Average Active Sessions = DB time za sekundu
+        for key, stat in (('aas', 'DB time'), ('db_cpu_per_sec', 'DB CPU'),
+                          ('background_cpu_per_sec', 'background cpu time')):
+            result['cpu'][key] = state.deltas.rate(('time_model', stat), time_model.get(stat),
+                                                   now, state.instance_epoch)
+
+    # 4. Memory Stats z V$SGASTAT
+    if 'sga' in stats:
+        result['memory']['sga_pools'] = [{'pool': pool, 'size_mb': round(mb, 2)}
+                                         for pool, mb in stats['sga'].items()]
+    if 'sga_total' in stats:
+        result['memory']['total_sga_mb'] = stats['sga_total'].get('total')
+
+    # 5. PGA Memory
+    if 'pga' in stats:
+        pga_stats = stats['pga']
+        result['memory']['pga_allocated_mb'] = pga_stats.get('total PGA allocated', 0)
+        result['memory']['pga_inuse_mb'] = pga_stats.get('total PGA inuse', 0)
+        result['memory']['pga_max_allocated_mb'] = pga_stats.get('maximum PGA allocated', 0)
+
+    # 6. I/O Stats (také V$SYSMETRIC)
+    if 'sysmetric' in stats:
+        io_metrics = stats['sysmetric']
+        result['io']['physical_reads_per_sec'] = round(io_metrics.get('Physical Reads Per Sec', 0), 2)
+        result['io']['physical_writes_per_sec'] = round(io_metrics.get('Physical Writes Per Sec', 0), 2)
+        result['io']['read_bytes_per_sec'] = round(io_metrics.get('Physical Read Bytes Per Sec', 0), 2)
+        result['io']['write_bytes_per_sec'] = round(io_metrics.get('Physical Write Bytes Per Sec', 0), 2)
+        result['io']['io_mb_per_sec'] = round(io_metrics.get('I/O Megabytes per Second', 0), 2)
+        result['io']['io_requests_per_sec'] = round(io_metrics.get('I/O Requests per Second', 0), 2)
+
+    cpu = result['cpu']
+    aas_per_cpu = cpu['aas'] / cpu['num_cpus'] if cpu.get('aas') is not None and cpu.get('num_cpus') else None
+    _observe_load(state, {'cpu.aas_per_cpu': aas_per_cpu,
+                          'cpu.host_cpu_utilization_pct': cpu.get('host_cpu_utilization_pct')})
+    return result
+
+
+def fetch_system_resources(target=None, timings=False):
+    """Vrátí systémové zdroje (CPU, Memory, I/O), krátce cachované pro všechny klienty"""
+    if replay_player is not None:
+        return replay_player.resources()
+    target = target or registry.default
+    state = target_state(target)
+    trace = Trace() if timings else None
+    try:
+        result, age, loaded = state.cache.get(
+            ('system_resources',),
+            timed(trace, 'system_resources', lambda: _collect_system_resources(target, state, trace)))
+        result = dict(result, _age_sec=round(age, 2))
+        if trace is not None:
+            result['_timings'] = trace.to_dict()
         return result
-        
     except oracledb.Error as error:
-        print(f"Oracle error in fetch_system_resources: {error}")
+        print(f"Oracle error in fetch_system_resources ({target.id}): {error}")
         return None
     except Exception as e:
-        print(f"Unexpected error in fetch_system_resources: {e}")
+        print(f"Unexpected error in fetch_system_resources ({target.id}): {e}")
         return None
 
-def run_custom_query(query):
-    """Vykoná vlastní SQL dotaz (pouze SELECT)"""
+
+def fetch_statement_stats(target=None):
+    """
+    Parse vs. execute statistiky dotazů kolektorů: počty execute() na straně
+    klienta a PARSE_CALLS/EXECUTIONS/LOADS z V$SQLAREA monitorované DB.
+    """
+    target = target or registry.default
+    state = target_state(target)
     try:
-        # Bezpečnostní kontrola - pouze SELECT dotazy
-        query_upper = query.upper().strip()
-        if not query_upper.startswith('SELECT'):
-            return {'error': 'Only SELECT queries are allowed', 'status': 403}
-        
-        # Zakázané klíčová slova pro větší bezpečnost
-        dangerous_keywords = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'TRUNCATE', 'GRANT', 'REVOKE']
-        for keyword in dangerous_keywords:
-            if keyword in query_upper:
-                return {'error': f'Keyword {keyword} is not allowed', 'status': 403}
-        
-        conn = get_oracle_connection()
-        cur = conn.cursor()
-        
-        # Vykonání dotazu
-        cur.execute(query)
-        
-        # Získání názvů sloupců
-        columns = [desc[0] for desc in cur.description] if cur.description else []
-        
-        # Získání dat
+        with get_oracle_connection(target) as conn:
+            cur = InstrumentedCursor(conn.cursor(), state.statements)
+            cur.execute(queries.SQL_STATEMENT_STATS, module=Config.ORACLE_MODULE)
+            rows = cur.fetchall()
+            cur.close()
+    except oracledb.Error as error:
+        print(f"Oracle error in fetch_statement_stats ({target.id}): {error}")
+        return None
+
+    client = state.statements.counts()
+    statements = {}
+    for sql_id, sql_text, parse_calls, executions, loads, version_count in rows:
+        name = match_statement(sql_text or '')
+        if name is None:
+            continue
+        # Víc sql_id pro jeden název = různé texty (např. literály místo bind proměnných)
+        entry = statements.setdefault(name, {'name': name, 'sql_ids': [], 'parse_calls': 0,
+                                             'executions': 0, 'loads': 0, 'version_count': 0})
+        entry['sql_ids'].append(sql_id)
+        entry['parse_calls'] += parse_calls or 0
+        entry['executions'] += executions or 0
+        entry['loads'] += loads or 0
+        entry['version_count'] += version_count or 0
+    for name in client:
+        if name in queries.STATEMENTS:
+            statements.setdefault(name, {'name': name, 'sql_ids': []})
+    for entry in statements.values():
+        entry['client_executes'] = client.get(entry['name'], 0)
+        if entry.get('executions'):
+            entry['parse_pct'] = round(entry['parse_calls'] / entry['executions'] * 100, 2)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'module': Config.ORACLE_MODULE,
+        'stmtcachesize': Config.ORACLE_STMT_CACHE_SIZE,
+        'statements': sorted(statements.values(), key=lambda e: e.get('executions', 0), reverse=True),
+        'custom_executes': client.get('custom', 0),
+    }
+
+
+def fetch_top_sql(order='elapsed', window=300, limit=20, target=None):
+    """
+    Žebříček SQL podle přírůstků za posledních window s (None = kumulativně
+    od načtení do shared poolu). Z DB se čtou jen příkazy aktivní od minulého
+    průchodu a texty, které ještě nejsou v cache.
+    """
+    target = target or registry.default
+    state = target_state(target)
+    try:
+        with get_oracle_connection(target) as conn:
+            conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+            cur = InstrumentedCursor(conn.cursor(), state.statements)
+            _refresh_top_sql(cur, state)
+            ranked, covered = _ranked_sql(cur, state, order, window, limit)
+            cur.close()
+    except oracledb.Error as error:
+        print(f"Oracle error in fetch_top_sql ({target.id}): {error}")
+        return None
+
+    statements = []
+    for sql_id, (executions, elapsed, cpu, gets, reads, processed) in ranked:
+        schema, text = state.sql_texts.get(sql_id) or (None, None)
+        statements.append({
+            'sql_id': sql_id,
+            'sql_text': text,
+            'parsing_schema': schema,
+            'executions': executions,
+            'elapsed_sec': round(elapsed / 1e6, 3),
+            'cpu_sec': round(cpu / 1e6, 3),
+            'buffer_gets': gets,
+            'disk_reads': reads,
+            'rows_processed': processed,
+            'elapsed_per_exec_ms': round(elapsed / executions / 1000, 3) if executions else None,
+        })
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'order': order,
+        'window_sec': window,
+        # Kratší než window_sec, dokud tracker neběží dost dlouho
+        'window_covered_sec': covered,
+        'statements': statements,
+        'tracker': dict(state.topsql.stats(), texts=state.sql_texts.stats()),
+    }
+
+
+def fetch_table_stats(sort='num_rows', descending=True, search=None, tablespace=None, stale=False,
+                      offset=0, limit=50, target=None):
+    """Stránka statistik tabulek s řazením a filtrem nad pamětí (DB jen při obnově)"""
+    target = target or registry.default
+    state = target_state(target)
+    store = state.table_stats
+    if store.due(Config.TABLE_STATS_REFRESH_INTERVAL):
+        try:
+            with get_oracle_connection(target) as conn:
+                conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+                cur = InstrumentedCursor(conn.cursor(), state.statements)
+                _refresh_table_stats(cur, state)
+                cur.close()
+        except oracledb.Error as error:
+            print(f"Oracle error in fetch_table_stats ({target.id}): {error}")
+            # Starší data jsou lepší než nic
+            if store.last_check is None:
+                return None
+
+    tables, total = store.query(sort, descending, search, tablespace, stale, offset, limit)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'sort': sort,
+        'order': 'desc' if descending else 'asc',
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'tables': tables,
+        'summary': store.summary(),
+        'store': store.stats(),
+    }
+
+
+def fetch_capacity(target=None):
+    """Prognózy zaplnění tablespaců (aktuální stav ze sekce tablespaces, ta zároveň plní modely)"""
+    target = target or registry.default
+    state = target_state(target)
+    metrics = fetch_metrics(sections=['tablespaces'], target=target)
+    tablespaces = state.capacity.forecast(Config.CAPACITY_MIN_SAMPLES)
+    if metrics is None and not tablespaces:
+        return None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'min_samples': Config.CAPACITY_MIN_SAMPLES,
+        'sample_interval_sec': Config.CAPACITY_SAMPLE_INTERVAL,
+        'tablespaces': tablespaces,
+    }
+
+
+def fetch_capacity_detail(name, days=30, horizon_days=30, target=None):
+    """Vzorky a předpověď obsazeného místa jednoho tablespace pro graf"""
+    target = target or registry.default
+    return target_state(target).capacity.detail(name, days, horizon_days, Config.CAPACITY_MIN_SAMPLES)
+
+
+def refresh_top_sql(target=None):
+    """Průběžné načtení přírůstků top SQL (sampler), aby okna žebříčku měla jemné kroky"""
+    target = target or registry.default
+    state = target_state(target)
+    if not state.topsql.due(Config.TOPSQL_REFRESH_INTERVAL):
+        return
+    with get_oracle_connection(target) as conn:
+        conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+        cur = InstrumentedCursor(conn.cursor(), state.statements)
+        _refresh_top_sql(cur, state)
+        cur.close()
+
+
+def sample_active_sessions(target=None):
+    """Jeden ASH vzorek: [(sid, serial, username, sql_id, event, wait_class, 0 = CPU / 1 = čekání)]"""
+    target = target or registry.default
+    state = target_state(target)
+    with get_oracle_connection(target) as conn:
+        conn.call_timeout = int(Config.METRICS_SECTION_TIMEOUT * 1000)
+        cur = InstrumentedCursor(conn.cursor(), state.statements)
+        cur.execute(queries.SQL_ASH_SAMPLE)
         rows = cur.fetchall()
-        
-        # Konverze dat na JSON-serializable formát
-        result_data = []
-        for row in rows:
-            row_dict = {}
-            for i, col in enumerate(columns):
-                value = row[i]
-                # Konverze datetime objektů
-                if hasattr(value, 'isoformat'):
-                    value = value.isoformat()
-                row_dict[col] = value
-            result_data.append(row_dict)
-        
         cur.close()
-        conn.close()
-        
-        return {
-            'success': True,
-            'columns': columns,
-            'data': result_data,
-            'row_count': len(result_data),
-            'timestamp': datetime.now().isoformat()
-        }
-        
+    # Vzorek každou sekundu - změnu počtu aktivních sessions zachytí dřív než sampler
+    _observe_load(state, {'ash.active_sessions': len(rows)})
+    return rows
+
+
+def fetch_sql_text(sql_id, target=None):
+    """Celý text příkazu (SQL_FULLTEXT) na vyžádání - žebříček posílá jen prvních 1000 znaků"""
+    target = target or registry.default
+    state = target_state(target)
+    try:
+        with get_oracle_connection(target) as conn:
+            cur = InstrumentedCursor(conn.cursor(), state.statements)
+            cur.execute(queries.SQL_TOP_SQL_FULLTEXT, sql_id=sql_id)
+            row = cur.fetchone()
+            if row is not None:
+                # CLOB se musí dočíst, dokud je spojení otevřené
+                row = (row[0], row[1], row[2].read() if hasattr(row[2], 'read') else row[2])
+            cur.close()
+    except oracledb.Error as error:
+        print(f"Oracle error in fetch_sql_text ({target.id}): {error}")
+        return None
+    if row is None:
+        return {'error': f'SQL not found in the shared pool: {sql_id}', 'status': 404}
+    return {'sql_id': row[0], 'parsing_schema': row[1], 'sql_text': row[2]}
+
+
+# Typy sloupců, které se v JSON posílají jako ISO řetězec (až po načtení ovladače)
+_date_types = None
+
+
+def _is_date_type(type_code):
+    global _date_types
+    if _date_types is None:
+        _date_types = (oracledb.DB_TYPE_DATE, oracledb.DB_TYPE_TIMESTAMP,
+                       oracledb.DB_TYPE_TIMESTAMP_TZ, oracledb.DB_TYPE_TIMESTAMP_LTZ)
+    return type_code in _date_types
+
+
+# Otevřené kurzory stránkovaných dotazů (/api/execute-query s page_size)
+query_cursors = CursorRegistry(Config.QUERY_MAX_OPEN_CURSORS, Config.QUERY_CURSOR_IDLE_TIMEOUT)
+# Výsledky celých dotazů podle (cíl, normalizované SQL) a limit souběžných dotazů do DB
+query_results = QueryResultCache(Config.QUERY_CACHE_TTL, int(Config.QUERY_CACHE_MAX_MB * 1024 * 1024),
+                                 Config.QUERY_CACHE_MAX_ENTRIES)
+query_limiter = QueryLimiter(Config.QUERY_MAX_CONCURRENT, Config.QUERY_MAX_PER_USER,
+                             Config.QUERY_MAX_QUEUED, Config.QUERY_QUEUE_TIMEOUT)
+
+
+def check_custom_query(query):
+    """Bezpečnostní kontrola vlastního dotazu; vrátí chybu, nebo None"""
+    # Bezpečnostní kontrola - pouze SELECT dotazy
+    query_upper = query.upper().strip()
+    if not query_upper.startswith('SELECT'):
+        return {'error': 'Only SELECT queries are allowed', 'status': 403}
+
+    # Zakázané klíčová slova pro větší bezpečnost
+    dangerous_keywords = ['INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'TRUNCATE', 'GRANT', 'REVOKE']
+    for keyword in dangerous_keywords:
+        if keyword in query_upper:
+            return {'error': f'Keyword {keyword} is not allowed', 'status': 403}
+    return None
+
+
+def _open_query_cursor(conn, query):
+    """Vykoná dotaz s vyladěným fetchováním; vrátí (kurzor, sloupce, indexy datumových sloupců)"""
+    conn.call_timeout = int(Config.QUERY_TIME_LIMIT * 1000)
+    cur = conn.cursor()
+    # Větší dávky = méně round tripů; prefetch vrátí první dávku už s execute
+    cur.arraysize = Config.QUERY_ARRAYSIZE
+    cur.prefetchrows = Config.QUERY_ARRAYSIZE + 1
+    cur.execute(query)
+    description = cur.description or []
+    columns = [desc[0] for desc in description]
+    date_columns = [i for i, desc in enumerate(description) if _is_date_type(desc[1])]
+    return cur, columns, date_columns
+
+
+def _convert_rows(rows, date_columns):
+    """Řádky jako seznamy; datumy (podle typu sloupce, ne po hodnotách) jako ISO řetězec"""
+    if not date_columns:
+        return [list(row) for row in rows]
+    converted = []
+    for row in rows:
+        row = list(row)
+        for i in date_columns:
+            if row[i] is not None:
+                row[i] = row[i].isoformat()
+        converted.append(row)
+    return converted
+
+
+def _fetch_rows(cur, limit, deadline):
+    """Načte nejvýše limit řádků po dávkách; vrátí (řádky, vyčerpáno, důvod oříznutí)"""
+    rows = []
+    while len(rows) < limit:
+        batch = cur.fetchmany(min(cur.arraysize, limit - len(rows)))
+        if not batch:
+            return rows, True, None
+        rows.extend(batch)
+        if time.monotonic() > deadline:
+            return rows, False, 'time_limit'
+    return rows, False, None
+
+
+def _query_page(state, page_size, max_rows):
+    """Další stránka otevřeného dotazu"""
+    deadline = time.monotonic() + Config.QUERY_TIME_LIMIT
+    limit = min(page_size, max_rows - state.rows_sent)
+    rows, exhausted, truncated = _fetch_rows(state.cur, limit, deadline)
+    state.rows_sent += len(rows)
+    if not exhausted and truncated is None and state.rows_sent >= max_rows:
+        truncated = 'max_rows'
+    return _convert_rows(rows, state.date_columns), exhausted, truncated
+
+
+def _query_result(columns, rows, columnar=False, **extra):
+    result = {
+        'success': True,
+        'columns': columns,
+        # Sloupcový formát posílá řádky jako pole, bez opakování názvů sloupců
+        ('rows' if columnar else 'data'): rows if columnar else [dict(zip(columns, row)) for row in rows],
+        'row_count': len(rows),
+        'timestamp': datetime.now().isoformat()
+    }
+    result.update(extra)
+    return result
+
+
+def _result_size(rows):
+    """Hrubý odhad paměti výsledku v B (řetězce podle délky, ostatní hodnoty po 16 B)"""
+    return sum(64 + sum(len(value) if isinstance(value, str) else 16 for value in row) for row in rows)
+
+
+def _busy_error(error):
+    return {'error': str(error), 'retry_after': error.retry_after,
+            'timestamp': datetime.now().isoformat(), 'status': 429}
+
+
+def _cancelled_error():
+    # 499 = klient zavřel spojení (nginx), odpověď už stejně nikdo nepřečte
+    return {'error': 'Query cancelled, client disconnected', 'timestamp': datetime.now().isoformat(), 'status': 499}
+
+
+def acquire_query_slot(user):
+    """Místo pro streamovaný dotaz (uvolní se query_limiter.release); vrátí chybu, nebo None"""
+    try:
+        query_limiter.acquire(user)
+    except QueryBusy as error:
+        return _busy_error(error)
+    return None
+
+
+def _run_full_query(query, target, user, disconnected):
+    """Celý výsledek najednou, ale nejvýše QUERY_MAX_ROWS řádků: (sloupce, řádky, důvod oříznutí)"""
+    with query_limiter.slot(user):
+        with get_oracle_connection(target) as conn:
+            with DisconnectWatch(conn, disconnected) as watch:
+                try:
+                    cur, columns, date_columns = _open_query_cursor(conn, query)
+                    deadline = time.monotonic() + Config.QUERY_TIME_LIMIT
+                    rows, exhausted, truncated = _fetch_rows(cur, Config.QUERY_MAX_ROWS, deadline)
+                    if not exhausted and truncated is None and cur.fetchone() is None:
+                        exhausted = True
+                    cur.close()
+                except oracledb.Error:
+                    if watch.cancelled:
+                        raise QueryCancelled()
+                    raise
+    if not exhausted and truncated is None:
+        truncated = 'max_rows'
+    return columns, _convert_rows(rows, date_columns), truncated
+
+
+def run_custom_query(query, page_size=None, columnar=False, target=None, user=None, disconnected=None,
+                     use_cache=True):
+    """
+    Vykoná vlastní SQL dotaz (pouze SELECT); s page_size vrací po stránkách.
+    Celé výsledky se sdílí přes query_results, do DB jde nejvýš
+    QUERY_MAX_CONCURRENT dotazů; disconnected() hlásí odpojení klienta.
+    """
+    target = target or registry.default
+    try:
+        error = check_custom_query(query)
+        if error:
+            return error
+
+        if page_size is None:
+            def load():
+                result = _run_full_query(query, target, user, disconnected)
+                # Oříznutí časem závisí na zátěži DB - takový výsledek se neukládá
+                return result, _result_size(result[1]) if result[2] != 'time_limit' else None
+
+            if use_cache:
+                (columns, rows, truncated), age = query_results.get((target.id, normalize_sql(query)), load)
+            else:
+                (columns, rows, truncated), age = load()[0], None
+            return _query_result(columns, rows, columnar, truncated=truncated, cached=age is not None,
+                                 cache_age_sec=round(age, 3) if age is not None else None)
+
+        with query_limiter.slot(user):
+            conn = get_oracle_connection(target)
+            try:
+                with DisconnectWatch(conn, disconnected) as watch:
+                    try:
+                        cur, columns, date_columns = _open_query_cursor(conn, query)
+                        state = OpenCursor(conn, cur, columns, date_columns)
+                        rows, exhausted, truncated = _query_page(state, page_size, Config.QUERY_MAX_ROWS)
+                    except oracledb.Error:
+                        if watch.cancelled:
+                            raise QueryCancelled()
+                        raise
+            except Exception:
+                conn.close()
+                raise
+        if exhausted or truncated == 'max_rows':
+            state.close()
+            return _query_result(columns, rows, columnar, cursor=None, has_more=False, truncated=truncated)
+        token = query_cursors.add(state)
+        return _query_result(columns, rows, columnar, cursor=token, has_more=True, truncated=truncated)
+
+    except QueryBusy as error:
+        return _busy_error(error)
+    except QueryCancelled:
+        return _cancelled_error()
     except oracledb.Error as error:
         return {'error': f'Oracle error: {str(error)}', 'timestamp': datetime.now().isoformat(), 'status': 500}
     except Exception as e:
         return {'error': f'Error: {str(e)}', 'timestamp': datetime.now().isoformat(), 'status': 500}
+
+
+def fetch_query_page(token, page_size, columnar=False, user=None, disconnected=None):
+    """Další stránka dříve otevřeného dotazu podle tokenu kurzoru"""
+    state = query_cursors.get(token)
+    if state is None:
+        return {'error': 'Cursor not found or expired', 'status': 404}
+    try:
+        with query_limiter.slot(user), state.lock:
+            # Kurzor zavřený (reap, vytlačení) během čekání na slot
+            if not state.begin():
+                return {'error': 'Cursor not found or expired', 'status': 404}
+            try:
+                with DisconnectWatch(state.conn, disconnected) as watch:
+                    try:
+                        rows, exhausted, truncated = _query_page(state, page_size, Config.QUERY_MAX_ROWS)
+                    except oracledb.Error:
+                        if watch.cancelled:
+                            raise QueryCancelled()
+                        raise
+            finally:
+                state.end()
+        has_more = not exhausted and truncated != 'max_rows'
+        if not has_more:
+            query_cursors.close(token)
+        return _query_result(state.columns, rows, columnar, cursor=token if has_more else None,
+                             has_more=has_more, truncated=truncated)
+    except QueryBusy as error:
+        return _busy_error(error)
+    except QueryCancelled:
+        query_cursors.close(token)
+        return _cancelled_error()
+    except oracledb.Error as error:
+        query_cursors.close(token)
+        return {'error': f'Oracle error: {str(error)}', 'timestamp': datetime.now().isoformat(), 'status': 500}
+
+
+def stream_custom_query(query, target=None, disconnected=None):
+    """
+    Generátor NDJSON: nejdřív {"columns": [...]}, pak jeden řádek jako pole
+    na řádek a nakonec {"row_count", "truncated", "elapsed_sec"}. Paměť drží
+    jen jednu dávku (arraysize) bez ohledu na velikost výsledku.
+    """
+    start = time.monotonic()
+    deadline = start + Config.QUERY_TIME_LIMIT
+    row_count = 0
+    truncated = None
+    try:
+        with get_oracle_connection(target) as conn, DisconnectWatch(conn, disconnected):
+            cur, columns, _ = _open_query_cursor(conn, query)
+            yield dumps({'columns': columns}) + '\n'
+            while True:
+                batch = cur.fetchmany(min(cur.arraysize, Config.QUERY_MAX_ROWS - row_count))
+                if not batch:
+                    break
+                row_count += len(batch)
+                # Jeden chunk na dávku, datumy řeší default jen u ne-JSON hodnot
+                yield ''.join(dumps(row) + '\n' for row in batch)
+                if row_count >= Config.QUERY_MAX_ROWS:
+                    truncated = 'max_rows' if cur.fetchone() is not None else None
+                    break
+                if time.monotonic() > deadline:
+                    truncated = 'time_limit'
+                    break
+            cur.close()
+    except oracledb.Error as error:
+        yield dumps({'error': f'Oracle error: {str(error)}'}) + '\n'
+        return
+    yield dumps({'row_count': row_count, 'truncated': truncated,
+                 'elapsed_sec': round(time.monotonic() - start, 3)}) + '\n'
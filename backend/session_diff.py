@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+
+# Odvozené rychlosti se u aktivní session mění každým sběrem - samy o sobě změnu nezakládají
+RATE_FIELDS = ('reads_per_sec', 'cpu_pct')
+
+
+def session_key(row):
+    return (row['sid'], row['serial'])
+
+
+class SessionVersions:
+    """
+    Posledních N verzí seznamu sessions (V$SESSION) pro inkrementální diffy.
+
+    Klient si pamatuje číslo verze a příště dostane jen přidané, odebrané a
+    změněné sessions podle klíče (SID, SERIAL#). Pokud jeho verze už vypadla,
+    dostane celý seznam. Sloupce ignore_fields se při hledání změn neporovnávají
+    (u jinak změněné session se pošlou aktuální).
+    """
+
+    def __init__(self, max_versions=20, max_cached_diffs=64, ignore_fields=RATE_FIELDS):
+        self.max_versions = max_versions
+        self.max_cached_diffs = max_cached_diffs
+        self.ignore_fields = frozenset(ignore_fields)
+        self._lock = threading.Lock()
+        self._versions = OrderedDict()
+        self._latest_rows = None
+        self._next_version = 1
+        self._diffs = OrderedDict()
+
+    def publish(self, rows):
+        """Zaregistruje seznam sessions a vrátí jeho verzi (stejný seznam = stejná verze)"""
+        with self._lock:
+            if rows is self._latest_rows:
+                return next(reversed(self._versions))
+            version = self._next_version
+            self._next_version += 1
+            self._versions[version] = {session_key(row): row for row in rows}
+            self._latest_rows = rows
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+            return version
+
+    def diff(self, since, version):
+        """Rozdíl mezi verzemi since a version, nebo None, pokud since už není v paměti"""
+        with self._lock:
+            cached = self._diffs.get((since, version))
+            if cached is not None:
+                return cached
+            old = self._versions.get(since)
+            new = self._versions.get(version)
+        if old is None or new is None:
+            return None
+
+        added = [row for key, row in new.items() if key not in old]
+        removed = [list(key) for key in old if key not in new]
+        # U změněných sessions jen klíč a sloupce, které se liší
+        changed = []
+        for key, row in new.items():
+            previous = old.get(key)
+            if previous is None or previous == row:
+                continue
+            fields = {name: value for name, value in row.items() if previous.get(name) != value}
+            if fields.keys() <= self.ignore_fields:
+                continue
+            fields['sid'], fields['serial'] = key
+            changed.append(fields)
+        result = {'added': added, 'removed': removed, 'changed': changed}
+
+        with self._lock:
+            self._diffs[(since, version)] = result
+            while len(self._diffs) > self.max_cached_diffs:
+                self._diffs.popitem(last=False)
+        return result
+
+    def rows(self, version):
+        with self._lock:
+            sessions = self._versions.get(version)
+        return list(sessions.values()) if sessions is not None else None
@@ -0,0 +1,37 @@
+"""
+Config z config.py doplněný o výchozí hodnoty z config.py.example.
+
+config.py se při instalaci zkopíruje z příkladu a dál se neaktualizuje, takže
+v kopii ze starší verze chybí nastavení přidaná později (AttributeError při
+prvním použití). Moduly proto importují Config odsud: chybějící atributy se
+převezmou z config.py.example (včetně proměnných z .env) a vypíše se varování.
+"""
+import importlib.machinery
+import importlib.util
+import os
+
+from config import Config
+
+_EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.py.example')
+
+
+def _example_config():
+    loader = importlib.machinery.SourceFileLoader('config_example', _EXAMPLE)
+    spec = importlib.util.spec_from_file_location('config_example', _EXAMPLE, loader=loader)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Config
+
+
+def apply_defaults(config, defaults):
+    """Doplní do config nastavení, která má jen defaults; vrátí jejich jména"""
+    missing = [name for name in vars(defaults) if name.isupper() and not hasattr(config, name)]
+    for name in missing:
+        setattr(config, name, getattr(defaults, name))
+    return missing
+
+
+if os.path.exists(_EXAMPLE):
+    _missing = apply_defaults(Config, _example_config())
+    if _missing:
+        print(f"Warning: config.py is older than config.py.example, using defaults for: {', '.join(_missing)}")
@@ -0,0 +1,94 @@
+import threading
+import time
+import queries
+import telemetry
+
+# Text dotazu -> název z queries.STATEMENTS
+_NAMES = {sql: name for name, sql in queries.STATEMENTS.items()}
+# Normalizovaný text (bez nadbytečných mezer) pro dohledání ve V$SQLAREA
+_NORMALIZED = {' '.join(sql.split()): name for name, sql in queries.STATEMENTS.items()}
+
+
+def statement_name(sql):
+    """Název statického dotazu, nebo 'custom' pro ostatní (vlastní dotazy)"""
+    return _NAMES.get(sql, 'custom')
+
+
+def match_statement(sql_text):
+    """
+    Název dotazu podle SQL_TEXT z V$SQLAREA (prvních 1000 znaků textu),
+    nebo None, pokud nejde o žádný ze statických dotazů.
+    """
+    prefix = ' '.join(sql_text.split())
+    if not prefix:
+        return None
+    if prefix in _NORMALIZED:
+        return _NORMALIZED[prefix]
+    for normalized, name in _NORMALIZED.items():
+        if normalized.startswith(prefix):
+            return name
+    return None
+
+
+class StatementCounter:
+    """Počty provedení dotazů kolektorů jedné cílové DB podle názvu (strana klienta)"""
+
+    def __init__(self, target_id):
+        self.target_id = target_id
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, name):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class InstrumentedCursor:
+    """
+    Kurzor, který měří každý dotaz od execute() po dočtení (další execute()
+    nebo close()) - latenci, počet řádků a chyby do telemetry, volitelně i do
+    trace požadavku. Ostatní volání předává původnímu kurzoru.
+    """
+
+    def __init__(self, cur, counter, trace=None):
+        self._cur = cur
+        self._counter = counter
+        self._trace = trace
+        self._statement = None
+        self._start = None
+
+    def _finish(self):
+        if self._statement is None:
+            return
+        elapsed = time.perf_counter() - self._start
+        telemetry.observe_query(self._counter.target_id, self._statement, elapsed, self._cur.rowcount or 0)
+        if self._trace is not None:
+            self._trace.query(self._statement, elapsed)
+        self._statement = None
+
+    def execute(self, statement, parameters=None, **keyword_parameters):
+        self._finish()
+        name = statement_name(statement)
+        self._counter.record(name)
+        self._start = time.perf_counter()
+        try:
+            result = self._cur.execute(statement, parameters, **keyword_parameters)
+        except Exception as e:
+            telemetry.query_error(self._counter.target_id, name, e)
+            raise
+        self._statement = name
+        return self if result is self._cur else result
+
+    def close(self):
+        self._finish()
+        self._cur.close()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
@@ -0,0 +1,212 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from settings import Config
+from encoding import dumps
+from services import fetch_metrics, fetch_system_resources, poll_interval
+
+
+class Subscriber:
+    """Jeden SSE klient - vlastní filtr sekcí a omezená fronta zpráv"""
+
+    def __init__(self, sections, resources, sql_limit, max_queue):
+        self.sections = tuple(sections) if sections else ()
+        self.resources = resources
+        self.sql_limit = sql_limit
+        self.queue = queue.Queue(maxsize=max_queue)
+        # Celkem zahozených zpráv (statistika) a zahození po sobě (odpojení zaseknutého klienta)
+        self.dropped = 0
+        self.dropped_in_row = 0
+        self.closed = False
+
+    @property
+    def filter_key(self):
+        return (self.sections, self.resources, self.sql_limit)
+
+    def offer(self, message):
+        """Vloží zprávu; pomalému klientovi zahodí nejstarší (chce jen aktuální stav)"""
+        dropped = False
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                # Klient frontu mezitím čte - občasné zahození ho neodpojí
+                self.dropped_in_row = self.dropped_in_row + 1 if dropped else 0
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                    dropped = True
+                except queue.Empty:
+                    pass
+
+
+class StreamFull(Exception):
+    """Plný počet odběratelů - každý SSE klient drží jedno vlákno serveru"""
+
+
+class Broadcaster:
+    """
+    Sbírá snapshot jednou za interval (při adaptivních intervalech podle
+    zátěže výchozí DB) a rozesílá ho všem SSE odběratelům.
+
+    Zátěž DB tak nezávisí na počtu otevřených dashboardů. Sběrné vlákno běží
+    jen pokud existuje alespoň jeden odběratel.
+    """
+
+    def __init__(self, interval, max_queue=2, max_dropped=50, max_subscribers=None):
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._wakeup = threading.Event()
+        self.broadcasts = 0
+        self.rejected = 0
+
+    def next_interval(self):
+        return poll_interval() or self.interval
+
+    def subscribe(self, sections=None, resources=True, sql_limit=50):
+        subscriber = Subscriber(sections, resources, sql_limit, self.max_queue)
+        with self._lock:
+            if self.max_subscribers and len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                raise StreamFull(f'Too many stream subscribers (max {self.max_subscribers})')
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='broadcaster', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.closed = True
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        self._wakeup.set()
+
+    def _collect(self, subscribers):
+        """Jeden sběr pro všechny - sjednocení sekcí požadovaných odběrateli"""
+        payloads = {}
+        resources = None
+        if any(s.resources for s in subscribers):
+            resources = fetch_system_resources()
+
+        by_limit = {}
+        for s in subscribers:
+            if s.sections:
+                by_limit.setdefault(s.sql_limit, set()).update(s.sections)
+        metrics = {limit: fetch_metrics(sql_limit=limit, sections=sorted(sections))
+                   for limit, sections in by_limit.items()}
+
+        # Serializace jednou pro každou kombinaci filtru, ne pro každého klienta
+        for s in subscribers:
+            if s.filter_key in payloads:
+                continue
+            payload = {'timestamp': datetime.now().isoformat()}
+            if s.resources:
+                payload['system_resources'] = resources
+            if s.sections:
+                full = metrics.get(s.sql_limit)
+                if full is None:
+                    payload['error'] = 'Failed to fetch metrics from Oracle'
+                else:
+                    payload['metrics'] = _select_sections(full, s.sections)
+            payloads[s.filter_key] = format_event('snapshot', payload)
+        return payloads
+
+    def _run(self):
+        next_run = time.monotonic()
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._thread = None
+                    return
+            try:
+                payloads = self._collect(subscribers)
+            except Exception as e:
+                print(f"Warning: Broadcast collection failed: {e}")
+                payloads = {s.filter_key: format_event('error', {'error': str(e)}) for s in subscribers}
+
+            for s in subscribers:
+                s.offer(payloads[s.filter_key])
+                # Klient, který nepřečetl nic za max_dropped snapshotů po sobě, se odpojí
+                if s.dropped_in_row > self.max_dropped:
+                    self.unsubscribe(s)
+            self.broadcasts += 1
+
+            next_run += self.next_interval()
+            if next_run < time.monotonic():
+                next_run = time.monotonic()
+            # Čekání na další sběr; odhlášení posledního klienta vlákno probudí
+            while self._subscribers and time.monotonic() < next_run:
+                self._wakeup.wait(next_run - time.monotonic())
+                self._wakeup.clear()
+
+    def close(self):
+        """Ukončí streamy všech odběratelů (při vypnutí serveru, jinak by držely vlákna)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for s in subscribers:
+            s.offer(format_event('shutdown', {'timestamp': datetime.now().isoformat()}))
+            self.unsubscribe(s)
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'subscribers': len(subscribers),
+            'max_subscribers': self.max_subscribers,
+            'rejected': self.rejected,
+            'interval_sec': self.next_interval(),
+            'broadcasts': self.broadcasts,
+            'dropped': sum(s.dropped for s in subscribers),
+        }
+
+
+def _select_sections(metrics, sections):
+    """Z odpovědi fetch_metrics vybere jen klíče a metadata daných sekcí"""
+    keys = {'timestamp'}
+    for name in sections:
+        if name == 'sessions':
+            keys.update(('active_sessions', 'total_sessions'))
+        else:
+            keys.add(name)
+    selected = {key: value for key, value in metrics.items() if key in keys}
+    selected['_sections'] = {name: info for name, info in metrics.get('_sections', {}).items()
+                             if name in sections}
+    errors = {name: error for name, error in metrics.get('_errors', {}).items() if name in sections}
+    if errors:
+        selected['_errors'] = errors
+    return selected
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+
+def event_stream(broadcaster, subscriber, heartbeat):
+    """Generátor SSE zpráv pro jednoho klienta; při odpojení se odhlásí"""
+    try:
+        yield f"retry: {int(broadcaster.interval * 1000)}\n\n"
+        while not subscriber.closed:
+            try:
+                yield subscriber.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                # Komentář jako keepalive - odhalí i odpojeného klienta
+                yield ": keepalive\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+def stream_limit(threads):
+    """Strop SSE odběratelů pro server s pevným počtem vláken - aspoň polovina zůstane REST API"""
+    limit = max(1, threads // 2)
+    return min(limit, Config.STREAM_MAX_SUBSCRIBERS) if Config.STREAM_MAX_SUBSCRIBERS else limit
+
+
+broadcaster = Broadcaster(Config.STREAM_INTERVAL, max_subscribers=Config.STREAM_MAX_SUBSCRIBERS or None)
@@ -0,0 +1,180 @@
+import threading
+import time
+from datetime import datetime
+
+# Sloupce řádku tabulky v úložišti (pořadí jako SQL_TABLE_STATS)
+COLUMNS = ('table_name', 'num_rows', 'blocks', 'avg_row_len', 'last_analyzed', 'tablespace')
+# ?sort= -> klíč řazení (None se řadí jako nejmenší hodnota)
+SORT_KEYS = {
+    'table_name': lambda t: t['table_name'],
+    'num_rows': lambda t: t['num_rows'],
+    'blocks': lambda t: t['blocks'],
+    'avg_row_len': lambda t: t['avg_row_len'],
+    'last_analyzed': lambda t: t['last_analyzed'] or datetime.min,
+    'tablespace': lambda t: t['tablespace'] or '',
+    'modifications': lambda t: t['modifications'],
+    'stale_pct': lambda t: t['stale_pct'] if t['stale_pct'] is not None else -1.0,
+}
+
+# Od kolika % změněných řádků (DBA_TAB_MODIFICATIONS) jsou statistiky zastaralé - výchozí STALE_PERCENT
+STALE_PERCENT = 10.0
+
+
+class TableStatsStore:
+    """
+    Statistiky tabulek schématu v paměti, obnovované po změnách.
+
+    NUM_ROWS/BLOCKS se mění jen při sběru statistik, takže se celý DBA_TABLES
+    čte jen poprvé, při změně sady tabulek (počet, OBJECT_ID, CREATED - i drop
+    a nové vytvoření se stejným jménem) nebo jednou za full_interval;
+    jinak jen tabulky s novějším LAST_ANALYZED. Řazení, filtr a stránkování
+    běží nad pamětí.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Obnovy se nesmí překrývat - souběžný požadavek počká a použije výsledek
+        self.refresh_lock = threading.Lock()
+        self._tables = {}
+        self._modifications = {}
+        self._shape = None
+        self.max_analyzed = None
+        self.last_check = None
+        self.last_full = None
+        self.full_loads = 0
+        self.incremental_loads = 0
+        self.changed_rows = 0
+        # Výsledky řazení a souhrn pro aktuální verzi dat
+        self._version = 0
+        self._sorted = {}
+        self._summary = None
+
+    def due(self, interval, now=None):
+        if now is None:
+            now = time.monotonic()
+        return self.last_check is None or now - self.last_check >= interval
+
+    def needs_full(self, shape, full_interval, now=None):
+        """Celé načtení: poprvé, změna sady tabulek (create/drop) nebo po full_interval"""
+        if now is None:
+            now = time.monotonic()
+        return self.last_full is None or shape != self._shape or now - self.last_full >= full_interval
+
+    def replace(self, rows, shape):
+        """rows ze SQL_TABLE_STATS, shape = (počet, součet OBJECT_ID, max CREATED) ze signatury"""
+        with self._lock:
+            self._tables = {row[0]: row for row in rows}
+            self._shape = shape
+            self.max_analyzed = max((row[4] for row in rows if row[4] is not None), default=None)
+            self.last_full = time.monotonic()
+            self.full_loads += 1
+            self._changed()
+
+    def update(self, rows):
+        """Přepíše tabulky s novými statistikami (řádky s LAST_ANALYZED > max_analyzed)"""
+        with self._lock:
+            for row in rows:
+                self._tables[row[0]] = row
+                if row[4] is not None and (self.max_analyzed is None or row[4] > self.max_analyzed):
+                    self.max_analyzed = row[4]
+            self.incremental_loads += 1
+            self.changed_rows += len(rows)
+            self._changed()
+
+    def set_modifications(self, rows):
+        """DML od posledního sběru statistik: [(table_name, inserts + updates + deletes)]"""
+        modifications = {name: count or 0 for name, count in rows}
+        with self._lock:
+            if modifications != self._modifications:
+                self._modifications = modifications
+                self._changed()
+
+    def checked(self):
+        self.last_check = time.monotonic()
+
+    def _changed(self):
+        self._version += 1
+        self._sorted = {}
+        self._summary = None
+
+    def _table(self, row):
+        name, num_rows, blocks, avg_row_len, last_analyzed, tablespace = row
+        modifications = self._modifications.get(name, 0)
+        return {
+            'table_name': name,
+            'num_rows': num_rows or 0,
+            'blocks': blocks or 0,
+            'avg_row_len': avg_row_len or 0,
+            'last_analyzed': last_analyzed,
+            'tablespace': tablespace,
+            'modifications': modifications,
+            # Bez statistik nelze poměr spočítat
+            'stale_pct': round(modifications / num_rows * 100, 2) if num_rows else None,
+        }
+
+    def _ordered(self, sort, descending):
+        key = (sort, descending)
+        ordered = self._sorted.get(key)
+        if ordered is None:
+            tables = [self._table(row) for row in self._tables.values()]
+            # Stabilní druhotné řazení podle názvu
+            tables.sort(key=SORT_KEYS['table_name'])
+            tables.sort(key=SORT_KEYS[sort], reverse=descending)
+            ordered = self._sorted[key] = tables
+        return ordered
+
+    def query(self, sort='num_rows', descending=True, search=None, tablespace=None, stale=False,
+              offset=0, limit=50):
+        """Vrátí (stránka tabulek, počet po filtru)"""
+        with self._lock:
+            tables = self._ordered(sort, descending)
+        if search:
+            needle = search.upper()
+            tables = [t for t in tables if needle in t['table_name'].upper()]
+        if tablespace:
+            tables = [t for t in tables if t['tablespace'] == tablespace]
+        if stale:
+            tables = [t for t in tables if t['last_analyzed'] is None
+                      or (t['stale_pct'] is not None and t['stale_pct'] >= STALE_PERCENT)]
+        if limit is None:
+            return tables[offset:], len(tables)
+        return tables[offset:offset + limit], len(tables)
+
+    def summary(self, top=10):
+        """Souhrn pro karty a grafy (počty, top tabulky, rozložení po tablespacech)"""
+        with self._lock:
+            if self._summary is not None:
+                return self._summary
+            by_rows = self._ordered('num_rows', True)
+            by_blocks = self._ordered('blocks', True)
+            tablespaces = {}
+            for table in by_rows:
+                name = table['tablespace'] or 'UNKNOWN'
+                tablespaces[name] = tablespaces.get(name, 0) + 1
+            self._summary = {
+                'tables': len(by_rows),
+                'total_rows': sum(t['num_rows'] for t in by_rows),
+                'total_blocks': sum(t['blocks'] for t in by_rows),
+                'analyzed': sum(1 for t in by_rows if t['last_analyzed'] is not None),
+                'stale': sum(1 for t in by_rows if t['stale_pct'] is not None and t['stale_pct'] >= STALE_PERCENT),
+                'tablespaces': tablespaces,
+                'top_by_rows': by_rows[:top],
+                'top_by_blocks': by_blocks[:top],
+            }
+            return self._summary
+
+    def rows(self):
+        """Všechny tabulky jako řádky COLUMNS, seřazené podle NUM_ROWS (sekce table_stats)"""
+        with self._lock:
+            return sorted(self._tables.values(), key=lambda row: (-(row[1] or 0), row[0]))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tables': len(self._tables),
+                'with_modifications': len(self._modifications),
+                'full_loads': self.full_loads,
+                'incremental_loads': self.incremental_loads,
+                'changed_rows': self.changed_rows,
+                'max_analyzed': self.max_analyzed.isoformat() if self.max_analyzed else None,
+            }
@@ -0,0 +1,31 @@
+class Table:
+    """
+    Tabulková sekce snapshotu: názvy sloupců jednou, řádky jako n-tice přímo
+    z kurzoru. Seznam slovníků (výchozí formát odpovědi) se z ní vytvoří až
+    na vyžádání a jen jednou za životnost sekce v cache.
+    """
+    __slots__ = ('columns', 'rows', '_records')
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self._records = None
+
+    def records(self):
+        if self._records is None:
+            columns = self.columns
+            self._records = [dict(zip(columns, row)) for row in self.rows]
+        return self._records
+
+    def columnar(self):
+        return {'columns': self.columns, 'rows': self.rows}
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def render(value, columnar=False):
+    """Převede Table na seznam slovníků, nebo na {'columns', 'rows'}"""
+    if isinstance(value, Table):
+        return value.columnar() if columnar else value.records()
+    return value
@@ -0,0 +1,105 @@
+import json
+import os
+from settings import Config
+
+
+class Target:
+    """Jedna monitorovaná databáze (instance nebo PDB)"""
+
+    def __init__(self, id, user, password, host, port, service, name=None, interval=None):
+        self.id = id
+        self.name = name or id
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = int(port)
+        self.service = service
+        # Vlastní interval sběru scheduleru (None = SCHEDULER_INTERVAL)
+        self.interval = float(interval) if interval is not None else None
+
+    @property
+    def dsn(self):
+        return f"{self.user}@{self.host}:{self.port}/{self.service}"
+
+    def to_dict(self):
+        # Bez hesla - jde do API odpovědí
+        return {
+            'id': self.id,
+            'name': self.name,
+            'database': self.dsn,
+            'interval_sec': self.interval or Config.SCHEDULER_INTERVAL,
+        }
+
+
+class TargetRegistry:
+    """Seznam cílových DB podle id; první (nebo označená "default") obsluhuje neprefixované routy"""
+
+    def __init__(self, targets, default_id=None):
+        if not targets:
+            raise ValueError('At least one target is required')
+        self._targets = {}
+        for target in targets:
+            if target.id in self._targets:
+                raise ValueError(f"Duplicate target id: {target.id}")
+            self._targets[target.id] = target
+        self.default = self._targets[default_id] if default_id else targets[0]
+
+    def get(self, target_id=None):
+        """Cíl podle id (None = výchozí), nebo None pro neznámé id"""
+        if target_id is None:
+            return self.default
+        return self._targets.get(target_id)
+
+    def ids(self):
+        return list(self._targets)
+
+    def __iter__(self):
+        return iter(list(self._targets.values()))
+
+    def __len__(self):
+        return len(self._targets)
+
+
+def _env_target():
+    """Jediný cíl z ORACLE_* proměnných (původní chování)"""
+    return Target('default', Config.ORACLE_USER, Config.ORACLE_PASSWORD, Config.ORACLE_HOST,
+                  Config.ORACLE_PORT, Config.ORACLE_SERVICE)
+
+
+def _parse_target(entry):
+    if 'id' not in entry:
+        raise ValueError(f"Target without id: {entry.get('name', entry.get('host'))}")
+    # Heslo může být v proměnné prostředí, aby nemuselo být v souboru
+    password = entry.get('password')
+    if password is None and entry.get('password_env'):
+        password = os.getenv(entry['password_env'])
+    return Target(
+        id=str(entry['id']),
+        name=entry.get('name'),
+        # Chybějící údaje se berou z ORACLE_* (např. společný monitorovací účet)
+        user=entry.get('user', Config.ORACLE_USER),
+        password=password if password is not None else Config.ORACLE_PASSWORD,
+        host=entry.get('host', Config.ORACLE_HOST),
+        port=entry.get('port', Config.ORACLE_PORT),
+        service=entry.get('service', Config.ORACLE_SERVICE),
+        interval=entry.get('interval'),
+    )
+
+
+def load_targets(path):
+    """
+    Načte cíle z JSON souboru ({"targets": [{"id": ..., "host": ..., ...}]}).
+
+    Pokud soubor neexistuje, monitoruje se jediná DB z ORACLE_* proměnných.
+    """
+    if not path or not os.path.exists(path):
+        return TargetRegistry([_env_target()])
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('targets', []) if isinstance(data, dict) else data
+    targets = [_parse_target(entry) for entry in entries]
+    default_id = next((t.id for t, e in zip(targets, entries) if e.get('default')), None)
+    return TargetRegistry(targets, default_id)
+
+
+registry = load_targets(Config.TARGETS_FILE)
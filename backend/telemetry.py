@@ -0,0 +1,209 @@
+import bisect
+import threading
+import time
+from flask import g, request
+
+# Hranice histogramů latence (s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PREFIX = 'oracle_monitor_'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    Metriky procesu (histogramy, čítače, gauge) s labely a jejich export
+    v textovém formátu Prometheus pro /api/metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._gauges = {}
+
+    def _series(self, name, kind, help_text):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {'kind': kind, 'help': help_text, 'series': {}}
+        return metric['series']
+
+    def observe(self, name, help_text, labels, value, buckets=LATENCY_BUCKETS):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, 'histogram', help_text)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, help_text, labels, value=1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, 'counter', help_text)
+            series[key] = series.get(key, 0) + value
+
+    def gauge(self, name, help_text, callback):
+        """callback() -> {((label, hodnota), ...): hodnota gauge}; volá se až při exportu"""
+        self._gauges[name] = (help_text, callback)
+
+    def render(self):
+        with self._lock:
+            metrics = []
+            for name, metric in sorted(self._metrics.items()):
+                if metric['kind'] == 'histogram':
+                    series = [(key, h.buckets, list(h.counts), h.sum, h.count)
+                              for key, h in metric['series'].items()]
+                else:
+                    series = list(metric['series'].items())
+                metrics.append((PREFIX + name, metric['kind'], metric['help'], series))
+
+        lines = []
+        for name, kind, help_text, series in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for key, value in series:
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+                continue
+            for key, buckets, counts, total, count in series:
+                # Buckety jsou kumulativní, poslední je +Inf
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + [None], counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound is None else _number(float(bound))
+                    lines.append(f"{name}_bucket{_labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(round(total, 6))}")
+                lines.append(f"{name}_count{_labels(key)} {count}")
+
+        for name, (help_text, callback) in sorted(self._gauges.items()):
+            try:
+                values = callback()
+            except Exception as e:
+                print(f"Warning: Gauge {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for key, value in values.items():
+                if value is not None:
+                    lines.append(f"{PREFIX}{name}{_labels(key)} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def observe_query(target_id, statement, seconds, rows):
+    labels = {'target': target_id, 'statement': statement}
+    registry.observe('query_duration_seconds', 'Collector query latency (execute to last fetch)', labels, seconds)
+    registry.inc('query_rows_total', 'Rows fetched by collector queries', labels, rows)
+
+
+def query_error(target_id, statement, error):
+    code = getattr(error.args[0], 'full_code', None) if error.args else None
+    registry.inc('query_errors_total', 'Failed collector queries', {
+        'target': target_id, 'statement': statement, 'code': code or type(error).__name__})
+
+
+def observe_acquire(target_id, seconds):
+    registry.observe('pool_acquire_seconds', 'Time to borrow a connection from the pool',
+                     {'target': target_id}, seconds)
+
+
+def acquire_error(target_id, timeout):
+    registry.inc('pool_acquire_errors_total', 'Failed connection acquires',
+                 {'target': target_id, 'reason': 'timeout' if timeout else 'error'})
+
+
+def section_error(target_id, section):
+    registry.inc('section_errors_total', 'Metric sections that failed to load',
+                 {'target': target_id, 'section': section})
+
+
+class Trace:
+    """Časy jednoho požadavku pro blok _timings (plní ho i vlákna paralelního sběru)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.sections = {}
+        self.queries = {}
+        self.acquire_ms = 0.0
+
+    def section(self, name, seconds):
+        with self._lock:
+            self.sections[name] = round(seconds * 1000, 3)
+
+    def query(self, name, seconds):
+        with self._lock:
+            self.queries[name] = round(self.queries.get(name, 0.0) + seconds * 1000, 3)
+
+    def acquire(self, seconds):
+        with self._lock:
+            self.acquire_ms += seconds * 1000
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+                'acquire_ms': round(self.acquire_ms, 3),
+                # Sekce bez záznamu přišly z cache
+                'sections': dict(self.sections),
+                'queries': dict(self.queries),
+            }
+
+
+def timed(trace, name, loader):
+    """Obalí loader sekce měřením do trace (None = bez měření)"""
+    if trace is None:
+        return loader
+
+    def wrapper():
+        start = time.perf_counter()
+        try:
+            return loader()
+        finally:
+            trace.section(name, time.perf_counter() - start)
+    return wrapper
+
+
+def start_request():
+    """before_request: začátek měření route handleru"""
+    g.telemetry_start = time.perf_counter()
+
+
+def record_request(response):
+    """after_request: latence route handleru podle pravidla URL, metody a statusu"""
+    start = g.pop('telemetry_start', None)
+    if start is not None:
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        registry.observe('http_request_duration_seconds', 'API route handler latency', {
+            'route': rule, 'method': request.method, 'status': str(response.status_code)},
+            time.perf_counter() - start)
+    return response
@@ -0,0 +1,51 @@
+"""
+Testy backendu nad fake driverem z bench/ (bez Oracle instance).
+
+Spouštět z adresáře backend: `python -m pytest -q`. Ovladač a config se
+podstrčí dřív, než se načte první modul aplikace; soubory (historie, cíle,
+pravidla alarmů, záznamy) jdou do dočasného adresáře.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
+_DATA_DIR = tempfile.mkdtemp(prefix='oracle-monitoring-tests-')
+for _name, _value in {'TARGETS_FILE': 'targets.json', 'HISTORY_DB_PATH': 'history.db',
+                      'ALERT_RULES_FILE': 'alert_rules.json', 'RECORDING_DIR': 'recordings'}.items():
+    os.environ[_name] = os.path.join(_DATA_DIR, _value)
+os.environ['REPLAY_FILE'] = ''
+
+from bench import install  # noqa: E402
+
+fake_oracledb = install(connect_latency=0, query_latency=0)
+
+
+@pytest.fixture
+def pools():
+    """Čisté pooly a statistiky spojení před testem i po něm"""
+    import db
+    db.close_pool()
+    db._stats.clear()
+    yield db
+    db.close_pool()
+    db._stats.clear()
+
+
+@pytest.fixture
+def client(pools):
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def target_states(monkeypatch):
+    """Nový stav sběru (cache, čítače, žebříčky) všech cílů pro jeden test"""
+    import services
+    monkeypatch.setattr(services, '_states', {})
+    return services.target_state
@@ -0,0 +1,155 @@
+import time
+
+import pytest
+
+from alerts import AlertEngine, Rule, collect_values
+
+
+def _engine(*rules, **kwargs):
+    return AlertEngine([Rule.from_dict(rule) for rule in rules], **kwargs)
+
+
+def _feed(engine, values, start=0, metric='m', target='db'):
+    now = time.time()
+    for i, value in enumerate(values, start):
+        engine.observe(target, {metric: value}, ts=now + i)
+
+
+def test_rule_from_dict_maps_for_and_clear():
+    rule = Rule.from_dict({'name': 'r', 'metric': 'cpu.*', 'warning': 80, 'for': 3, 'clear': 2})
+    assert (rule.for_samples, rule.clear_samples) == (3, 2)
+    assert rule.to_dict()['for'] == 3
+    assert rule.applies('db', 'cpu.host')
+    assert not rule.applies('db', 'sessions.active')
+
+
+@pytest.mark.parametrize('entry', [
+    {'name': 'r', 'metric': 'm', 'type': 'bogus', 'warning': 1},
+    {'name': 'r', 'metric': 'm'},
+    {'name': 'r', 'metric': 'm', 'type': 'anomaly', 'direction': 'sideways'},
+    {'metric': 'm', 'warning': 1},
+])
+def test_invalid_rules_rejected(entry):
+    with pytest.raises(ValueError):
+        Rule.from_dict(entry)
+
+
+def test_threshold_fires_after_for_samples_and_escalates():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80, 'critical': 95, 'for': 2})
+    _feed(engine, [90])
+    assert engine.active() == []
+    _feed(engine, [91, 97], start=1)
+    alert, = engine.active()
+    assert alert['severity'] == 'critical'
+    assert alert['threshold'] == 95
+    assert alert['peak'] == 97
+    assert alert['stale'] is False
+
+
+def test_threshold_hysteresis_and_clear_samples():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80, 'hysteresis': 5, 'clear': 2})
+    _feed(engine, [85, 77, 70])
+    # 77 drží alarm díky hysterezi, 70 je první vzorek v pořádku
+    assert len(engine.active()) == 1
+    _feed(engine, [70], start=3)
+    assert engine.active() == []
+    resolved, = engine.history()
+    assert resolved['resolved_value'] == 70
+
+
+def test_threshold_below():
+    engine = _engine({'name': 'free', 'metric': 'm', 'warning': 10, 'above': False})
+    _feed(engine, [50, 5, 3])
+    alert, = engine.active()
+    assert alert['peak'] == 3
+
+
+def test_anomaly_fires_on_spike_after_warmup():
+    engine = _engine({'name': 'spike', 'metric': 'm', 'type': 'anomaly', 'z': 4, 'warmup': 20,
+                      'min_delta': 5, 'direction': 'up'})
+    _feed(engine, [10, 11] * 10)
+    assert engine.active() == []
+    _feed(engine, [40], start=20)
+    alert, = engine.active()
+    assert alert['baseline'] == pytest.approx(10.5, abs=0.5)
+    assert alert['z_score'] > 4
+
+
+def test_anomaly_min_delta_suppresses_small_change_on_flat_baseline():
+    engine = _engine({'name': 'spike', 'metric': 'm', 'type': 'anomaly', 'z': 3, 'warmup': 5,
+                      'min_delta': 5})
+    _feed(engine, [2] * 10 + [4])
+    assert engine.active() == []
+
+
+def test_anomaly_adapts_to_level_shift():
+    # Plochá báze a trvalá změna úrovně - alarm nesmí zůstat viset navždy
+    engine = _engine({'name': 'shift', 'metric': 'm', 'type': 'anomaly', 'z': 4, 'warmup': 10,
+                      'min_delta': 1, 'adapt_after': 5})
+    _feed(engine, [2] * 10)
+    _feed(engine, [10] * 60, start=10)
+    assert engine.active() == []
+    assert engine.stats()['fired'] == 1
+    assert engine.stats()['resolved'] == 1
+
+
+def test_observe_sections_skips_cached_section():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80, 'for': 2})
+    now = time.time()
+    engine.observe_sections('db', {'s': (100.0, {'m': 90})}, ts=now)
+    # Stejný čas načtení = hodnota z cache, nepočítá se jako další porušení
+    engine.observe_sections('db', {'s': (100.0, {'m': 90})}, ts=now + 1)
+    assert engine.active() == []
+    engine.observe_sections('db', {'s': (101.0, {'m': 90})}, ts=now + 2)
+    assert len(engine.active()) == 1
+
+
+def test_observe_sections_resolves_vanished_metric():
+    engine = _engine({'name': 'full', 'metric': 'tablespace.*.pct_used', 'warning': 85})
+    now = time.time()
+    engine.observe_sections('db', {'tablespaces': (1.0, {'tablespace.USERS.pct_used': 90,
+                                                         'tablespace.DATA.pct_used': 10})}, ts=now)
+    assert len(engine.active()) == 1
+    # Tablespace USERS zrušen
+    engine.observe_sections('db', {'tablespaces': (2.0, {'tablespace.DATA.pct_used': 10})}, ts=now + 1)
+    assert engine.active() == []
+    resolved, = engine.history()
+    assert resolved['resolved_value'] is None
+    assert engine.stats()['series'] == 1
+
+
+def test_active_marks_stale_target():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80}, stale_after=10)
+    engine.observe('old', {'m': 90}, ts=time.time() - 100)
+    engine.observe('fresh', {'m': 90})
+    stale = {alert['target']: alert['stale'] for alert in engine.active()}
+    assert stale == {'old': True, 'fresh': False}
+
+
+def test_rule_targets_filter():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80, 'targets': ['prod']})
+    engine.observe('test', {'m': 99})
+    engine.observe('prod', {'m': 99})
+    assert [alert['target'] for alert in engine.active()] == ['prod']
+
+
+def test_non_numeric_values_ignored():
+    engine = _engine({'name': 'cpu', 'metric': 'm', 'warning': 80})
+    engine.observe('db', {'m': None})
+    engine.observe('db', {'m': True})
+    engine.observe('db', {'m': 'high'})
+    assert engine.stats()['evaluations'] == 0
+
+
+def test_collect_values_uses_section_fetch_times():
+    metrics = {
+        'active_sessions': 7,
+        'total_sessions': 40,
+        'tablespaces': [{'name': 'USERS', 'pct_used': 50.0}],
+        '_sections': {'sessions': {'fetched_at': 10.0}, 'tablespaces': {'fetched_at': 8.0}},
+    }
+    sections = collect_values(None, metrics)
+    assert sections == {
+        'sessions': (10.0, {'sessions.active': 7, 'sessions.total': 40}),
+        'tablespaces': (8.0, {'tablespace.USERS.pct_used': 50.0}),
+    }
@@ -0,0 +1,106 @@
+import pytest
+
+from ash import ON_CPU, WAITING, AshBuffer
+
+
+def _row(sid, sql_id='a', event=None, state=ON_CPU):
+    return sid, 1, 'APP', sql_id, event, 'User I/O' if event else None, state
+
+
+def _fill(buffer, samples, rows_per_sample=1, first_ts=0):
+    for i in range(samples):
+        ts = float(first_ts + i)
+        buffer.append(ts, [_row(i * rows_per_sample + j, sql_id=f'sql{int(ts)}') for j in range(rows_per_sample)])
+
+
+def _logical_ts(buffer):
+    return [ts for begin, end in buffer._ranges(float('-inf')) for ts in buffer._columns['ts'][begin:end]]
+
+
+def test_partial_buffer():
+    buffer = AshBuffer(10)
+    _fill(buffer, 4)
+    assert buffer._ranges(0) == [(0, 4)]
+    assert buffer._ranges(2) == [(2, 4)]
+    assert buffer._ranges(100) == [(4, 4)]
+    assert buffer.stats()['rows'] == 4 and buffer.stats()['oldest_ts'] == 0
+
+
+def test_wraparound_overwrites_oldest():
+    buffer = AshBuffer(5)
+    _fill(buffer, 8)
+    assert buffer._start == 3
+    assert _logical_ts(buffer) == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert buffer.stats()['oldest_ts'] == 3.0
+    assert buffer.covered(0, 10) == 7.0
+
+
+@pytest.mark.parametrize('since, ranges', [
+    (0, [(3, 5), (0, 3)]),
+    (4, [(4, 5), (0, 3)]),
+    # Hranice přesně na přechodu konec pole -> začátek
+    (5, [(0, 3)]),
+    (6.5, [(2, 3)]),
+    (8, [(3, 3)]),
+])
+def test_ranges_bisect_across_wrap(since, ranges):
+    buffer = AshBuffer(5)
+    _fill(buffer, 8)
+    assert buffer._ranges(since) == ranges
+
+
+def test_several_rows_per_sample_wrap():
+    buffer = AshBuffer(7)
+    _fill(buffer, 5, rows_per_sample=3)
+    assert _logical_ts(buffer) == [2.0, 3.0, 3.0, 3.0, 4.0, 4.0, 4.0]
+    rows, total = buffer.top('sql_id', 3)
+    assert total == 6
+    assert sorted(rows) == [('sql3', 3, 3), ('sql4', 3, 3)]
+
+
+def test_top_and_timeline():
+    buffer = AshBuffer(100)
+    buffer.append(0.0, [_row(1, 'a'), _row(2, 'b', 'db file sequential read', WAITING)])
+    buffer.append(1.0, [_row(1, 'a'), _row(3, 'a', 'db file sequential read', WAITING)])
+    buffer.append(2.0, [_row(1, 'c')])
+    rows, total = buffer.top('sql_id', 0, limit=2)
+    assert total == 5
+    assert rows == [('a', 3, 2), ('b', 1, 0)]
+    rows, _ = buffer.top('session', 1)
+    assert ({'sid': 1, 'serial': 1}, 2, 2) in rows
+
+    labels, series = buffer.timeline('event', 0, bucket=2, limit=1)
+    assert labels == [None, 'other']
+    assert series == [{'ts': 0, 'counts': [2, 2]}, {'ts': 2, 'counts': [1, 0]}]
+
+
+def test_compaction_keeps_live_values():
+    buffer = AshBuffer(4)
+    _fill(buffer, 20)
+    assert buffer.compactions > 0
+    assert buffer.stats()['distinct_values'] <= 2 * 4 + 4
+    rows, total = buffer.top('sql_id', 0)
+    assert total == 4
+    assert sorted(value for value, _, _ in rows) == ['sql16', 'sql17', 'sql18', 'sql19']
+
+
+def test_compaction_before_buffer_is_full():
+    buffer = AshBuffer(42)
+    buffer.append(0.0, [_row(sid, f'sql{sid}') for sid in range(20)])
+    buffer.append(1.0, [_row(sid, f'sql{sid}', f'event{sid}') for sid in range(20)])
+    # None, uživatel, 20 SQL_ID, 20 eventů a třída > capacity - promaže se jen 40 zaplněných řádků
+    assert buffer.compactions == 1
+    assert buffer.stats()['rows'] == 40
+    rows, total = buffer.top('event', 1)
+    assert total == 20 and all(value.startswith('event') for value, _, _ in rows)
+
+
+def test_compaction_is_amortized_when_live_set_exceeds_capacity():
+    buffer = AshBuffer(100)
+    for ts in range(500):
+        # Každý řádek jiné SQL_ID i event - živých hodnot je víc než capacity
+        buffer.append(float(ts), [_row(i, f'sql{ts}-{i}', f'event{ts}-{i}') for i in range(10)])
+    assert buffer.compactions < 50
+    assert buffer.stats()['distinct_values'] <= 2 * (4 * 100 + 1)
+    rows, _ = buffer.top('sql_id', 499)
+    assert sorted(value for value, _, _ in rows) == sorted(f'sql499-{i}' for i in range(10))
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from cache import QueryResultCache, Retry
+
+
+def test_hit_until_ttl(monkeypatch):
+    cache = QueryResultCache(ttl=10)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return 'rows', 10
+
+    assert cache.get('q', load) == ('rows', None)
+    value, age = cache.get('q', load)
+    assert value == 'rows' and age is not None
+    assert len(calls) == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+    assert cache.get('q', load) == ('rows', None)
+    assert len(calls) == 2
+
+
+def test_size_none_is_not_stored():
+    cache = QueryResultCache()
+    cache.get('q', lambda: ('partial', None))
+    assert cache.stats()['entries'] == 0
+
+
+def test_lru_bounded_by_entries_and_bytes():
+    cache = QueryResultCache(max_bytes=100, max_entries=2)
+    for key in 'abc':
+        cache.get(key, lambda: (key, 10))
+    assert cache.stats()['entries'] == 2 and cache.stats()['evictions'] == 1
+    # 'b' použitý naposledy - vyhodí se 'c'
+    cache.get('b', lambda: ('b', 10))
+    cache.get('d', lambda: ('d', 80))
+    stats = cache.stats()
+    assert stats['bytes'] == 90
+    assert cache.get('c', lambda: ('c2', 1))[0] == 'c2'
+    # Větší než celá cache se neukládá vůbec
+    cache.get('huge', lambda: ('h', 1000))
+    assert cache.get('huge', lambda: ('h2', 1000))[0] == 'h2'
+
+
+def test_concurrent_loads_coalesce():
+    cache = QueryResultCache()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(1)
+        return 'rows', 1
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('q', load)[0])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ['rows'] * 4
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 3
+
+
+def test_loader_error_is_shared_and_not_cached():
+    cache = QueryResultCache()
+    with pytest.raises(RuntimeError):
+        cache.get('q', lambda: (_ for _ in ()).throw(RuntimeError('ORA-00942')))
+    assert cache.get('q', lambda: ('rows', 1)) == ('rows', None)
+
+
+def test_retry_lets_waiter_load_itself():
+    cache = QueryResultCache()
+    started = threading.Event()
+    results = []
+
+    def cancelled():
+        started.set()
+        time.sleep(0.05)
+        raise Retry()
+
+    def waiter():
+        started.wait(1)
+        results.append(cache.get('q', lambda: ('own', 1))[0])
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    with pytest.raises(Retry):
+        cache.get('q', cancelled)
+    thread.join()
+    assert results == ['own']
+
+
+@pytest.fixture
+def query_cache():
+    from services import query_results
+    query_results.clear()
+    yield query_results
+    query_results.clear()
+
+
+def test_execute_query_cache_key(client, query_cache):
+    def run(query):
+        response = client.post('/api/execute-query', json={'query': query})
+        assert response.status_code == 200
+        return response.get_json()['cached']
+
+    assert run("select * from t where c = q'[it's abc]'") is False
+    assert run("SELECT *  FROM t WHERE c = q'[it's abc]'") is True
+    assert run("select * from t where c = q'[it's ABC]'") is False
+    assert query_cache.stats()['entries'] == 2
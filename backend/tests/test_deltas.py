@@ -0,0 +1,72 @@
+from deltas import DeltaTracker
+
+
+def test_first_sample_is_baseline():
+    tracker = DeltaTracker()
+    assert tracker.delta('x', 100, now=0) is None
+    assert tracker.delta('x', 150, now=10) == (50, 10)
+
+
+def test_rate_per_second():
+    tracker = DeltaTracker()
+    tracker.rate('x', 1000, now=0)
+    assert tracker.rate('x', 1300, now=4) == 75.0
+    assert tracker.rate('x', 1301, now=7, ndigits=3) == 0.333
+
+
+def test_none_value_keeps_previous_sample():
+    tracker = DeltaTracker()
+    tracker.delta('x', 10, now=0)
+    assert tracker.delta('x', None, now=5) is None
+    assert tracker.delta('x', 20, now=10) == (10, 10)
+
+
+def test_non_positive_interval_is_ignored():
+    tracker = DeltaTracker()
+    tracker.delta('x', 10, now=5)
+    assert tracker.delta('x', 20, now=5) is None
+    assert tracker.delta('x', 30, now=6) == (10, 1)
+
+
+def test_counter_decrease_is_reset():
+    tracker = DeltaTracker()
+    tracker.delta('x', 500, now=0)
+    assert tracker.delta('x', 20, now=10) is None
+    assert tracker.resets == 1
+    assert tracker.delta('x', 50, now=20) == (30, 10)
+
+
+def test_epoch_change_is_reset():
+    tracker = DeltaTracker()
+    tracker.delta('x', 100, now=0, epoch='startup-1')
+    # Restart instance: čítač je náhodou větší, ale epocha jiná
+    assert tracker.delta('x', 200, now=10, epoch='startup-2') is None
+    assert tracker.resets == 1
+    assert tracker.delta('x', 260, now=20, epoch='startup-2') == (60, 10)
+
+
+def test_keys_are_independent():
+    tracker = DeltaTracker()
+    tracker.delta('a', 1, now=0)
+    tracker.delta('b', 100, now=0)
+    assert tracker.delta('a', 3, now=2) == (2, 2)
+    assert tracker.delta('b', 50, now=2) is None
+
+
+def test_stale_keys_pruned_from_delta():
+    tracker = DeltaTracker(max_age=100, prune_interval=10)
+    tracker.delta('gone', 1, now=0)
+    tracker.delta('live', 1, now=0)
+    for now in range(50, 200, 50):
+        tracker.delta('live', now, now=now)
+    assert tracker.stats()['keys'] == 1
+    # Vrácený klíč začíná znovu od základu
+    assert tracker.delta('gone', 5, now=200) is None
+
+
+def test_prune_returns_removed_count():
+    tracker = DeltaTracker(max_age=100)
+    tracker.delta('a', 1, now=0)
+    tracker.delta('b', 1, now=90)
+    assert tracker.prune(now=150) == 1
+    assert tracker.stats() == {'keys': 1, 'resets': 0}
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from settings import Config
+
+
+def test_acquire_and_release_return_connection_to_pool(pools):
+    conn = pools.get_oracle_connection()
+    stats = pools.get_pool_stats()
+    assert stats['open'] is True
+    assert stats['busy'] == 1
+    assert stats['acquired'] == 1
+
+    conn.close()
+    stats = pools.get_pool_stats()
+    assert stats['busy'] == 0
+    assert stats['opened'] >= 1
+    assert stats['acquire_errors'] == 0
+
+
+def test_pool_is_shared_and_reuses_released_connections(pools):
+    first = pools.get_oracle_connection()
+    first.close()
+    second = pools.get_oracle_connection()
+    second.close()
+    assert pools.get_pool(None) is pools.get_pool(None)
+    assert pools.get_pool_stats()['opened'] == max(1, Config.ORACLE_POOL_MIN)
+
+
+def test_session_callback_sets_module(pools):
+    conn = pools.get_oracle_connection()
+    try:
+        assert conn.module == Config.ORACLE_MODULE
+    finally:
+        conn.close()
+
+
+def test_exhausted_pool_times_out_and_counts_timeout(pools, monkeypatch):
+    monkeypatch.setattr(Config, 'ORACLE_POOL_MIN', 1)
+    monkeypatch.setattr(Config, 'ORACLE_POOL_MAX', 1)
+    monkeypatch.setattr(Config, 'ORACLE_POOL_TIMEOUT', 0.05)
+    held = pools.get_oracle_connection()
+    try:
+        with pytest.raises(pools.oracledb.Error):
+            pools.get_oracle_connection()
+    finally:
+        held.close()
+    stats = pools.get_pool_stats()
+    assert stats['acquired'] == 1
+    assert stats['acquire_errors'] == 1
+    assert stats['acquire_timeouts'] == 1
+
+
+def test_warm_pool_opens_requested_connections(pools, monkeypatch):
+    monkeypatch.setattr(Config, 'ORACLE_POOL_MAX', 4)
+    assert pools.warm_pool(connections=3, statements=['SELECT 1 FROM DUAL']) == 3
+    stats = pools.get_pool_stats()
+    assert stats['opened'] == 3
+    assert stats['busy'] == 0
+
+
+def test_close_pool(pools):
+    pools.get_oracle_connection().close()
+    pools.close_pool()
+    assert pools.get_pool_stats()['open'] is False
+    # Další výpůjčka pool znovu otevře
+    pools.get_oracle_connection().close()
+    assert pools.get_pool_stats()['open'] is True
+
+
+def test_drain_pools_waits_for_borrowed_connections(pools):
+    conn = pools.get_oracle_connection()
+    timer = threading.Timer(0.2, conn.close)
+    timer.start()
+    start = time.monotonic()
+    pools.drain_pools(2)
+    timer.join()
+    assert 0.15 <= time.monotonic() - start < 2
+    assert pools.get_pool_stats()['open'] is False
+
+
+def test_drain_pools_gives_up_after_timeout(pools):
+    conn = pools.get_oracle_connection()
+    start = time.monotonic()
+    pools.drain_pools(0.2)
+    assert time.monotonic() - start < 1
+    assert pools.get_pool_stats()['open'] is False
+    conn.close()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from query_limits import DisconnectWatch, QueryBusy, QueryLimiter, normalize_sql
+
+
+@pytest.mark.parametrize('a, b', [
+    ('select * from t', 'SELECT  *\n FROM T'),
+    ("select 'x' from dual", "SELECT 'x' FROM DUAL"),
+    ('select /*+ full(t) */ * from t', 'SELECT /*+ full(t) */ * from T'),
+    ("select x -- note\nfrom t", "SELECT X -- note\n   FROM T"),
+])
+def test_same_key(a, b):
+    assert normalize_sql(a) == normalize_sql(b)
+
+
+@pytest.mark.parametrize('a, b', [
+    ("select * from t where c = 'abc'", "select * from t where c = 'ABC'"),
+    ('select * from "t"', 'select * from "T"'),
+    ("select * from t where c = q'[it's abc]'", "select * from t where c = q'[it's ABC]'"),
+    ("select * from t where c = Q'{a}b}'", "select * from t where c = Q'{A}b}'"),
+    ("select * from t where c = nq'!it's x!'", "select * from t where c = nq'!it's X!'"),
+    ("select * from t where c = q'<a>' and d = 'x'", "select * from t where c = q'<a>' and d = 'X'"),
+    ('select 1 /* abc */ from dual', 'select 1 /* ABC */ from dual'),
+    ("select 1 -- it's abc\nfrom dual", "select 1 -- it's ABC\nfrom dual"),
+    # Bez konce řádku patří zbytek dotazu do komentáře
+    ('select x -- c\nfrom t', 'select x -- c from t'),
+])
+def test_different_key(a, b):
+    assert normalize_sql(a) != normalize_sql(b)
+
+
+def test_literal_kept_verbatim():
+    assert normalize_sql("select q'[it's abc]' , 'a''b' from dual") == "SELECT q'[it's abc]' , 'a''b' FROM DUAL"
+
+
+def test_limiter_per_user_and_total():
+    limiter = QueryLimiter(max_concurrent=2, per_user=1, max_queued=0, timeout=1)
+    limiter.acquire('a')
+    with pytest.raises(QueryBusy):
+        limiter.acquire('a')
+    limiter.acquire('b')
+    with pytest.raises(QueryBusy):
+        limiter.acquire('c')
+    limiter.release('a')
+    with limiter.slot('c'):
+        assert limiter.stats()['running'] == 2
+    limiter.release('b')
+    stats = limiter.stats()
+    assert (stats['running'], stats['users'], stats['admitted'], stats['rejected']) == (0, 0, 3, 2)
+
+
+def test_limiter_queue_waits_for_release():
+    limiter = QueryLimiter(max_concurrent=1, per_user=1, max_queued=1, timeout=2)
+    limiter.acquire('a')
+    threading.Timer(0.1, limiter.release, ('a',)).start()
+    start = time.monotonic()
+    with limiter.slot('b'):
+        assert time.monotonic() - start >= 0.05
+    assert limiter.stats()['queued'] == 1
+
+
+def test_limiter_queue_timeout():
+    limiter = QueryLimiter(max_concurrent=1, per_user=1, max_queued=1, timeout=0.05)
+    limiter.acquire('a')
+    with pytest.raises(QueryBusy) as error:
+        limiter.acquire('b')
+    assert error.value.retry_after == 0.05
+    assert limiter.stats()['timeouts'] == 1
+    assert limiter.stats()['waiting'] == 0
+
+
+class _Conn:
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+def test_disconnect_watch_cancels_query():
+    conn = _Conn()
+    with DisconnectWatch(conn, lambda: True, interval=0.01) as watch:
+        assert conn.cancelled.wait(1)
+    assert watch.cancelled
+
+
+def test_disconnect_watch_without_server_support():
+    conn = _Conn()
+    with DisconnectWatch(conn, None, interval=0.01) as watch:
+        time.sleep(0.03)
+    assert not watch.cancelled and not conn.cancelled.is_set()
@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+
+from query_cursors import OpenCursor
+from services import query_cursors
+
+QUERY = 'SELECT * FROM paging_rows'
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    from bench import fake_oracledb
+    monkeypatch.setitem(fake_oracledb.settings, 'custom_rows', 250)
+    yield 250
+    query_cursors.close_all()
+
+
+def test_pages_until_exhausted_and_releases_connection(client, rows, pools):
+    response = client.post('/api/execute-query', json={'query': QUERY, 'page_size': 100})
+    assert response.status_code == 200
+    page = response.get_json()
+    assert page['row_count'] == 100 and page['has_more'] is True
+    assert page['data'][0]['ID'] == 0
+    # Rozpracovaný kurzor drží spojení z poolu
+    assert pools.get_pool_stats()['busy'] == 1
+
+    ids = [row['ID'] for row in page['data']]
+    while page['has_more']:
+        page = client.post('/api/execute-query/next',
+                           json={'cursor': page['cursor'], 'page_size': 100}).get_json()
+        ids.extend(row['ID'] for row in page['data'])
+    assert ids == list(range(rows))
+    assert page['cursor'] is None
+    assert len(query_cursors) == 0
+    assert pools.get_pool_stats()['busy'] == 0
+
+
+def test_columnar_page(client, rows):
+    page = client.post('/api/execute-query', json={'query': QUERY, 'page_size': 10,
+                                                   'format': 'columnar'}).get_json()
+    assert page['columns'][:2] == ['ID', 'NAME']
+    assert page['rows'][1][:2] == [1, 'name_1']
+
+
+def test_small_result_is_not_kept_open(client, pools, monkeypatch):
+    from bench import fake_oracledb
+    monkeypatch.setitem(fake_oracledb.settings, 'custom_rows', 5)
+    page = client.post('/api/execute-query', json={'query': QUERY, 'page_size': 100}).get_json()
+    assert page['row_count'] == 5 and page['has_more'] is False
+    assert page['cursor'] is None
+    assert pools.get_pool_stats()['busy'] == 0
+
+
+def test_close_cursor_returns_connection(client, rows, pools):
+    token = client.post('/api/execute-query', json={'query': QUERY, 'page_size': 10}).get_json()['cursor']
+    assert client.delete(f'/api/execute-query/{token}').status_code == 200
+    assert pools.get_pool_stats()['busy'] == 0
+    assert client.post('/api/execute-query/next', json={'cursor': token}).status_code == 404
+    assert client.delete(f'/api/execute-query/{token}').status_code == 404
+
+
+@pytest.mark.parametrize('body', [
+    {'query': QUERY, 'page_size': 'abc'},
+    {'query': QUERY, 'page_size': [1]},
+    {'query': ''},
+])
+def test_bad_request(client, body):
+    assert client.post('/api/execute-query', json=body).status_code == 400
+
+
+def test_next_requires_cursor(client):
+    assert client.post('/api/execute-query/next', json={}).status_code == 400
+    assert client.post('/api/execute-query/next', json={'cursor': 'x', 'page_size': 'abc'}).status_code == 400
+    assert client.post('/api/execute-query/next', json={'cursor': 'unknown'}).status_code == 404
+
+
+def test_non_select_rejected(client):
+    response = client.post('/api/execute-query', json={'query': 'DELETE FROM t', 'page_size': 10})
+    assert response.status_code == 403
+
+
+class _Resource:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def test_close_during_fetch_defers_release():
+    conn, cur = _Resource(), _Resource()
+    state = OpenCursor(conn, cur, ['ID'], [])
+    assert state.begin()
+    state.close()
+    # Spojení se nevrací uprostřed rozpracované stránky
+    assert not conn.closed.is_set()
+    assert not state.begin()
+    state.end()
+    assert conn.closed.is_set() and cur.closed.is_set()
+
+
+def test_registry_evicts_oldest_and_reaps_idle():
+    from query_cursors import CursorRegistry
+    registry = CursorRegistry(max_open=2, idle_timeout=60)
+    states = [OpenCursor(_Resource(), _Resource(), [], []) for _ in range(3)]
+    tokens = [registry.add(state) for state in states]
+    assert states[0].conn.closed.is_set()
+    assert registry.get(tokens[0]) is None
+    assert registry.get(tokens[2]) is states[2]
+
+    states[1].last_used -= 120
+    registry.reap()
+    assert states[1].conn.closed.is_set()
+    assert len(registry) == 1
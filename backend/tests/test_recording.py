@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+import recording
+from recording import (KIND_METRICS, KIND_RESOURCES, Player, Recorder, SnapshotReader, SnapshotWriter,
+                       open_replay)
+from settings import Config
+from targets import registry
+
+
+def _write(path, frames, meta=None):
+    writer = SnapshotWriter(str(path), meta)
+    for kind, ts, obj in frames:
+        writer.append(kind, ts, obj)
+    writer.close()
+    return writer
+
+
+FRAMES = [
+    (KIND_METRICS, 100.0, {'active_sessions': 1, 'sessions': {'columns': ['SID'], 'rows': [[1], [2]]}}),
+    (KIND_RESOURCES, 100.0, {'cpu': {'host_cpu_utilization_pct': 10.0}}),
+    (KIND_METRICS, 105.0, {'active_sessions': 2, 'sessions': {'columns': ['SID'], 'rows': [[3]]}}),
+    (KIND_RESOURCES, 105.0, {'cpu': {'host_cpu_utilization_pct': 20.0}}),
+]
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'a.omr'
+    writer = _write(path, FRAMES, {'target': 'db'})
+    assert writer.stats()['frames'] == 4
+    assert writer.stats()['size_bytes'] == os.path.getsize(path)
+
+    reader = SnapshotReader(str(path))
+    try:
+        assert reader.meta['target'] == 'db' and 'created' in reader.meta
+        assert reader.count() == 4 and reader.count(KIND_METRICS) == 2
+        assert (reader.first_ts, reader.last_ts) == (100.0, 105.0)
+        assert [obj['active_sessions'] for _, obj in reader.frames(KIND_METRICS)] == [1, 2]
+        assert reader.info()['duration_sec'] == 5.0
+    finally:
+        reader.close()
+
+
+def test_find_by_time(tmp_path):
+    path = tmp_path / 'a.omr'
+    _write(path, FRAMES)
+    reader = SnapshotReader(str(path))
+    try:
+        # Před začátkem první rámec, mezi rámci ten předchozí
+        assert reader.find(KIND_METRICS, 50.0)[0] == 100.0
+        ts, offset = reader.find(KIND_METRICS, 104.9)
+        assert ts == 100.0 and reader.read(offset)['active_sessions'] == 1
+        ts, offset = reader.find(KIND_RESOURCES, 1000.0)
+        assert reader.read(offset)['cpu']['host_cpu_utilization_pct'] == 20.0
+    finally:
+        reader.close()
+
+
+def test_existing_file_is_not_overwritten(tmp_path):
+    path = tmp_path / 'a.omr'
+    _write(path, FRAMES)
+    with pytest.raises(FileExistsError):
+        SnapshotWriter(str(path))
+
+
+def test_truncated_tail_is_skipped(tmp_path):
+    path = tmp_path / 'a.omr'
+    _write(path, FRAMES)
+    complete = os.path.getsize(path)
+    # Pád uprostřed zápisu dalšího rámce
+    with open(path, 'ab') as f:
+        f.write(recording._FRAME.pack(KIND_METRICS, 110.0, 1000) + b'partial')
+    with open(str(path) + '.idx', 'ab') as f:
+        f.write(recording._INDEX.pack(KIND_METRICS, 110.0, complete))
+    reader = SnapshotReader(str(path))
+    try:
+        assert reader.count() == 4
+        assert reader.size == complete
+        assert reader.last_ts == 105.0
+    finally:
+        reader.close()
+
+
+@pytest.mark.parametrize('keep', [0, 1, 2.5])
+def test_index_rebuilt_from_frames(tmp_path, keep):
+    path = tmp_path / 'a.omr'
+    _write(path, FRAMES)
+    index = str(path) + '.idx'
+    if keep:
+        with open(index, 'rb') as f:
+            data = f.read(int(keep * recording._INDEX.size))
+        with open(index, 'wb') as f:
+            f.write(data)
+    else:
+        os.remove(index)
+    reader = SnapshotReader(str(path))
+    try:
+        assert reader.count() == 4
+        assert [obj['active_sessions'] for _, obj in reader.frames(KIND_METRICS)] == [1, 2]
+    finally:
+        reader.close()
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / 'bad.omr'
+    path.write_bytes(b'nope')
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+
+def test_empty_recording_cannot_be_replayed(tmp_path):
+    path = tmp_path / 'empty.omr'
+    _write(path, [])
+    with pytest.raises(ValueError):
+        open_replay(str(path))
+
+
+def test_player_serves_frames(tmp_path):
+    path = tmp_path / 'a.omr'
+    _write(path, FRAMES)
+    player = Player(SnapshotReader(str(path)), speed=0)
+    try:
+        metrics = player.metrics()
+        assert metrics['active_sessions'] == 1
+        assert metrics['sessions'] == [{'SID': 1}, {'SID': 2}]
+        assert player.metrics(columnar=True)['sessions']['rows'] == [[1], [2]]
+        player.seek(105.0)
+        assert player.resources()['cpu']['host_cpu_utilization_pct'] == 20.0
+        assert player.metrics()['_replay']['recorded_at'] is not None
+    finally:
+        player.reader.close()
+
+
+def test_recorder_writes_fake_driver_snapshots(tmp_path, pools):
+    path = tmp_path / 'live.omr'
+    writer = SnapshotWriter(str(path), {'target': registry.default.id})
+    recorder = Recorder(writer, registry.default, interval=1)
+    recorder.record_once()
+    writer.close()
+    reader = SnapshotReader(str(path))
+    try:
+        assert reader.count(KIND_METRICS) == 1 and reader.count(KIND_RESOURCES) == 1
+        _, offset = reader.find(KIND_METRICS, reader.last_ts)
+        assert 'timestamp' in reader.read(offset)
+    finally:
+        reader.close()
+
+
+def test_start_recording_picks_unique_file_names(tmp_path, monkeypatch, pools):
+    monkeypatch.setattr(Config, 'RECORDING_DIR', str(tmp_path))
+    paths = []
+    for _ in range(2):
+        recorder = recording.start_recording(registry.default, interval=60)
+        paths.append(recorder.writer.path)
+        recording.stop_recording()
+    assert len(set(paths)) == 2
+    assert all(os.path.exists(path) for path in paths)
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import queries
+import services
+from settings import Config
+from tablestats import TableStatsStore
+
+T0 = datetime(2024, 5, 1)
+
+
+def _row(name, num_rows, analyzed=T0, tablespace='USERS', blocks=10):
+    return name, num_rows, blocks, 100, analyzed, tablespace
+
+
+class _Catalog:
+    """Kurzor nad skriptovaným DBA_TABLES: signatura a řádky podle aktuálního stavu"""
+
+    def __init__(self, rows, object_ids=None, created=T0):
+        self.rows = {row[0]: row for row in rows}
+        self.object_ids = object_ids
+        self.created = created
+        self.executed = []
+        self._result = []
+
+    def execute(self, sql, params=None, **binds):
+        self.executed.append(sql)
+        if sql == queries.SQL_TABLE_STATS_SIGNATURE:
+            analyzed = [row[4] for row in self.rows.values() if row[4] is not None]
+            object_ids = self.object_ids if self.object_ids is not None else len(self.rows)
+            self._result = [(len(self.rows), max(analyzed, default=None), object_ids, self.created)]
+        elif sql == queries.SQL_TABLE_STATS:
+            self._result = list(self.rows.values())
+        elif sql == queries.SQL_TABLE_STATS_CHANGED:
+            self._result = [row for row in self.rows.values() if row[4] is not None and row[4] > binds['since']]
+        elif sql == queries.SQL_TABLE_MODIFICATIONS:
+            self._result = [('A', 30)]
+        else:
+            raise AssertionError(sql)
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return list(self._result)
+
+    def loads(self):
+        return [sql for sql in self.executed if sql in (queries.SQL_TABLE_STATS, queries.SQL_TABLE_STATS_CHANGED)]
+
+
+class _State:
+    def __init__(self):
+        self.table_stats = TableStatsStore()
+
+
+@pytest.fixture
+def refresh(monkeypatch):
+    monkeypatch.setattr(Config, 'TABLE_STATS_REFRESH_INTERVAL', 0)
+    monkeypatch.setattr(Config, 'TABLE_STATS_FULL_REFRESH', 3600)
+    state = _State()
+    return state.table_stats, lambda cur: services._refresh_table_stats(cur, state)
+
+
+def test_first_refresh_is_full_then_nothing_to_load(refresh):
+    store, run = refresh
+    cur = _Catalog([_row('A', 100), _row('B', 5)])
+    run(cur)
+    assert cur.loads() == [queries.SQL_TABLE_STATS]
+    run(cur)
+    assert cur.loads() == [queries.SQL_TABLE_STATS]
+    assert store.stats()['full_loads'] == 1 and store.stats()['incremental_loads'] == 0
+
+
+def test_new_statistics_load_only_changed_tables(refresh):
+    store, run = refresh
+    cur = _Catalog([_row('A', 100), _row('B', 5)])
+    run(cur)
+    cur.rows['B'] = _row('B', 500, T0 + timedelta(hours=1))
+    run(cur)
+    assert cur.loads()[-1] == queries.SQL_TABLE_STATS_CHANGED
+    stats = store.stats()
+    assert (stats['full_loads'], stats['incremental_loads'], stats['changed_rows']) == (1, 1, 1)
+    assert store.rows()[0] == _row('B', 500, T0 + timedelta(hours=1))
+
+
+@pytest.mark.parametrize('change', ['create', 'drop', 'recreate', 'replace'])
+def test_table_set_change_forces_full_reload(refresh, change):
+    store, run = refresh
+    cur = _Catalog([_row('A', 100), _row('B', 5)], object_ids=1000)
+    run(cur)
+    if change == 'create':
+        cur.rows['C'] = _row('C', 1, None)
+    elif change == 'drop':
+        del cur.rows['B']
+    elif change == 'recreate':
+        # Drop a nové vytvoření se stejným jménem: počet i LAST_ANALYZED stejné, jiné OBJECT_ID
+        cur.rows['B'] = _row('B', 0, None)
+        cur.object_ids = 1001
+    else:
+        # Jedna tabulka zrušena, jiná vytvořena - počet stejný
+        del cur.rows['B']
+        cur.rows['C'] = _row('C', 7, T0 - timedelta(days=1))
+        cur.object_ids = 1002
+    run(cur)
+    assert cur.loads() == [queries.SQL_TABLE_STATS, queries.SQL_TABLE_STATS]
+    assert sorted(row[0] for row in store.rows()) == sorted(cur.rows)
+
+
+def test_full_reload_after_interval(refresh, monkeypatch):
+    store, run = refresh
+    cur = _Catalog([_row('A', 100)])
+    run(cur)
+    monkeypatch.setattr(Config, 'TABLE_STATS_FULL_REFRESH', 0)
+    run(cur)
+    assert store.stats()['full_loads'] == 2
+
+
+def test_refresh_interval(refresh, monkeypatch):
+    store, run = refresh
+    cur = _Catalog([_row('A', 100)])
+    run(cur)
+    monkeypatch.setattr(Config, 'TABLE_STATS_REFRESH_INTERVAL', 3600)
+    run(cur)
+    assert cur.executed.count(queries.SQL_TABLE_STATS_SIGNATURE) == 1
+
+
+def test_query_sort_filter_and_page():
+    store = TableStatsStore()
+    store.replace([_row('ORDERS', 1000, tablespace='DATA', blocks=50), _row('ITEMS', 1000, blocks=70),
+                   _row('LOG', 20, None), _row('ORDER_LINES', 5000, tablespace='DATA', blocks=5)], (4, 0, T0))
+    store.set_modifications([('ORDERS', 200), ('ITEMS', 10)])
+
+    tables, total = store.query()
+    # Shodný NUM_ROWS řadí podle názvu
+    assert [t['table_name'] for t in tables] == ['ORDER_LINES', 'ITEMS', 'ORDERS', 'LOG'] and total == 4
+    tables, _ = store.query('blocks', descending=False, limit=2)
+    assert [t['table_name'] for t in tables] == ['ORDER_LINES', 'LOG']
+    tables, total = store.query('table_name', descending=False, offset=1, limit=2)
+    assert [t['table_name'] for t in tables] == ['LOG', 'ORDERS'] and total == 4
+
+    tables, total = store.query(search='order')
+    assert total == 2
+    tables, total = store.query(tablespace='DATA', search='lines')
+    assert [t['table_name'] for t in tables] == ['ORDER_LINES']
+    # Zastaralé: bez statistik nebo aspoň 10 % změněných řádků
+    tables, _ = store.query(stale=True, sort='table_name', descending=False)
+    assert [(t['table_name'], t['stale_pct']) for t in tables] == [('LOG', 0.0), ('ORDERS', 20.0)]
+
+
+def test_summary_follows_updates():
+    store = TableStatsStore()
+    store.replace([_row('A', 10, tablespace='DATA'), _row('B', 5, None)], (2, 0, T0))
+    summary = store.summary()
+    assert (summary['tables'], summary['total_rows'], summary['analyzed']) == (2, 15, 1)
+    assert summary['tablespaces'] == {'DATA': 1, 'USERS': 1}
+    store.update([_row('B', 50, T0 + timedelta(days=1))])
+    summary = store.summary()
+    assert summary['total_rows'] == 60 and summary['top_by_rows'][0]['table_name'] == 'B'
+
+
+@pytest.fixture
+def tables(target_states, pools, monkeypatch):
+    monkeypatch.setattr(Config, 'TABLE_STATS_REFRESH_INTERVAL', 3600)
+
+
+def test_table_stats_api(client, tables):
+    page = client.get('/api/table-stats?sort=num_rows&order=desc&limit=10').get_json()
+    assert page['total'] == 100 and len(page['tables']) == 10
+    num_rows = [t['num_rows'] for t in page['tables']]
+    assert num_rows == sorted(num_rows, reverse=True)
+    assert page['summary']['tables'] == 100
+
+    second = client.get('/api/table-stats?sort=num_rows&order=desc&limit=10&offset=10').get_json()
+    assert second['tables'][0]['num_rows'] <= num_rows[-1]
+    assert not {t['table_name'] for t in page['tables']} & {t['table_name'] for t in second['tables']}
+
+    names = [t['table_name'] for t in client.get('/api/table-stats?sort=table_name&order=asc&limit=3')
+             .get_json()['tables']]
+    assert names == ['TABLE_00000', 'TABLE_00001', 'TABLE_00002']
+
+    filtered = client.get('/api/table-stats?tablespace=DATA&search=table_0000&sort=table_name&order=asc').get_json()
+    assert [t['table_name'] for t in filtered['tables']] == ['TABLE_00001', 'TABLE_00004', 'TABLE_00007']
+    stale = client.get('/api/table-stats?stale=1&limit=1000').get_json()
+    assert 0 < stale['total'] < 100
+    assert all(t['last_analyzed'] is None or t['stale_pct'] >= 10 for t in stale['tables'])
+    # Jedno celé načtení pro všechny požadavky
+    assert page['store']['full_loads'] == 1 and stale['store']['full_loads'] == 1
+
+
+def test_table_stats_api_rejects_unknown_sort(client):
+    assert client.get('/api/table-stats?sort=bogus').status_code == 400
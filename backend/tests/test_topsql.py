@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from settings import Config
+from topsql import TextCache, TopSQL
+
+T0 = datetime(2024, 5, 1, 10, 0, 0)
+
+
+def _row(sql_id, executions, elapsed, active=T0):
+    # sql_id, executions, elapsed_time, cpu_time, buffer_gets, disk_reads, rows_processed, last_active_time
+    return sql_id, executions, elapsed, elapsed // 2, executions * 10, 0, executions, active
+
+
+def test_first_pass_is_baseline():
+    topsql = TopSQL()
+    assert topsql.since() == datetime(1970, 1, 1)
+    assert topsql.apply([_row('a', 10, 1000), _row('b', 5, 500)], now=0) == 0
+    assert topsql.top(window=60, now=0) == ([], 0.0)
+    # Kumulativně je vidět hned
+    ranked, covered = topsql.top(window=None, now=0)
+    assert [sql_id for sql_id, _ in ranked] == ['a', 'b'] and covered is None
+    assert topsql.since() == T0 - timedelta(seconds=1)
+
+
+def test_deltas_summed_over_window():
+    topsql = TopSQL()
+    topsql.apply([_row('a', 10, 1000), _row('b', 5, 500)], now=0)
+    topsql.apply([_row('a', 12, 1100), _row('b', 9, 900)], now=10)
+    topsql.apply([_row('a', 20, 5100)], now=20)
+    ranked, covered = topsql.top('elapsed', window=15, now=20)
+    assert ranked == [('a', (10, 4100, 2050, 100, 0, 10)), ('b', (4, 400, 200, 40, 0, 4))]
+    assert covered == 10.0
+    ranked, _ = topsql.top('executions', window=5, now=20)
+    assert ranked == [('a', (8, 4000, 2000, 80, 0, 8))]
+
+
+def test_new_statement_and_counter_reset_count_in_full():
+    topsql = TopSQL()
+    topsql.apply([_row('a', 10, 1000)], now=0)
+    # 'a' vypadl ze shared poolu a načetl se znovu, 'c' je nový
+    topsql.apply([_row('a', 3, 300), _row('c', 2, 200)], now=10)
+    ranked, _ = topsql.top('elapsed', window=60, now=10)
+    assert dict(ranked) == {'a': (3, 300, 150, 30, 0, 3), 'c': (2, 200, 100, 20, 0, 2)}
+
+
+def test_unchanged_statement_has_no_delta():
+    topsql = TopSQL()
+    topsql.apply([_row('a', 10, 1000)], now=0)
+    assert topsql.apply([_row('a', 10, 1000)], now=10) == 0
+
+
+def test_zero_executions_excluded_from_cumulative():
+    topsql = TopSQL()
+    topsql.apply([_row('a', 0, 0), _row('b', 1, 10)], now=0)
+    assert [sql_id for sql_id, _ in topsql.top(window=None)[0]] == ['b']
+
+
+def test_since_follows_latest_active_time():
+    topsql = TopSQL()
+    topsql.apply([_row('a', 1, 1, T0), _row('b', 1, 1, T0 + timedelta(seconds=30))], now=0)
+    topsql.apply([_row('a', 2, 2, T0 + timedelta(seconds=10))], now=10)
+    assert topsql.since() == T0 + timedelta(seconds=29)
+
+
+def test_old_buckets_and_statements_pruned():
+    evicted = []
+    topsql = TopSQL(max_window=100, retention=1000, on_evict=evicted.extend)
+    topsql.apply([_row('a', 1, 1), _row('b', 1, 1)], now=0)
+    topsql.apply([_row('a', 2, 2)], now=50)
+    topsql.apply([_row('a', 3, 3)], now=900)
+    assert topsql.stats()['buckets'] == 1
+    topsql.apply([_row('a', 4, 4)], now=1001)
+    assert evicted == ['b']
+    assert topsql.stats()['tracked_statements'] == 1
+
+
+def test_evict_forgets_totals_and_deltas():
+    evicted = []
+    topsql = TopSQL(on_evict=evicted.extend)
+    topsql.apply([_row('a', 1, 10), _row('b', 1, 20)], now=0)
+    topsql.apply([_row('a', 2, 20), _row('b', 2, 40)], now=10)
+    topsql.evict({'b'})
+    assert evicted == ['b']
+    assert [sql_id for sql_id, _ in topsql.top(window=60, now=10)[0]] == ['a']
+    assert [sql_id for sql_id, _ in topsql.top(window=None)[0]] == ['a']
+
+
+def test_due():
+    topsql = TopSQL()
+    assert topsql.due(10)
+    topsql.apply([], now=0)
+    assert not topsql.due(10)
+    assert topsql.due(0)
+
+
+def test_text_cache_lru_and_keep():
+    texts = TextCache(max_entries=2)
+    assert texts.missing(['a', 'b']) == ['a', 'b']
+    texts.put('a', 'APP', 'select a')
+    texts.put('b', 'APP', 'select b')
+    assert texts.missing(['a', 'c']) == ['c']
+    texts.put('c', 'APP', 'select c')
+    # 'b' nejdéle nepoužitý
+    assert texts.get('b') is None and texts.get('a') == ('APP', 'select a')
+    # Celý zobrazený žebříček zůstává i nad max_entries
+    texts.put('d', 'APP', 'select d', keep=3)
+    assert texts.stats()['entries'] == 3
+    texts.discard(['a', 'x'])
+    assert texts.get('a') is None
+    assert (texts.stats()['hits'], texts.stats()['misses']) == (1, 3)
+
+
+@pytest.fixture
+def sql_area(monkeypatch, target_states, pools):
+    from bench import fake_oracledb
+    monkeypatch.setitem(fake_oracledb.settings, 'sql_statements', 50)
+    monkeypatch.setitem(fake_oracledb.settings, 'hot_sql_ratio', 0.1)
+    monkeypatch.setattr(Config, 'TOPSQL_REFRESH_INTERVAL', 0)
+    return fake_oracledb
+
+
+def test_refresh_pulls_only_active_statements(client, sql_area, target_states):
+    response = client.get('/api/top-sql?window=all&limit=5')
+    assert response.status_code == 200
+    statements = response.get_json()['statements']
+    assert [s['sql_id'] for s in statements] == [f'sql{i:09d}' for i in range(5)]
+    assert all(s['sql_text'].startswith('SELECT /* bench') for s in statements)
+    stats = target_states().topsql.stats()
+    assert stats['rows_pulled'] == 50
+
+    client.get('/api/top-sql?window=300&limit=5')
+    # Druhý průchod čte jen příkazy aktivní od minula (5 "hot")
+    assert target_states().topsql.stats()['rows_pulled'] == 55
+    assert target_states().sql_texts.stats()['hits'] >= 5
+
+
+def test_statements_gone_from_sql_area_are_evicted(client, sql_area, target_states):
+    client.get('/api/top-sql?window=all&limit=50')
+    state = target_states()
+    assert state.sql_texts.stats()['entries'] == 50
+
+    # Příkazy 10.. vypadly ze shared poolu
+    sql_area.settings['sql_statements'] = 10
+    # Výpadek se pozná až při načítání textu - zapomenout ho i z cache
+    state.sql_texts.discard([f'sql{i:09d}' for i in range(50)])
+    statements = client.get('/api/top-sql?window=all&limit=20').get_json()['statements']
+    assert [s['sql_id'] for s in statements] == [f'sql{i:09d}' for i in range(10)]
+    assert all(s['sql_text'] for s in statements)
+    assert state.topsql.stats()['tracked_statements'] == 10
+    assert state.sql_texts.get('sql000000015') is None
+
+
+def test_unknown_order_and_window(client):
+    assert client.get('/api/top-sql?order=bogus').status_code == 400
+    assert client.get('/api/top-sql?window=abc').status_code == 400
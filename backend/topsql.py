@@ -0,0 +1,193 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+# Pořadí čítačů v řádcích SQL_TOP_SQL_STATS i v uložených přírůstcích
+COUNTERS = ('executions', 'elapsed_time', 'cpu_time', 'buffer_gets', 'disk_reads', 'rows_processed')
+# ?order= -> index čítače
+ORDER_BY = {'elapsed': 1, 'cpu': 2, 'buffer_gets': 3, 'disk_reads': 4, 'executions': 0, 'rows': 5}
+
+# Začátek prvního načtení - všechny příkazy ve V$SQLSTATS
+_BEGINNING = datetime(1970, 1, 1)
+
+
+class TopSQL:
+    """
+    Inkrementální žebříček SQL jedné cílové DB.
+
+    apply() dostává jen příkazy aktivní od minulého průchodu (LAST_ACTIVE_TIME)
+    a ukládá jejich kumulativní čítače a přírůstky po průchodech. top() řadí
+    přírůstky za zvolené okno, nebo kumulativní hodnoty (window=None).
+    Pokles čítače (příkaz vypadl ze shared poolu, restart) se bere jako nový
+    příkaz - přírůstkem je celá hodnota. on_evict(sql_ids) se volá pro
+    příkazy zapomenuté po retention nebo přes evict() (např. jejich texty).
+    """
+
+    def __init__(self, max_window=3600, retention=86400, on_evict=None):
+        self.max_window = max_window
+        self.retention = retention
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        # Průchody se nesmí překrývat - souběžný požadavek počká a použije výsledek
+        self.refresh_lock = threading.Lock()
+        self._totals = {}
+        self._buckets = deque()
+        self._since = None
+        self.last_refresh = None
+        self.refreshes = 0
+        self.rows_pulled = 0
+
+    def since(self):
+        """LAST_ACTIVE_TIME pro další dotaz (s překryvem 1 s - čas má přesnost na sekundy)"""
+        with self._lock:
+            return _BEGINNING if self._since is None else self._since - timedelta(seconds=1)
+
+    def due(self, interval, now=None):
+        if now is None:
+            now = time.monotonic()
+        return self.last_refresh is None or now - self.last_refresh >= interval
+
+    def apply(self, rows, now=None):
+        """Zpracuje řádky (sql_id, *COUNTERS, last_active_time) jednoho průchodu"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            # První průchod je jen základ - přírůstky od něj dál
+            initial = self._since is None
+            deltas = {}
+            for row in rows:
+                sql_id, counters, last_active = row[0], tuple(v or 0 for v in row[1:-1]), row[-1]
+                previous = self._totals.get(sql_id)
+                self._totals[sql_id] = (counters, now)
+                if last_active is not None and (self._since is None or last_active > self._since):
+                    self._since = last_active
+                if previous is None:
+                    if initial:
+                        continue
+                    delta = counters
+                else:
+                    delta = tuple(c - p for c, p in zip(counters, previous[0]))
+                    if any(d < 0 for d in delta):
+                        delta = counters
+                if any(delta):
+                    deltas[sql_id] = delta
+            if self._since is None:
+                self._since = _BEGINNING
+            self._buckets.append((now, deltas))
+            self._prune(now)
+            self.last_refresh = time.monotonic()
+            self.refreshes += 1
+            self.rows_pulled += len(rows)
+        return len(deltas)
+
+    def _prune(self, now):
+        while self._buckets and now - self._buckets[0][0] > self.max_window:
+            self._buckets.popleft()
+        # Kumulativní hodnoty dlouho neaktivních příkazů (už nejsou ve V$SQLSTATS)
+        stale = [sql_id for sql_id, (_, seen) in self._totals.items() if now - seen > self.retention]
+        for sql_id in stale:
+            del self._totals[sql_id]
+        if stale and self.on_evict is not None:
+            self.on_evict(stale)
+
+    def evict(self, sql_ids):
+        """Zapomene příkazy, které už ve V$SQLSTATS/V$SQLAREA nejsou (čítače i přírůstky)"""
+        with self._lock:
+            for sql_id in sql_ids:
+                self._totals.pop(sql_id, None)
+                for _, deltas in self._buckets:
+                    deltas.pop(sql_id, None)
+            if self.on_evict is not None:
+                self.on_evict(sql_ids)
+
+    def top(self, order='elapsed', window=None, limit=20, now=None):
+        """
+        Vrátí (řádky [(sql_id, čítače)], skutečně pokryté okno v s nebo None).
+        window=None řadí podle kumulativních hodnot.
+        """
+        index = ORDER_BY[order]
+        if now is None:
+            now = time.time()
+        with self._lock:
+            if window is None:
+                # Jako dříve WHERE executions > 0
+                items = [(sql_id, counters) for sql_id, (counters, _) in self._totals.items() if counters[0] > 0]
+                covered = None
+            else:
+                sums = {}
+                oldest = None
+                for ts, deltas in self._buckets:
+                    if now - ts > window:
+                        continue
+                    oldest = ts if oldest is None else oldest
+                    for sql_id, delta in deltas.items():
+                        total = sums.get(sql_id)
+                        sums[sql_id] = delta if total is None else tuple(a + b for a, b in zip(total, delta))
+                items = [item for item in sums.items() if item[1][index] > 0]
+                covered = round(now - oldest, 1) if oldest is not None else 0.0
+            ranked = heapq.nlargest(limit, items, key=lambda item: item[1][index])
+        return ranked, covered
+
+    def stats(self):
+        with self._lock:
+            return {
+                'tracked_statements': len(self._totals),
+                'buckets': len(self._buckets),
+                'refreshes': self.refreshes,
+                'rows_pulled': self.rows_pulled,
+                'since': self._since.isoformat() if self._since not in (None, _BEGINNING) else None,
+            }
+
+
+class TextCache:
+    """
+    Deduplikovaná LRU cache textů SQL podle SQL_ID - texty se načítají jen
+    pro příkazy, které se opravdu zobrazují, a jen jednou.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sql_id):
+        """(schema, text) nebo None"""
+        with self._lock:
+            entry = self._entries.get(sql_id)
+            if entry is not None:
+                self._entries.move_to_end(sql_id)
+            return entry
+
+    def missing(self, sql_ids):
+        with self._lock:
+            missing = []
+            for sql_id in sql_ids:
+                if sql_id in self._entries:
+                    self._entries.move_to_end(sql_id)
+                else:
+                    missing.append(sql_id)
+            self.hits += len(sql_ids) - len(missing)
+            self.misses += len(missing)
+            return missing
+
+    def put(self, sql_id, schema, text, keep=0):
+        """Uloží text; keep = kolik posledních položek nevyhazovat (právě zobrazený žebříček)"""
+        with self._lock:
+            self._entries[sql_id] = (schema, text)
+            self._entries.move_to_end(sql_id)
+            while len(self._entries) > max(self.max_entries, keep):
+                self._entries.popitem(last=False)
+
+    def discard(self, sql_ids):
+        with self._lock:
+            for sql_id in sql_ids:
+                self._entries.pop(sql_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,101 @@
+import threading
+import time
+from datetime import datetime
+
+import queries
+from settings import Config
+from db import oracledb, warm_pool
+from services import fetch_metrics, fetch_system_resources
+from targets import registry
+
+
+class Warmup:
+    """
+    Zahřátí po startu na pozadí, aby první požadavky dashboardu nečekaly na
+    import ovladače, připojení a parse dotazů: načte oracledb, u každé cílové
+    DB otevře pool (tolik spojení, kolik jich použije paralelní sběr) a na
+    spojeních připraví dotazy kolektorů, pak načte první snapshot výchozí DB
+    do cache sekcí. /api/ping mezitím odpovídá a hlásí stav.
+    """
+
+    def __init__(self, connections, statements, snapshot=True):
+        self.connections = connections
+        self.statements = statements
+        self.snapshot = snapshot
+        self.state = 'pending'
+        self.steps = []
+        self.started = None
+        self.duration_ms = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def _step(self, name, action):
+        start = time.perf_counter()
+        step = {'name': name}
+        try:
+            result = action()
+            if result is not None:
+                step['result'] = result
+        except Exception as e:
+            step['error'] = str(e)
+            print(f"Warning: Warmup step {name} failed: {e}")
+        step['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        self.steps.append(step)
+
+    def _snapshot(self):
+        if fetch_metrics() is None or fetch_system_resources() is None:
+            raise RuntimeError('No data from Oracle')
+
+    def run(self):
+        self.started = time.time()
+        self.state = 'running'
+        start = time.perf_counter()
+        try:
+            self._step('driver', lambda: getattr(oracledb.load(), '__version__', None))
+            for target in registry:
+                self._step(f'pool:{target.id}', lambda target=target: warm_pool(
+                    target, self.connections, self.statements))
+            if self.snapshot:
+                self._step('snapshot', self._snapshot)
+        finally:
+            self.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            self.state = 'failed' if any('error' in step for step in self.steps) else 'done'
+            self._done.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def status(self):
+        return {
+            'state': self.state,
+            'started': datetime.fromtimestamp(self.started).isoformat() if self.started else None,
+            'duration_ms': self.duration_ms,
+            'steps': list(self.steps),
+        }
+
+
+_warmup = None
+_lock = threading.Lock()
+
+
+def get_warmup():
+    """Warmup procesu, nebo None, pokud se nespustil (WARMUP_ENABLED=false, přehrávání)"""
+    return _warmup
+
+
+def start_warmup():
+    """Spustí warmup jednou za proces (start_background)"""
+    global _warmup
+    with _lock:
+        if _warmup is None:
+            # Spojení pro paralelní sběr sekcí, dotazy kolektorů jen do velikosti statement cache
+            connections = max(Config.ORACLE_POOL_MIN, Config.METRICS_PARALLEL_WORKERS)
+            statements = list(queries.STATEMENTS.values())[:Config.ORACLE_STMT_CACHE_SIZE]
+            _warmup = Warmup(connections, statements)
+            _warmup.start()
+        return _warmup
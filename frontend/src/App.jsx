@@ -18,6 +18,7 @@ function App() {
       setMetrics(response.data);
       setLastUpdate(new Date());
       setLoading(false);
+      return response.data.next_poll_ms;
     } catch (err) {
       setError(err.response?.data?.error || err.message);
       setLoading(false);
@@ -25,10 +26,20 @@ function App() {
   };
 
   useEffect(() => {
-    fetchData();
-    // Refresh každých 30 sekund
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
+    let timer = null;
+    let cancelled = false;
+    // Další refresh podle next_poll_ms z backendu (kratší při zátěži DB), jinak po 30 sekundách
+    const refresh = async () => {
+      const nextPoll = await fetchData();
+      if (!cancelled) {
+        timer = setTimeout(refresh, Math.max(nextPoll || 30000, 1000));
+      }
+    };
+    refresh();
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
   }, [sqlLimit]);
 
   return (
@@ -0,0 +1,51 @@
+function CapacityForecastTable({ tablespaces, minSamples }) {
+  if (!tablespaces || tablespaces.length === 0) {
+    return <p className="no-data">No capacity samples yet</p>;
+  }
+
+  const getDaysClass = (days) => {
+    if (days === null) return '';
+    if (days <= 30) return 'usage-critical';
+    if (days <= 90) return 'usage-warning';
+    return 'usage-ok';
+  };
+
+  const formatDays = (ts) => {
+    if (ts.status === 'insufficient_data') return `collecting (${ts.samples}/${minSamples})`;
+    if (ts.status === 'not_growing') return 'not growing';
+    return ts.days_to_full.toFixed(1);
+  };
+
+  return (
+    <div className="table-container">
+      <table className="data-table">
+        <thead>
+          <tr>
+            <th>Tablespace</th>
+            <th>Used (MB)</th>
+            <th>Total (MB)</th>
+            <th>Growth (MB/day)</th>
+            <th>Days to Full</th>
+            <th>Full On</th>
+          </tr>
+        </thead>
+        <tbody>
+          {tablespaces.map((ts) => (
+            <tr key={ts.name}>
+              <td className="tablespace-name">{ts.name}</td>
+              <td className="tablespace-size">{ts.used_mb.toFixed(2)}</td>
+              <td className="tablespace-size">{ts.total_mb.toFixed(2)}</td>
+              <td className="tablespace-size">
+                {ts.growth_mb_per_day !== null ? ts.growth_mb_per_day.toFixed(2) : '-'}
+              </td>
+              <td className={getDaysClass(ts.days_to_full)}>{formatDays(ts)}</td>
+              <td>{ts.full_at ? new Date(ts.full_at).toLocaleDateString() : '-'}</td>
+            </tr>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+}
+
+export default CapacityForecastTable;
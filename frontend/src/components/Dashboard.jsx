@@ -50,7 +50,7 @@ function Dashboard({ metrics, activeTab, setActiveTab, sqlLimit, setSqlLimit })
         {activeTab === 'overview' && <OverviewTab metrics={metrics} />}
         {activeTab === 'sessions' && <SessionsTab metrics={metrics} />}
         {activeTab === 'activesql' && <ActiveSQLTab metrics={metrics} sqlLimit={sqlLimit} setSqlLimit={setSqlLimit} />}
-        {activeTab === 'tablestats' && <TableStatsTab metrics={metrics} />}
+        {activeTab === 'tablestats' && <TableStatsTab />}
         {activeTab === 'sqlquery' && <SQLQueryTab />}
         {activeTab === 'performance' && <PerformanceTab metrics={metrics} />}
         {activeTab === 'storage' && <StorageTab metrics={metrics} />}
@@ -1,4 +1,15 @@
-function TableStatsTable({ tables }) {
+// Sloupce řaditelné na backendu (?sort=)
+const COLUMNS = [
+  ['table_name', 'Table Name'],
+  ['num_rows', 'Num Rows'],
+  ['blocks', 'Blocks'],
+  ['avg_row_len', 'Avg Row Len'],
+  ['tablespace', 'Tablespace'],
+  ['last_analyzed', 'Last Analyzed'],
+  ['stale_pct', 'Modified'],
+];
+
+function TableStatsTable({ tables, sort, order, onSort }) {
   if (!tables || tables.length === 0) {
     return <p className="no-data">No table statistics available</p>;
   }
@@ -27,17 +38,20 @@ function TableStatsTable({ tables }) {
       <table className="data-table table-stats-table">
         <thead>
           <tr>
-            <th>Table Name</th>
-            <th>Num Rows</th>
-            <th>Blocks</th>
-            <th>Avg Row Len</th>
-            <th>Tablespace</th>
-            <th>Last Analyzed</th>
+            {COLUMNS.map(([key, label]) => (
+              <th
+                key={key}
+                className={onSort ? 'sortable-header' : undefined}
+                onClick={onSort ? () => onSort(key) : undefined}
+              >
+                {label}{sort === key ? (order === 'asc' ? ' ▲' : ' ▼') : ''}
+              </th>
+            ))}
           </tr>
         </thead>
         <tbody>
-          {tables.map((table, index) => (
-            <tr key={index}>
+          {tables.map((table) => (
+            <tr key={table.table_name}>
               <td className="table-name-cell">
                 <strong>{table.table_name}</strong>
               </td>
@@ -50,6 +64,9 @@ function TableStatsTable({ tables }) {
                   {formatDate(table.last_analyzed)}
                 </span>
               </td>
+              <td className="modified-cell">
+                {table.stale_pct != null ? `${table.stale_pct}%` : 'N/A'}
+              </td>
             </tr>
           ))}
         </tbody>
@@ -1,28 +1,10 @@
-import { useState, useEffect } from 'react';
 import SystemEventsTable from '../SystemEventsTable';
 import LongRunningSQLTable from '../LongRunningSQLTable';
+import useSystemResources from '../../hooks/useSystemResources';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 
-const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
-
 function PerformanceTab({ metrics }) {
-  const [systemResources, setSystemResources] = useState(null);
-
-  useEffect(() => {
-    const fetchSystemResources = async () => {
-      try {
-        const response = await fetch(`${API_URL}/api/system-resources`);
-        const data = await response.json();
-        setSystemResources(data);
-      } catch (error) {
-        console.error('Error fetching system resources:', error);
-      }
-    };
-
-    fetchSystemResources();
-    const interval = setInterval(fetchSystemResources, 5000);
-    return () => clearInterval(interval);
-  }, []);
+  const { data: systemResources } = useSystemResources();
 
   // Prepare data for system events chart
   const systemEventsData = metrics.system_events.slice(0, 8).map(event => ({
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import axios from 'axios';
 
 function SQLQueryTab() {
@@ -6,6 +6,10 @@ function SQLQueryTab() {
   const [result, setResult] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Přerušení požadavku = odpojení klienta, backend dotaz v DB zruší
+  const controllerRef = useRef(null);
+
+  useEffect(() => () => controllerRef.current?.abort(), []);
 
   const executeQuery = async () => {
     if (!query.trim()) {
@@ -17,12 +21,22 @@ function SQLQueryTab() {
     setError(null);
     setResult(null);
 
+    const controller = new AbortController();
+    controllerRef.current = controller;
+
     try {
-      const response = await axios.post('/api/execute-query', { query });
+      const response = await axios.post('/api/execute-query', { query }, { signal: controller.signal });
       setResult(response.data);
     } catch (err) {
-      setError(err.response?.data?.error || err.message);
+      if (axios.isCancel(err)) {
+        setError('Query cancelled');
+      } else if (err.response?.status === 429) {
+        setError(`${err.response.data.error} (retry in ${err.response.headers['retry-after']} s)`);
+      } else {
+        setError(err.response?.data?.error || err.message);
+      }
     } finally {
+      controllerRef.current = null;
       setLoading(false);
     }
   };
@@ -202,6 +216,14 @@ WHERE owner = USER`
             >
               {loading ? 'Executing...' : 'Execute Query'}
             </button>
+            {loading && (
+              <button
+                className="clear-button"
+                onClick={() => controllerRef.current?.abort()}
+              >
+                Cancel
+              </button>
+            )}
             <button 
               className="clear-button" 
               onClick={() => {
@@ -228,7 +250,10 @@ WHERE owner = USER`
           <div className="query-results">
             <div className="results-header">
               <h3>Results</h3>
-              <span className="row-count">{result.row_count} row{result.row_count !== 1 ? 's' : ''} returned</span>
+              <span className="row-count">
+                {result.row_count} row{result.row_count !== 1 ? 's' : ''} returned
+                {result.cached && ` (cached ${Math.round(result.cache_age_sec)} s ago)`}
+              </span>
             </div>
 
             {result.data.length > 0 ? (
@@ -1,8 +1,12 @@
 import TablespacesTable from '../TablespacesTable';
 import SGAStatsTable from '../SGAStatsTable';
+import CapacityForecastTable from '../CapacityForecastTable';
+import useCapacity from '../../hooks/useCapacity';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts';
 
 function StorageTab({ metrics }) {
+  const { data: capacity, error: capacityError } = useCapacity();
+
   // Prepare tablespace data for chart
   const tablespaceData = metrics.tablespaces.slice(0, 8).map(ts => ({
     name: ts.name,
@@ -82,6 +86,16 @@ function StorageTab({ metrics }) {
         <h2>SGA Components</h2>
         <SGAStatsTable sgaData={metrics.sga_stats} />
       </div>
+
+      {/* Capacity Forecast */}
+      <div className="dashboard-card full-width">
+        <h2>Capacity Forecast</h2>
+        {capacityError && <div className="error">Error: {capacityError}</div>}
+        <CapacityForecastTable
+          tablespaces={capacity?.tablespaces}
+          minSamples={capacity?.min_samples}
+        />
+      </div>
     </div>
   );
 }
@@ -1,29 +1,8 @@
-import { useState, useEffect } from 'react';
-import axios from 'axios';
+import useSystemResources from '../../hooks/useSystemResources';
 
 const SystemResourcesTab = () => {
-  const [data, setData] = useState(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
-
-  const fetchData = async () => {
-    try {
-      const response = await axios.get('http://localhost:5000/api/system-resources');
-      setData(response.data);
-      setError(null);
-    } catch (err) {
-      setError(err.message);
-      console.error('Error fetching system resources:', err);
-    } finally {
-      setLoading(false);
-    }
-  };
-
-  useEffect(() => {
-    fetchData();
-    const interval = setInterval(fetchData, 5000); // Refresh every 5 seconds
-    return () => clearInterval(interval);
-  }, []);
+  const { data, error } = useSystemResources();
+  const loading = !data && !error;
 
   if (loading) {
     return <div className="loading">Loading system resources...</div>;
@@ -1,58 +1,95 @@
+import { useState, useEffect } from 'react';
 import TableStatsTable from '../TableStatsTable';
+import useTableStats from '../../hooks/useTableStats';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, PieChart, Pie, Cell } from 'recharts';
 
-function TableStatsTab({ metrics }) {
-  // Prepare data for charts
-  const topByRows = metrics.table_stats.slice(0, 10).map(table => ({
-    name: table.table_name.length > 15 ? table.table_name.substring(0, 15) + '...' : table.table_name,
+const PAGE_SIZE = 50;
+
+const shortName = (name) => name.length > 15 ? name.substring(0, 15) + '...' : name;
+
+function TableStatsTab() {
+  const [sort, setSort] = useState('num_rows');
+  const [order, setOrder] = useState('desc');
+  const [searchInput, setSearchInput] = useState('');
+  const [search, setSearch] = useState('');
+  const [stale, setStale] = useState(false);
+  const [offset, setOffset] = useState(0);
+
+  // Hledání až po dopsání, ne dotaz na každý stisk klávesy
+  useEffect(() => {
+    const timeout = setTimeout(() => {
+      setSearch(searchInput.trim());
+      setOffset(0);
+    }, 300);
+    return () => clearTimeout(timeout);
+  }, [searchInput]);
+
+  const { data, error } = useTableStats({ sort, order, search, stale, offset, limit: PAGE_SIZE });
+
+  if (!data && error) {
+    return <div className="error">Error: {error}</div>;
+  }
+
+  if (!data) {
+    return <div className="loading">Loading table statistics...</div>;
+  }
+
+  const handleSort = (column) => {
+    if (column === sort) {
+      setOrder(order === 'desc' ? 'asc' : 'desc');
+    } else {
+      setSort(column);
+      setOrder(column === 'table_name' || column === 'tablespace' ? 'asc' : 'desc');
+    }
+    setOffset(0);
+  };
+
+  // Souhrn a grafy počítá backend ze všech tabulek, ne z aktuální stránky
+  const { summary } = data;
+
+  const topByRows = summary.top_by_rows.map(table => ({
+    name: shortName(table.table_name),
     'Rows': table.num_rows
   }));
 
-  const topByBlocks = metrics.table_stats.slice(0, 10).map(table => ({
-    name: table.table_name.length > 15 ? table.table_name.substring(0, 15) + '...' : table.table_name,
+  const topByBlocks = summary.top_by_blocks.map(table => ({
+    name: shortName(table.table_name),
     'Blocks': table.blocks
   }));
 
-  // Pie chart for tablespace distribution
-  const tablespaceDistribution = {};
-  metrics.table_stats.forEach(table => {
-    const ts = table.tablespace || 'UNKNOWN';
-    tablespaceDistribution[ts] = (tablespaceDistribution[ts] || 0) + 1;
-  });
-  const tablespaceData = Object.entries(tablespaceDistribution).map(([name, value]) => ({
+  const tablespaceData = Object.entries(summary.tablespaces).map(([name, value]) => ({
     name,
     value
   }));
 
   const COLORS = ['#3b82f6', '#8b5cf6', '#ec4899', '#f59e0b', '#10b981', '#06b6d4', '#ef4444', '#f97316'];
 
-  // Calculate statistics
-  const totalRows = metrics.table_stats.reduce((sum, t) => sum + t.num_rows, 0);
-  const totalBlocks = metrics.table_stats.reduce((sum, t) => sum + t.blocks, 0);
-  const analyzedTables = metrics.table_stats.filter(t => t.last_analyzed).length;
+  const pageEnd = Math.min(offset + data.tables.length, data.total);
 
   return (
     <div className="tab-grid">
       {/* Summary Cards */}
       <div className="dashboard-card">
         <h3>Total Tables</h3>
-        <div className="metric-value-large">{metrics.table_stats.length}</div>
+        <div className="metric-value-large">{summary.tables.toLocaleString()}</div>
       </div>
 
       <div className="dashboard-card">
         <h3>Total Rows</h3>
-        <div className="metric-value-large">{totalRows.toLocaleString()}</div>
+        <div className="metric-value-large">{summary.total_rows.toLocaleString()}</div>
       </div>
 
       <div className="dashboard-card">
         <h3>Total Blocks</h3>
-        <div className="metric-value-large">{totalBlocks.toLocaleString()}</div>
+        <div className="metric-value-large">{summary.total_blocks.toLocaleString()}</div>
       </div>
 
       <div className="dashboard-card">
         <h3>Analyzed Tables</h3>
-        <div className="metric-value-large">{analyzedTables}</div>
-        <div className="metric-label">{((analyzedTables / metrics.table_stats.length) * 100).toFixed(1)}% of total</div>
+        <div className="metric-value-large">{summary.analyzed.toLocaleString()}</div>
+        <div className="metric-label">
+          {summary.tables ? ((summary.analyzed / summary.tables) * 100).toFixed(1) : '0.0'}% of total, {summary.stale} stale
+        </div>
       </div>
 
       {/* Top Tables by Rows */}
@@ -130,8 +167,38 @@ function TableStatsTab({ metrics }) {
 
       {/* Table Statistics Table */}
       <div className="dashboard-card full-width">
-        <h2>Table Statistics ({metrics.table_stats.length})</h2>
-        <TableStatsTable tables={metrics.table_stats} />
+        <div className="table-header-controls">
+          <h2>Table Statistics ({data.total.toLocaleString()})</h2>
+          <div className="sql-limit-control">
+            <input
+              type="text"
+              className="table-search-input"
+              placeholder="Search table name..."
+              value={searchInput}
+              onChange={(e) => setSearchInput(e.target.value)}
+            />
+            <label>
+              <input
+                type="checkbox"
+                checked={stale}
+                onChange={(e) => { setStale(e.target.checked); setOffset(0); }}
+              />
+              {' '}Stale only
+            </label>
+          </div>
+        </div>
+        <TableStatsTable tables={data.tables} sort={sort} order={order} onSort={handleSort} />
+        <div className="table-pagination">
+          <span>
+            {data.total ? `${(offset + 1).toLocaleString()}–${pageEnd.toLocaleString()}` : '0'} of {data.total.toLocaleString()}
+          </span>
+          <button disabled={offset === 0} onClick={() => setOffset(Math.max(0, offset - PAGE_SIZE))}>
+            Previous
+          </button>
+          <button disabled={pageEnd >= data.total} onClick={() => setOffset(offset + PAGE_SIZE)}>
+            Next
+          </button>
+        </div>
       </div>
     </div>
   );
@@ -0,0 +1,40 @@
+import { useState, useEffect } from 'react';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
+
+// Prognóza zaplnění tablespaců z /api/capacity - modely se mění jen
+// s novým vzorkem (výchozí interval 5 min), proto stačí řídké dotazování.
+function useCapacity(pollInterval = 300000) {
+  const [data, setData] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+
+    const load = async () => {
+      try {
+        const response = await fetch(`${API_URL}/api/capacity`);
+        const payload = await response.json();
+        if (!response.ok) throw new Error(payload.error || response.statusText);
+        if (!cancelled) {
+          setData(payload);
+          setError(null);
+        }
+      } catch (err) {
+        if (!cancelled) setError(err.message);
+        console.error('Error fetching capacity forecast:', err);
+      }
+    };
+
+    load();
+    const interval = setInterval(load, pollInterval);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [pollInterval]);
+
+  return { data, error };
+}
+
+export default useCapacity;
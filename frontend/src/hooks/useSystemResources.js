@@ -0,0 +1,70 @@
+import { useState, useEffect } from 'react';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
+
+// Systémové zdroje ze sdíleného streamu (/api/stream) - backend sbírá jednou
+// pro všechny klienty. Bez EventSource nebo při zavřeném streamu polling
+// s odstupem podle next_poll_ms z backendu (pollInterval jen bez něj).
+function useSystemResources(pollInterval = 5000) {
+  const [data, setData] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let timer = null;
+    let polling = false;
+    let cancelled = false;
+    let source = null;
+
+    const poll = async () => {
+      let nextPoll = null;
+      try {
+        const response = await fetch(`${API_URL}/api/system-resources`);
+        const payload = await response.json();
+        setData(payload);
+        setError(null);
+        nextPoll = payload.next_poll_ms;
+      } catch (err) {
+        setError(err.message);
+        console.error('Error fetching system resources:', err);
+      }
+      if (!cancelled) {
+        timer = setTimeout(poll, Math.max(nextPoll || pollInterval, 1000));
+      }
+    };
+
+    const startPolling = () => {
+      if (polling) return;
+      polling = true;
+      poll();
+    };
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      source = new EventSource(`${API_URL}/api/stream?resources=1`);
+      source.addEventListener('snapshot', (event) => {
+        const payload = JSON.parse(event.data);
+        if (payload.system_resources) {
+          setData(payload.system_resources);
+          setError(null);
+        }
+      });
+      source.onerror = () => {
+        // Přerušené spojení EventSource obnoví sám, zavřené už ne
+        if (source.readyState === EventSource.CLOSED) {
+          startPolling();
+        }
+      };
+    }
+
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+      clearTimeout(timer);
+    };
+  }, [pollInterval]);
+
+  return { data, error };
+}
+
+export default useSystemResources;
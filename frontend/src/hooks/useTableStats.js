@@ -0,0 +1,43 @@
+import { useState, useEffect } from 'react';
+
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
+
+// Stránka statistik tabulek z /api/table-stats - řazení, filtr a stránkování
+// dělá backend nad pamětí, do prohlížeče jde jen zobrazená stránka a souhrn.
+function useTableStats({ sort, order, search, stale, offset, limit }, pollInterval = 60000) {
+  const [data, setData] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    let cancelled = false;
+
+    const load = async () => {
+      try {
+        const params = new URLSearchParams({ sort, order, offset, limit });
+        if (search) params.set('search', search);
+        if (stale) params.set('stale', '1');
+        const response = await fetch(`${API_URL}/api/table-stats?${params}`);
+        const payload = await response.json();
+        if (!response.ok) throw new Error(payload.error || response.statusText);
+        if (!cancelled) {
+          setData(payload);
+          setError(null);
+        }
+      } catch (err) {
+        if (!cancelled) setError(err.message);
+        console.error('Error fetching table statistics:', err);
+      }
+    };
+
+    load();
+    const interval = setInterval(load, pollInterval);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, [sort, order, search, stale, offset, limit, pollInterval]);
+
+  return { data, error };
+}
+
+export default useTableStats;
@@ -60,7 +60,7 @@ Write-Host ""
 $backendPath = "$PWD\backend"
 
 # Spuštění backendu v novém okně PowerShell
-Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$backendPath'; .\venv\Scripts\activate; python app.py"
+Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$backendPath'; .\venv\Scripts\activate; python serve.py"
 
 Write-Host "Backend started in new window" -ForegroundColor Green
 Write-Host ""
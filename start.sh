@@ -75,7 +75,7 @@ fi
 cd backend
 source venv/bin/activate
 export PYTHONUNBUFFERED=1
-python3 app.py > ../backend.log 2>&1 &
+python3 serve.py > ../backend.log 2>&1 &
 BACKEND_PID=$!
 cd ..
 